@@ -0,0 +1,4 @@
+# backend/__init__.py
+
+# Database-side code shared by the editor and headless runs. Nothing in this package
+# may import PyQt5.
@@ -0,0 +1,168 @@
+# backend/cli.py
+
+import argparse
+import os
+import signal
+import sqlite3
+import sys
+
+from backend.executor import QueryExecutor, QueryCancelled
+from backend.scriptrunner import iter_statements, ScriptError
+from backend.export import FORMATS
+from backend.params import find_parameters, parse_value, bind_parameters
+from backend.profiles import PRESETS, ProfileStore, open_connection
+
+
+class ResultWriter:
+    # Writes each result set of a script as it streams: the first to `out`, later ones to
+    # out_2, out_3, ... next to it. Without `out`, text formats go to stdout one after another.
+    def __init__(self, out, fmt):
+        self.out = out
+        self.fmt = fmt
+        self.writer = None
+        self.results = 0
+        self.rows = 0
+        self.paths = []
+
+    def path(self):
+        if self.out is None:
+            return sys.stdout
+        if self.results == 1:
+            return self.out
+        stem, extension = os.path.splitext(self.out)
+        return f"{stem}_{self.results}{extension}"
+
+    def columns(self, headers):
+        self.close()
+        self.results += 1
+        if self.out is None and self.results > 1:
+            # A blank line between result sets on stdout
+            sys.stdout.write('\n')
+        path = self.path()
+        self.writer = FORMATS[self.fmt](path)
+        self.writer.write_header(headers)
+        if path is not sys.stdout:
+            self.paths.append(path)
+
+    def write(self, rows):
+        self.writer.write_rows(rows)
+        self.rows += len(rows)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        sys.stdout.flush()
+
+
+def parse_params(items):
+    # "name=value" pairs from the command line. Names may carry their prefix (":id", "@id",
+    # "?2") or not ("id", "2").
+    values = {}
+    for item in items:
+        name, separator, value = item.partition('=')
+        if not separator or not name:
+            raise ValueError(f"Parameter '{item}' is not NAME=VALUE.")
+        values[name] = parse_value(value)
+    return values
+
+
+def _statements(lines, values):
+    # (sql, line, params) for QueryExecutor.run_script, read from the script as it runs
+    for sql, line, _ in iter_statements(lines):
+        names = find_parameters(sql)
+        bound = {}
+        for name in names:
+            for key in (name, name[1:]):
+                if key in values:
+                    bound[name] = values[key]
+                    break
+            else:
+                raise ValueError(f"Line {line}: no value for {name}; pass --param {name[1:]}=VALUE.")
+        yield sql, line, bind_parameters(names, bound)
+
+
+def run(args):
+    fmt = args.format
+    if fmt is None and args.out:
+        fmt = os.path.splitext(args.out)[1][1:].lower()
+        if fmt and fmt not in FORMATS:
+            raise ValueError(f"No output format for '.{fmt}' files; pass --format, one of "
+                             f"{', '.join(sorted(FORMATS))}.")
+    fmt = fmt or 'csv'
+    if args.out is None and fmt == 'zcol':
+        raise ValueError("The zcol format needs --out.")
+
+    if args.profile:
+        profile = PRESETS[args.profile]
+    else:
+        # The profile chosen for this file in the editor, if any
+        try:
+            store = ProfileStore()
+        except OSError as e:
+            print(f"warning: saved profiles are unavailable, using the default profile: {e}", file=sys.stderr)
+            store = ProfileStore(persist=False)
+        profile = store.get(args.database)
+    values = parse_params(args.param)
+
+    # sqlite3 would create a mistyped path as a new, empty database and run the script on that
+    if not os.path.isfile(args.database):
+        raise ValueError(f"No database file at {args.database}.")
+    conn = open_connection(args.database, profile, read_only=args.read_only or None)
+    executor = QueryExecutor(conn)
+    writer = ResultWriter(args.out, fmt)
+    # Ctrl+C stops the running statement through the progress handler and rolls back
+    previous = signal.signal(signal.SIGINT, lambda *_: executor.cancel())
+    script = sys.stdin.buffer if args.script == '-' else open(args.script, 'rb')
+    try:
+        summary = executor.run_script(_statements(script, values), args.single_transaction,
+                                      on_columns=writer.columns, on_rows=writer.write)
+    finally:
+        signal.signal(signal.SIGINT, previous)
+        writer.close()
+        if script is not sys.stdin.buffer:
+            script.close()
+        conn.close()
+
+    written = f", output in {', '.join(writer.paths)}" if writer.paths else ""
+    print(f"{summary['statements']} statements, {writer.results} result sets, {writer.rows} rows "
+          f"in {summary['elapsed']:.2f} s{written}.", file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="zen_sql", description="Run SQL against SQLite databases without the editor.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run a .sql script and stream its result sets.")
+    run_parser.add_argument("database", help="SQLite database file; it must already exist.")
+    run_parser.add_argument("script", help="SQL script to run, or - for standard input.")
+    run_parser.add_argument("--out", help="Write result sets here instead of standard output; "
+                                          "later result sets go to OUT_2, OUT_3, ...")
+    run_parser.add_argument("--format", choices=sorted(FORMATS), help="Output format; by default taken from "
+                                                                       "the --out extension, csv if it has none.")
+    run_parser.add_argument("--param", "-p", action="append", default=[], metavar="NAME=VALUE",
+                            help="Value for a :name, @name, $name or ?N placeholder. May be repeated.")
+    run_parser.add_argument("--single-transaction", action="store_true",
+                            help="Run the whole script in one transaction, rolled back if a statement fails. "
+                                 "Much faster for scripts with many writes.")
+    run_parser.add_argument("--profile", choices=sorted(PRESETS), help="Connection profile to apply.")
+    run_parser.add_argument("--read-only", action="store_true", help="Open the database read-only.")
+    run_parser.set_defaults(handler=run)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        args.handler(args)
+    except QueryCancelled:
+        print("Cancelled, the open transaction was rolled back.", file=sys.stderr)
+        return 130
+    except ScriptError as e:
+        print(f"error: {e}", file=sys.stderr)
+        print(f"{e.committed} statements were committed before the error.", file=sys.stderr)
+        return 1
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,11 @@
+# backend/config.py
+
+import os
+
+# Per-user settings and local databases (connection profiles, query history)
+CONFIG_DIR = os.environ.get("ZEN_SQL_HOME", os.path.join(os.path.expanduser("~"), ".zen-sql"))
+
+
+def config_path(name):
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    return os.path.join(CONFIG_DIR, name)
@@ -0,0 +1,317 @@
+# backend/connections.py
+
+import os
+import sqlite3
+import threading
+
+from backend.profiles import open_connection
+from backend.sqllexer import tokenize_line, NORMAL
+
+# Reader connections a pool keeps open between background tasks; more are opened when needed
+MAX_IDLE_READERS = 4
+
+# Statements starting with these only read, unless they contain one of _WRITES
+_READS = frozenset(("SELECT", "VALUES", "WITH", "EXPLAIN"))
+_WRITES = frozenset(("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER", "ATTACH", "DETACH",
+                     "VACUUM", "REINDEX", "ANALYZE", "PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT",
+                     "RELEASE"))
+
+
+class PoolBusy(Exception):
+    pass
+
+
+def _tokens(sql):
+    # (kind, text) of every token but whitespace and comments
+    tokens = []
+    state = NORMAL
+    for line in sql.split('\n'):
+        line_tokens, state = tokenize_line(line, state)
+        tokens.extend((kind, line[start:start + length]) for kind, start, length in line_tokens
+                      if kind not in ('ws', 'comment'))
+    return tokens
+
+
+def _unquote(text):
+    if len(text) >= 2 and text[0] + text[-1] in ("''", '""', '``'):
+        return text[1:-1].replace(text[0] * 2, text[0])
+    if len(text) >= 2 and text[0] + text[-1] == '[]':
+        return text[1:-1]
+    return text
+
+
+def is_read_only(sql):
+    # True if `sql` can run on a read-only connection: a SELECT, VALUES, WITH or EXPLAIN that
+    # names no writing keyword anywhere. Errs towards False, which only costs the writer.
+    words = [text.upper() for kind, text in _tokens(sql) if kind == 'keyword']
+    return bool(words) and words[0] in _READS and not _WRITES.intersection(words)
+
+
+def parse_attach(sql):
+    # ('attach', path, alias) for ATTACH [DATABASE] 'path' AS alias, ('detach', alias) for
+    # DETACH [DATABASE] alias, None for anything else
+    tokens = _tokens(sql)
+    if tokens and tokens[-1][1] == ';':
+        tokens.pop()
+    words = [text.upper() if kind == 'keyword' else None for kind, text in tokens]
+    if len(words) > 1 and words[1] == 'DATABASE':
+        tokens, words = tokens[:1] + tokens[2:], words[:1] + words[2:]
+    names = ('word', 'identifier')
+    if len(tokens) == 4 and words[0] == 'ATTACH' and tokens[1][0] == 'string' and words[2] == 'AS' \
+            and tokens[3][0] in names:
+        return 'attach', _unquote(tokens[1][1]), _unquote(tokens[3][1])
+    if len(tokens) == 2 and words[0] == 'DETACH' and tokens[1][0] in names + ('string',):
+        return 'detach', _unquote(tokens[1][1])
+    return None
+
+
+class ConnectionPool:
+    # The connections open on one database file:
+    #   conn     read-only, used on the GUI thread to browse tables and read the schema
+    #   writer   the only connection that writes: cell edits, the editor's writing statements,
+    #            scripts and imports, lent to one user at a time
+    #   readers  read-only, lent to background queries, statistics, exports and comparisons
+    # and the databases ATTACHed to all of them. With a WAL journal readers never wait for the
+    # writer nor the writer for them; in rollback journal modes SQLite still serializes them.
+    def __init__(self, db_path, profile, attached=None):
+        self.db_path = os.path.abspath(db_path)
+        self.profile = profile
+        # {alias: path}, attached to every connection of the pool
+        self.attached = {}
+        # {connection: {alias: path}} as attached on each connection so far. Like the idle and
+        # lent sets it is only changed under _lock, connections being synced on several threads.
+        self._attachments = {}
+        self._lock = threading.Lock()
+        self._idle = []
+        self._lent = set()
+        self._writer_lent = False
+        self.closed = False
+
+        # The writer opens first: it creates the file, switches the journal mode and rolls
+        # back a hot journal the read-only connections could not
+        self.writer = open_connection(self.db_path, profile, check_same_thread=False)
+        try:
+            self.writer.execute("PRAGMA schema_version").fetchone()
+            self.journal_mode = self.writer.execute("PRAGMA journal_mode").fetchone()[0].lower()
+            self.conn = open_connection(self.db_path, profile, read_only=True)
+        except Exception:
+            self.writer.close()
+            raise
+        for alias, path in (attached or {}).items():
+            try:
+                self.attach(path, alias)
+            except Exception:
+                # A file attached before may have gone since; the pool opens without it
+                pass
+
+    def _open_reader(self):
+        conn = open_connection(self.db_path, self.profile, read_only=True, check_same_thread=False)
+        try:
+            self._sync(conn)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _sync(self, conn):
+        # Brings the connection's attached databases in line with self.attached; the statements
+        # run outside the lock, the bookkeeping changes under it
+        with self._lock:
+            current = dict(self._attachments.setdefault(conn, {}))
+            wanted = dict(self.attached)
+        for alias in [alias for alias, path in current.items() if wanted.get(alias) != path]:
+            conn.execute("DETACH DATABASE ?", (alias,))
+            del current[alias]
+            self._record(conn, current)
+        for alias, path in wanted.items():
+            if alias not in current:
+                conn.execute("ATTACH DATABASE ? AS ?", (path, alias))
+                current[alias] = path
+                self._record(conn, current)
+
+    def _record(self, conn, attachments):
+        # Unless the connection was forgotten or the pool closed meanwhile
+        with self._lock:
+            if conn in self._attachments:
+                self._attachments[conn] = dict(attachments)
+
+    def _forget(self, conn):
+        with self._lock:
+            self._attachments.pop(conn, None)
+
+    def _recount(self, conn):
+        # A script may ATTACH or DETACH on the connection it was lent. What is really attached
+        # is recorded, so the next _sync undoes it: outside the sidebar and single ATTACH or
+        # DETACH statements, an attachment lasts only as long as the script.
+        actual = {row[1]: row[2] for row in conn.execute("PRAGMA database_list") if row[1] not in ('main', 'temp')}
+        with self._lock:
+            if conn in self._attachments:
+                tracked = self._attachments[conn]
+                self._attachments[conn] = {alias: tracked.get(alias, path) for alias, path in actual.items()}
+
+    def _reset(self, conn):
+        # Undoes what the last user may have left on a lent connection
+        conn.set_progress_handler(None, 0)
+        if conn.in_transaction:
+            conn.rollback()
+
+    def acquire_reader(self):
+        # A read-only connection for a worker thread; give it back with release()
+        with self._lock:
+            if self.closed:
+                raise PoolBusy(f"{os.path.basename(self.db_path)} is closed.")
+            conn = self._idle.pop() if self._idle else None
+        if conn is not None:
+            try:
+                self._sync(conn)
+            except sqlite3.Error:
+                # A statement its last user left unfinished still reads the database to detach
+                self._forget(conn)
+                conn.close()
+                conn = None
+        if conn is None:
+            conn = self._open_reader()
+        with self._lock:
+            self._lent.add(conn)
+        return conn
+
+    def acquire_writer(self):
+        # The writer, or PoolBusy while another user has it. Never waits: the GUI thread asks too.
+        with self._lock:
+            if self.closed:
+                raise PoolBusy(f"{os.path.basename(self.db_path)} is closed.")
+            if self._writer_lent:
+                raise PoolBusy(f"{os.path.basename(self.db_path)} is busy with another write, "
+                               f"try again once it finishes.")
+            self._writer_lent = True
+        try:
+            self._sync(self.writer)
+        except Exception:
+            self.release(self.writer)
+            raise
+        return self.writer
+
+    def release(self, conn):
+        # Back to the pool; safe to call from any thread and after close()
+        if self.closed:
+            if conn is not self.writer:
+                conn.close()
+            return
+        try:
+            self._reset(conn)
+            self._recount(conn)
+        except Exception:
+            pass
+        with self._lock:
+            if conn is self.writer:
+                self._writer_lent = False
+                return
+            self._lent.discard(conn)
+            if len(self._idle) < MAX_IDLE_READERS:
+                self._idle.append(conn)
+                return
+        self._forget(conn)
+        conn.close()
+
+    def busy(self):
+        with self._lock:
+            return self._writer_lent or bool(self._lent)
+
+    def attach(self, path, alias):
+        # ATTACHes `path` as `alias` on every connection. Raises sqlite3.Error, leaving the
+        # pool as it was, if the GUI connection cannot attach it.
+        alias = alias.strip()
+        if not alias or alias.lower() in ('main', 'temp'):
+            raise ValueError(f"'{alias}' cannot be used as a database name.")
+        if alias.lower() in (name.lower() for name in self.attached):
+            raise ValueError(f"A database is already attached as '{alias}'.")
+        path = os.path.abspath(path)
+        with self._lock:
+            self.attached[alias] = path
+        try:
+            self._sync(self.conn)
+        except Exception:
+            with self._lock:
+                del self.attached[alias]
+            raise
+        self._sync_idle()
+
+    def detach(self, alias):
+        with self._lock:
+            path = self.attached.pop(alias, None)
+        if path is None:
+            raise ValueError(f"No database is attached as '{alias}'.")
+        self._sync(self.conn)
+        self._sync_idle()
+
+    def _sync_idle(self):
+        # Connections out on loan catch up when they are next acquired
+        with self._lock:
+            idle = list(self._idle)
+            writer_free = not self._writer_lent
+        for conn in idle + ([self.writer] if writer_free else []):
+            try:
+                self._sync(conn)
+            except Exception:
+                # Retried on the next acquire, which reports the error
+                pass
+
+    def tables(self, alias):
+        # Tables and views of an attached database, as seen by the GUI connection
+        schema = '"' + alias.replace('"', '""') + '"'
+        return [row[0] for row in self.conn.execute(
+            f"SELECT name FROM {schema}.sqlite_master WHERE type IN ('table', 'view') ORDER BY name")]
+
+    def close(self):
+        # Closes every connection, those still lent out included: stop their workers first
+        with self._lock:
+            self.closed = True
+            connections = self._idle + list(self._lent)
+            self._idle, self._lent = [], set()
+            self._attachments.clear()
+        for conn in connections + [self.conn, self.writer]:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+class ConnectionManager:
+    # The open databases, one pool each, keyed by absolute path: opening a file that is already
+    # open returns its pool instead of a second set of handles
+    def __init__(self):
+        self.pools = {}
+
+    def get(self, db_path):
+        return self.pools.get(os.path.abspath(db_path))
+
+    def open(self, db_path, profile):
+        # Reopened with the new profile if it changed; the attached databases carry over
+        path = os.path.abspath(db_path)
+        pool = self.pools.get(path)
+        attached = None
+        if pool is not None:
+            if pool.profile.to_dict() == profile.to_dict():
+                return pool
+            if pool.busy():
+                raise PoolBusy(f"{os.path.basename(path)} is in use by a running task.")
+            attached = dict(pool.attached)
+            self.close(path)
+        pool = ConnectionPool(path, profile, attached)
+        self.pools[path] = pool
+        return pool
+
+    def close(self, db_path):
+        pool = self.pools.pop(os.path.abspath(db_path), None)
+        if pool is not None:
+            pool.close()
+
+    def close_all(self):
+        for path in list(self.pools):
+            self.close(path)
+
+    def __iter__(self):
+        return iter(self.pools.values())
+
+    def __len__(self):
+        return len(self.pools)
@@ -0,0 +1,333 @@
+# backend/dbdiff.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from backend.rowkeys import table_key
+
+# Upper bound on the rows of either database in one compared key range
+CHUNK_ROWS = 1000
+
+# Name the other database is attached under
+OTHER = 'other'
+
+# Order objects are dropped in before the data is synchronized and created in afterwards
+_DROP_ORDER = ('trigger', 'view', 'index', 'table')
+_CREATE_ORDER = ('index', 'view', 'trigger')
+
+
+class DiffCancelled(Exception):
+    def __init__(self):
+        super().__init__("Comparison cancelled.")
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _chunk_hash(text):
+    # Digest of a key range's rows as serialized by SQLite, so only 16 bytes per range reach Python
+    if text is None:
+        return None
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+class TableDiff:
+    def __init__(self, table, status):
+        self.table = table
+        # 'same', 'changed', 'added', 'removed' or 'skipped'
+        self.status = status
+        self.note = ""
+        self.rows = 0
+        self.chunks = 0
+        self.changed_chunks = 0
+        self.inserts = 0
+        self.updates = 0
+        self.deletes = 0
+
+
+class DatabaseDiff:
+    # Compares the open database ("main") with another file attached next to it and writes the
+    # INSERT, UPDATE and DELETE statements that make main hold what the other one holds.
+    # Tables are walked in key order in ranges of at most CHUNK_ROWS rows per side. SQLite
+    # serializes each range with quote() and group_concat(), and only its hash is compared, so
+    # equal ranges cost two index range scans. Rows are only looked at one by one in ranges whose
+    # hashes differ, and every statement is written to the script as soon as it is found: memory
+    # stays bounded by one range whatever the size of the files.
+    def __init__(self, conn, other_path, chunk_rows=CHUNK_ROWS, cancel_event=None):
+        self.conn = conn
+        self.other_path = other_path
+        self.chunk_rows = chunk_rows
+        self.cancel_event = cancel_event or threading.Event()
+        self.statements = 0
+        self.out = None
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.conn.interrupt()
+
+    def check(self):
+        if self.cancel_event.is_set():
+            raise DiffCancelled()
+
+    def attach(self):
+        uri = Path(self.other_path).resolve().as_uri() + "?mode=ro"
+        self.conn.execute(f"ATTACH DATABASE ? AS {OTHER}", (uri,))
+        self.conn.create_function("zen_chunk_hash", 1, _chunk_hash, deterministic=True)
+
+    def detach(self):
+        try:
+            self.conn.execute(f"DETACH DATABASE {OTHER}")
+        except sqlite3.Error:
+            pass
+
+    def objects(self, schema):
+        # {(type, name): (table name, sql)} without SQLite's internal objects
+        rows = self.conn.execute(f"SELECT type, name, tbl_name, sql FROM {schema}.sqlite_master "
+                                 f"WHERE name NOT LIKE 'sqlite_%'").fetchall()
+        return {(kind, name): (table, sql) for kind, name, table, sql in rows}
+
+    def schema_changes(self):
+        # [(change, type, name)] with change 'added', 'removed' or 'changed', as seen from main
+        main, other = self.objects('main'), self.objects(OTHER)
+        changes = []
+        for key in sorted(set(main) | set(other)):
+            if key not in main:
+                changes.append(('added',) + key)
+            elif key not in other:
+                changes.append(('removed',) + key)
+            elif ' '.join((main[key][1] or '').split()) != ' '.join((other[key][1] or '').split()):
+                changes.append(('changed',) + key)
+        return changes
+
+    def run(self, script_path, progress=None):
+        # Writes the synchronization script and returns a summary. progress(table, done, total)
+        # is called before each table.
+        start = time.perf_counter()
+        self.statements = 0
+        self.attach()
+        try:
+            with open(script_path, 'w', encoding='utf-8', newline='\n') as self.out:
+                summary = self._write_script(progress)
+        except BaseException as e:
+            if os.path.exists(script_path):
+                os.remove(script_path)
+            if isinstance(e, sqlite3.OperationalError) and self.cancel_event.is_set():
+                raise DiffCancelled() from e
+            raise
+        finally:
+            self.out = None
+            self.detach()
+        summary["statements"] = self.statements
+        summary["elapsed"] = time.perf_counter() - start
+        summary["path"] = script_path
+        return summary
+
+    def emit(self, sql):
+        self.out.write(sql + ";\n")
+        self.statements += 1
+
+    def _write_script(self, progress):
+        main, other = self.objects('main'), self.objects(OTHER)
+        changes = self.schema_changes()
+        changed = {(kind, name) for change, kind, name in changes if change != 'added'}
+
+        self.out.write(f"-- Makes {os.path.basename(self.conn.execute('PRAGMA database_list').fetchone()[2])} "
+                       f"match {os.path.basename(self.other_path)}\n")
+        self.out.write("BEGIN;\n")
+        self.out.write("PRAGMA defer_foreign_keys = ON;\n")
+
+        # Triggers would fire on the synchronized rows, so all of main's go first and the other
+        # database's are created at the end. Changed indexes and views are recreated the same way.
+        for kind in _DROP_ORDER:
+            for (object_kind, name), (_, sql) in sorted(main.items()):
+                # Indexes behind PRIMARY KEY and UNIQUE have no SQL and go with their table
+                if object_kind != kind or sql is None:
+                    continue
+                removed = (kind, name) not in other
+                if kind == 'trigger' or removed or kind != 'table' and (kind, name) in changed:
+                    self.emit(f"DROP {kind.upper()} IF EXISTS {_quote(name)}")
+
+        tables = sorted(name for kind, name in set(main) | set(other) if kind == 'table')
+        results = []
+        for done, table in enumerate(tables):
+            self.check()
+            if progress:
+                progress(table, done, len(tables))
+            if ('table', table) not in other:
+                results.append(TableDiff(table, 'removed'))
+                continue
+            if ('table', table) not in main:
+                self.emit(other[('table', table)][1])
+                result = TableDiff(table, 'added')
+                self._copy_table(table, result)
+            else:
+                result = self._compare_table(table, ('table', table) in changed)
+            results.append(result)
+
+        for kind in _CREATE_ORDER:
+            for (object_kind, name), (_, sql) in sorted(other.items()):
+                if object_kind != kind or sql is None:
+                    continue
+                if kind == 'trigger' or (kind, name) in changed or (kind, name) not in main:
+                    self.emit(sql)
+        self.out.write("COMMIT;\n")
+        if progress:
+            progress(None, len(tables), len(tables))
+
+        return {
+            "tables": results,
+            "schema": changes,
+            "inserts": sum(result.inserts for result in results),
+            "updates": sum(result.updates for result in results),
+            "deletes": sum(result.deletes for result in results),
+        }
+
+    def _columns(self, table, schema):
+        return [name for name, in self.conn.execute("SELECT name FROM pragma_table_info(?, ?)", (table, schema))]
+
+    def _compare_table(self, table, schema_changed):
+        columns = self._columns(table, 'main')
+        other_columns = self._columns(table, OTHER)
+        if [name.lower() for name in columns] != [name.lower() for name in other_columns]:
+            result = TableDiff(table, 'skipped')
+            result.note = "columns differ, contents not compared"
+            self.out.write(f"-- {table}: columns differ, contents not synchronized\n")
+            return result
+        key = table_key(self.conn, table, 'main')
+        other_key = table_key(self.conn, table, OTHER)
+        if key is None or other_key is None or [name.lower() for name in key[0]] != \
+                [name.lower() for name in other_key[0]]:
+            result = TableDiff(table, 'skipped')
+            result.note = "no common key, contents not compared"
+            self.out.write(f"-- {table}: no common key, contents not synchronized\n")
+            return result
+
+        result = TableDiff(table, 'changed' if schema_changed else 'same')
+        if schema_changed:
+            result.note = "definition differs"
+            self.out.write(f"-- {table}: definition differs, only its rows are synchronized\n")
+        names, hidden = key
+        # The rowid is compared and copied too when no column holds it
+        selected = ([hidden] if hidden else []) + columns
+        for low, high in self._ranges(table, names):
+            self.check()
+            result.chunks += 1
+            rows, main_hash = self._hash_range(table, 'main', names, selected, low, high)
+            other_rows, other_hash = self._hash_range(table, OTHER, names, selected, low, high)
+            result.rows += other_rows
+            if main_hash != other_hash:
+                result.changed_chunks += 1
+                self._sync_range(table, names, selected, low, high, result)
+        if result.inserts or result.updates or result.deletes:
+            result.status = 'changed'
+        return result
+
+    def _range_sql(self, names, low, high, alias=None):
+        # WHERE clause and parameters for keys in (low, high]; None is unbounded
+        prefix = f"{alias}." if alias else ""
+        columns = ", ".join(prefix + _quote(name) for name in names)
+        terms, params = [], []
+        if low is not None:
+            terms.append(f"({columns}) > ({', '.join('?' for _ in names)})")
+            params.extend(low)
+        if high is not None:
+            terms.append(f"({columns}) <= ({', '.join('?' for _ in names)})")
+            params.extend(high)
+        return (" WHERE " + " AND ".join(terms) if terms else ""), params
+
+    def _ranges(self, table, names):
+        # (low, high] key ranges holding at most chunk_rows rows in each database: the next bound is
+        # the nearer of the two databases' chunk_rows-th key after the previous bound
+        columns = ", ".join(_quote(name) for name in names)
+        low = None
+        while True:
+            bounds = []
+            for schema in ('main', OTHER):
+                where, params = self._range_sql(names, low, None)
+                bound = self.conn.execute(f"SELECT {columns} FROM {schema}.{_quote(table)}{where} "
+                                          f"ORDER BY {columns} LIMIT 1 OFFSET ?",
+                                          params + [self.chunk_rows - 1]).fetchone()
+                if bound is not None:
+                    bounds.append(tuple(bound))
+            if not bounds:
+                yield low, None
+                return
+            if len(bounds) == 1:
+                high = bounds[0]
+            else:
+                # The smaller key as SQLite orders values, which Python cannot do for mixed types
+                placeholders = ", ".join('?' for _ in names)
+                smaller = self.conn.execute(f"SELECT ({placeholders}) <= ({placeholders})",
+                                            bounds[0] + bounds[1]).fetchone()[0]
+                high = bounds[0] if smaller else bounds[1]
+            yield low, high
+            low = high
+
+    def _hash_range(self, table, schema, names, selected, low, high):
+        where, params = self._range_sql(names, low, high)
+        row = " || ',' || ".join(f"quote({_quote(name)})" for name in selected)
+        order = ", ".join(_quote(name) for name in names)
+        return self.conn.execute(
+            f"SELECT count(*), zen_chunk_hash(group_concat(row, char(10))) FROM "
+            f"(SELECT {row} AS row FROM {schema}.{_quote(table)}{where} ORDER BY {order})", params).fetchone()
+
+    def _key_condition(self, names, literals):
+        return " AND ".join(f"{_quote(name)} = {literal}" for name, literal in zip(names, literals))
+
+    def _sync_range(self, table, names, selected, low, high, result):
+        # Row by row, but the matching is done by SQLite through the key index, streaming
+        quoted = _quote(table)
+        join = " AND ".join(f"m.{_quote(name)} = o.{_quote(name)}" for name in names)
+        keys = ", ".join(f"quote(m.{_quote(name)})" for name in names)
+
+        where, params = self._range_sql(names, low, high, 'm')
+        condition = f"NOT EXISTS (SELECT 1 FROM {OTHER}.{quoted} AS o WHERE {join})"
+        for literals in self.conn.execute(
+                f"SELECT {keys} FROM main.{quoted} AS m{where + ' AND ' if where else ' WHERE '}{condition}", params):
+            self.emit(f"DELETE FROM {quoted} WHERE {self._key_condition(names, literals)}")
+            result.deletes += 1
+
+        where, params = self._range_sql(names, low, high, 'o')
+        values = " || ', ' || ".join(f"quote(o.{_quote(name)})" for name in selected)
+        column_list = ", ".join(_quote(name) for name in selected)
+        condition = f"NOT EXISTS (SELECT 1 FROM main.{quoted} AS m WHERE {join})"
+        for values_sql, in self.conn.execute(
+                f"SELECT {values} FROM {OTHER}.{quoted} AS o"
+                f"{where + ' AND ' if where else ' WHERE '}{condition}", params):
+            self.emit(f"INSERT INTO {quoted} ({column_list}) VALUES ({values_sql})")
+            result.inserts += 1
+
+        # Changed columns only; BINARY so a NOCASE column still picks up a change of case
+        columns = [name for name in selected if name.lower() not in {key.lower() for key in names}]
+        if not columns:
+            return
+        differs = [f"o.{_quote(name)} IS NOT m.{_quote(name)} COLLATE BINARY" for name in columns]
+        where, params = self._range_sql(names, low, high, 'o')
+        select = ", ".join([keys] + [f"{test}, quote(o.{_quote(name)})" for test, name in zip(differs, columns)])
+        for row in self.conn.execute(
+                f"SELECT {select} FROM {OTHER}.{quoted} AS o JOIN main.{quoted} AS m ON {join}"
+                f"{where + ' AND ' if where else ' WHERE '}({' OR '.join(differs)})", params):
+            literals, cells = row[:len(names)], row[len(names):]
+            assignments = ", ".join(f"{_quote(name)} = {cells[2 * i + 1]}"
+                                    for i, name in enumerate(columns) if cells[2 * i])
+            self.emit(f"UPDATE {quoted} SET {assignments} WHERE {self._key_condition(names, literals)}")
+            result.updates += 1
+
+    def _copy_table(self, table, result):
+        # A table only the other database has: every row is inserted, streamed in key order
+        columns = self._columns(table, OTHER)
+        key = table_key(self.conn, table, OTHER)
+        selected = ([key[1]] if key and key[1] else []) + columns
+        values = " || ', ' || ".join(f"quote({_quote(name)})" for name in selected)
+        column_list = ", ".join(_quote(name) for name in selected)
+        for values_sql, in self.conn.execute(f"SELECT {values} FROM {OTHER}.{_quote(table)}"):
+            self.emit(f"INSERT INTO {_quote(table)} ({column_list}) VALUES ({values_sql})")
+            result.inserts += 1
+            result.rows += 1
+            if result.inserts % self.chunk_rows == 0:
+                self.check()
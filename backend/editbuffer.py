@@ -0,0 +1,62 @@
+# backend/editbuffer.py
+
+
+class EditBuffer:
+    # Collects cell edits until they are applied, so any number of edits costs one transaction
+    def __init__(self):
+        self.pending = {}
+        # {table: key column names} the pending rows of each table are identified by
+        self.keys = {}
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, table, column, key, value, key_names=('rowid',)):
+        # `key` holds the values of `key_names` for the edited row, or is a bare rowid.
+        # A later edit of the same cell replaces the earlier one.
+        if not isinstance(key, tuple):
+            key = (key,)
+        self.keys[table] = tuple(key_names)
+        self.pending[(table, key, column)] = value
+
+    def clear(self):
+        self.pending.clear()
+        self.keys.clear()
+
+    def tables(self):
+        return {table for table, _, _ in self.pending}
+
+    def grouped(self):
+        # {table: {columns: [(*values, *key), ...]}}: each edited row once, with all its edited
+        # columns and the key it had before any edit, the rows with the same edited columns together
+        rows = {}
+        for (table, key, column), value in self.pending.items():
+            rows.setdefault((table, key), {})[column] = value
+        groups = {}
+        for (table, key), values in rows.items():
+            columns = tuple(sorted(values))
+            groups.setdefault(table, {}).setdefault(columns, []).append(
+                tuple(values[column] for column in columns) + key)
+        return groups
+
+    def flush(self, conn):
+        # Every pending edit is written in a single transaction: one executemany per table
+        # and set of edited columns, one commit in total. Nothing is written if any statement
+        # fails or any row is no longer there to update.
+        count = len(self.pending)
+        try:
+            for table, groups in self.grouped().items():
+                where = " AND ".join(f"`{name}` = ?" for name in self.keys[table])
+                for columns, params in groups.items():
+                    assignments = ", ".join(f"`{column}` = ?" for column in columns)
+                    cursor = conn.executemany(f"UPDATE `{table}` SET {assignments} WHERE {where}", params)
+                    # A key matches at most one row, so fewer changes means rows went missing
+                    if cursor.rowcount < len(params):
+                        raise ValueError(f"{len(params) - cursor.rowcount} edited rows of {table} were "
+                                         f"changed or deleted since they were read.")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        self.clear()
+        return count
@@ -0,0 +1,173 @@
+# backend/executor.py
+
+import sqlite3
+import sys
+import threading
+import time
+
+from backend.scriptrunner import ScriptError
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+# Rows handed to the caller per batch
+BATCH_SIZE = 1000
+
+# Number of SQLite VM instructions between progress handler calls
+PROGRESS_STEPS = 1000
+
+
+class QueryCancelled(Exception):
+    pass
+
+
+def process_peak_kb():
+    # Peak resident set size of the whole process since it started, in KiB, or None where it
+    # cannot be read. It never goes down, so it only says how much memory one query used when
+    # that query raised it.
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class QueryExecutor:
+    def __init__(self, conn, batch_size=BATCH_SIZE, cancel_event=None):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.cancel_event = cancel_event or threading.Event()
+        self.progress_calls = 0
+        conn.set_progress_handler(self._progress, PROGRESS_STEPS)
+
+    def _progress(self):
+        # Also counts VM instructions, a measure of the work done beyond the rows returned.
+        # Returning non-zero makes SQLite abort the running statement.
+        self.progress_calls += 1
+        return 1 if self.cancel_event.is_set() else 0
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.conn.interrupt()
+
+    def run(self, sql, params=(), on_columns=None, on_rows=None):
+        # Executes one statement, streaming rows in batches through the callbacks.
+        # Returns a summary dict; raises QueryCancelled if cancel() was called.
+        try:
+            summary = self._execute(sql, params, on_columns, on_rows)
+            if self.conn.in_transaction:
+                self.conn.commit()
+        except Exception as e:
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            if isinstance(e, sqlite3.OperationalError) and self.cancel_event.is_set():
+                raise QueryCancelled() from e
+            raise
+        return summary
+
+    def run_script(self, statements, single_transaction=False, on_statement=None, on_columns=None,
+                   on_rows=None):
+        # Executes (sql, line, params) statements in order, each streamed like run(). on_statement(index, sql)
+        # is called before each one. Statements autocommit unless they open a transaction
+        # themselves, or all run in one transaction with single_transaction. On failure the open
+        # transaction is rolled back and ScriptError reports the line and how many statements
+        # were committed before it.
+        conn = self.conn
+        # Switching to autocommit would commit a transaction left open on the connection; it is
+        # not this script's to commit, so it is rolled back first
+        if conn.in_transaction:
+            conn.rollback()
+        isolation_level = conn.isolation_level
+
+        start = time.perf_counter()
+        total_changes = conn.total_changes
+        executed = 0
+        committed = 0
+        results = 0
+        rows = 0
+        try:
+            conn.isolation_level = None
+            if single_transaction:
+                conn.execute("BEGIN")
+            for index, (sql, line, params) in enumerate(statements):
+                if on_statement:
+                    on_statement(index, sql)
+                try:
+                    summary = self._execute(sql, params, on_columns, on_rows)
+                except sqlite3.Error as e:
+                    if self.cancel_event.is_set():
+                        raise QueryCancelled() from e
+                    raise ScriptError(str(e), line, sql, committed) from e
+                executed += 1
+                if summary["columns"] is not None:
+                    results += 1
+                    rows += summary["rows"]
+                if not conn.in_transaction:
+                    committed = executed
+            if conn.in_transaction:
+                conn.execute("COMMIT")
+            committed = executed
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.isolation_level = isolation_level
+
+        return {
+            "statements": executed,
+            "results": results,
+            "rows": rows,
+            "writes": conn.total_changes - total_changes,
+            "elapsed": time.perf_counter() - start,
+            "process_peak_kb": process_peak_kb(),
+        }
+
+    def _execute(self, sql, params, on_columns, on_rows):
+        # The sqlite3 module prepares and takes the first step in one call, so "execute"
+        # includes the prepare; "fetch" is the time spent stepping through the remaining rows.
+        self.progress_calls = 0
+        total_changes = self.conn.total_changes
+        start = time.perf_counter()
+        headers = None
+        row_count = 0
+        fetch_time = 0.0
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            execute_time = time.perf_counter() - start
+            if cursor.description is not None:
+                headers = [description[0] for description in cursor.description]
+                if on_columns:
+                    on_columns(headers)
+                while True:
+                    fetch_start = time.perf_counter()
+                    rows = cursor.fetchmany(self.batch_size)
+                    fetch_time += time.perf_counter() - fetch_start
+                    if rows:
+                        row_count += len(rows)
+                        if on_rows:
+                            on_rows(rows)
+                    if len(rows) < self.batch_size:
+                        break
+                    if self.cancel_event.is_set():
+                        raise QueryCancelled()
+            changes = cursor.rowcount
+        finally:
+            cursor.close()
+
+        return {
+            "columns": headers,
+            "rows": row_count,
+            "changes": changes,
+            # Rows inserted, updated or deleted, also by statements that return rows
+            "writes": self.conn.total_changes - total_changes,
+            "elapsed": time.perf_counter() - start,
+            "execute": execute_time,
+            "fetch": fetch_time,
+            "vm_steps": self.progress_calls * PROGRESS_STEPS,
+            "process_peak_kb": process_peak_kb(),
+        }
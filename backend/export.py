@@ -0,0 +1,248 @@
+# backend/export.py
+
+import csv
+import json
+import math
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+
+# Rows fetched from the cursor and written per chunk
+CHUNK_SIZE = 10000
+
+COLUMNAR_MAGIC = b"ZCOL1\n"
+
+
+class ExportCancelled(Exception):
+    def __init__(self, rows):
+        super().__init__("Export cancelled.")
+        self.rows = rows
+
+
+def _text_value(value):
+    # Text formats have no blob type; blobs are written as hex
+    return value.hex() if isinstance(value, bytes) else value
+
+
+def _finite(value):
+    # JSON has no Infinity or NaN; they are written as null
+    return None if type(value) is float and not math.isfinite(value) else value
+
+
+def _open(path, mode, **kwargs):
+    # Writers take a path, or an open file object (such as sys.stdout) that they leave open.
+    # Returns (file, owned).
+    if hasattr(path, 'write'):
+        return path, False
+    return open(path, mode, **kwargs), True
+
+
+class CsvWriter:
+    delimiter = ','
+
+    def __init__(self, path):
+        self.file, self.owned = _open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file, delimiter=self.delimiter)
+
+    def write_header(self, columns):
+        self.writer.writerow(columns)
+
+    def write_rows(self, rows):
+        if any(type(value) is bytes for row in rows for value in row):
+            rows = [[_text_value(value) for value in row] for row in rows]
+        self.writer.writerows(rows)
+
+    def close(self):
+        if self.owned:
+            self.file.close()
+
+
+class TsvWriter(CsvWriter):
+    delimiter = '\t'
+
+
+class JsonLinesWriter:
+    def __init__(self, path):
+        self.file, self.owned = _open(path, 'w', encoding='utf-8')
+        self.columns = []
+
+    def write_header(self, columns):
+        self.columns = columns
+
+    def write_rows(self, rows):
+        # allow_nan=False keeps the output strict JSON: a chunk holding a non-finite float fails
+        # once and is written again with those values as null
+        columns = self.columns
+        dumps = json.dumps
+        try:
+            text = ''.join(dumps(dict(zip(columns, row)), default=_text_value, allow_nan=False) + '\n'
+                           for row in rows)
+        except ValueError:
+            text = ''.join(dumps(dict(zip(columns, map(_finite, row))), default=_text_value, allow_nan=False)
+                           + '\n' for row in rows)
+        self.file.write(text)
+
+    def close(self):
+        if self.owned:
+            self.file.close()
+
+
+class ColumnarWriter:
+    # Compact binary layout, one block per chunk of rows:
+    #   file   := MAGIC, u32 header length, JSON header {"columns": [...]}, chunk*
+    #   chunk  := u32 row count, column*
+    #   column := u8 type, u8 has nulls, [null bitmap], u64 payload length, payload
+    # Types: 'i' int64 array, 'd' float64 array, 's' utf-8 text with u32 lengths,
+    # 'b' blobs with u32 lengths, 'j' JSON list for columns mixing types. Numbers are
+    # little-endian. NULLs are marked in the bitmap and stored as 0 / empty in the payload.
+    def __init__(self, path):
+        self.file, self.owned = _open(path, 'wb')
+
+    def write_header(self, columns):
+        header = json.dumps({"columns": columns}).encode('utf-8')
+        self.file.write(COLUMNAR_MAGIC + struct.pack('<I', len(header)) + header)
+
+    def write_rows(self, rows):
+        if not rows:
+            return
+        parts = [struct.pack('<I', len(rows))]
+        for values in zip(*rows):
+            parts.append(self._column_block(values))
+        self.file.write(b''.join(parts))
+
+    def _column_block(self, values):
+        nulls = [value is None for value in values]
+        has_nulls = any(nulls)
+        types = {type(value) for value in values if value is not None}
+
+        if types <= {int}:
+            tag = b'i'
+            data = array('q', [0 if value is None else value for value in values])
+            payload = _little_endian(data)
+        elif types == {float}:
+            tag = b'd'
+            data = array('d', [0.0 if value is None else value for value in values])
+            payload = _little_endian(data)
+        elif types == {str} or types == {bytes}:
+            tag = b's' if types == {str} else b'b'
+            encoded = [b'' if value is None else (value.encode('utf-8') if tag == b's' else value)
+                       for value in values]
+            payload = _little_endian(array('I', [len(item) for item in encoded])) + b''.join(encoded)
+        else:
+            tag = b'j'
+            payload = json.dumps(list(values), default=_text_value).encode('utf-8')
+
+        block = tag + (b'\x01' if has_nulls else b'\x00')
+        if has_nulls:
+            bitmap = bytearray((len(values) + 7) // 8)
+            for i, is_null in enumerate(nulls):
+                if is_null:
+                    bitmap[i >> 3] |= 1 << (i & 7)
+            block += bytes(bitmap)
+        return block + struct.pack('<Q', len(payload)) + payload
+
+    def close(self):
+        if self.owned:
+            self.file.close()
+
+
+def _little_endian(data):
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return data.tobytes()
+
+
+def read_columnar(path):
+    # Yields (columns, rows) per chunk of a file written by ColumnarWriter
+    with open(path, 'rb') as file:
+        if file.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"{path} is not a columnar export file.")
+        header_length, = struct.unpack('<I', file.read(4))
+        columns = json.loads(file.read(header_length))["columns"]
+
+        while True:
+            count = file.read(4)
+            if not count:
+                break
+            row_count, = struct.unpack('<I', count)
+            column_values = []
+            for _ in columns:
+                tag, has_nulls = file.read(1), file.read(1) == b'\x01'
+                bitmap = file.read((row_count + 7) // 8) if has_nulls else None
+                payload_length, = struct.unpack('<Q', file.read(8))
+                payload = file.read(payload_length)
+                values = _decode_column(tag, payload, row_count)
+                if bitmap is not None:
+                    values = [None if bitmap[i >> 3] & (1 << (i & 7)) else value for i, value in enumerate(values)]
+                column_values.append(values)
+            yield columns, list(zip(*column_values))
+
+
+def _decode_column(tag, payload, row_count):
+    if tag in (b'i', b'd'):
+        data = array('q' if tag == b'i' else 'd')
+        data.frombytes(payload)
+        if sys.byteorder != 'little':
+            data.byteswap()
+        return data.tolist()
+    if tag in (b's', b'b'):
+        lengths = array('I')
+        lengths.frombytes(payload[:4 * row_count])
+        if sys.byteorder != 'little':
+            lengths.byteswap()
+        values = []
+        offset = 4 * row_count
+        for length in lengths:
+            item = payload[offset:offset + length]
+            values.append(item.decode('utf-8') if tag == b's' else item)
+            offset += length
+        return values
+    return json.loads(payload)
+
+
+FORMATS = {
+    'csv': CsvWriter,
+    'tsv': TsvWriter,
+    'jsonl': JsonLinesWriter,
+    'zcol': ColumnarWriter,
+}
+
+
+def export_cursor(cursor, path, fmt, chunk_size=CHUNK_SIZE, progress=None, cancel_event=None):
+    # Streams an executed cursor to `path` chunk by chunk; memory holds at most one chunk.
+    # progress(rows written) is called after every chunk. A file the export created is removed
+    # again if it is cancelled or fails, rather than left behind incomplete.
+    cancel_event = cancel_event or threading.Event()
+    start = time.perf_counter()
+    writer = FORMATS[fmt](path)
+    rows_written = 0
+    completed = False
+    try:
+        writer.write_header([description[0] for description in cursor.description])
+        while True:
+            if cancel_event.is_set():
+                raise ExportCancelled(rows_written)
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            writer.write_rows(rows)
+            rows_written += len(rows)
+            if progress:
+                progress(rows_written)
+        completed = True
+    finally:
+        writer.close()
+        if not completed and writer.owned:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    return {
+        "rows": rows_written,
+        "path": path,
+        "elapsed": time.perf_counter() - start,
+    }
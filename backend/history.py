@@ -0,0 +1,109 @@
+# backend/history.py
+
+import os
+import sqlite3
+import time
+
+from backend.config import config_path
+
+# Entries kept in the history database; older ones are pruned on insert
+MAX_ENTRIES = 10000
+
+_COLUMNS = ('id', 'started', 'db_path', 'sql', 'status', 'rows', 'changes', 'vm_steps',
+            'execute_ms', 'fetch_ms', 'render_ms', 'total_ms', 'process_peak_kb')
+
+
+class HistoryEntry:
+    def __init__(self, row):
+        for name, value in zip(_COLUMNS, row):
+            setattr(self, name, value)
+
+
+class QueryHistory:
+    # Every query run from the editor with its timings, in a local SQLite database.
+    # execute_ms includes the prepare, fetch_ms is SQLite stepping through the remaining rows
+    # and render_ms is the time the GUI spent loading those rows into the grid.
+    def __init__(self, path=None):
+        self.path = path or config_path("history.db")
+        self.conn = sqlite3.connect(self.path)
+        try:
+            self._create()
+        except Exception:
+            self.conn.close()
+            raise
+
+    def _create(self):
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY,
+                started REAL NOT NULL,
+                db_path TEXT NOT NULL,
+                sql TEXT NOT NULL,
+                status TEXT NOT NULL,
+                rows INTEGER,
+                changes INTEGER,
+                vm_steps INTEGER,
+                execute_ms REAL,
+                fetch_ms REAL,
+                render_ms REAL,
+                total_ms REAL,
+                process_peak_kb INTEGER
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS history_sql ON history (sql, db_path)")
+        self.conn.commit()
+
+    def record(self, db_path, sql, status, summary=None, render=None, started=None):
+        # `summary` is the dict returned by QueryExecutor.run; times in it are in seconds
+        summary = summary or {}
+
+        def ms(seconds):
+            return None if seconds is None else seconds * 1000
+
+        cursor = self.conn.execute(
+            "INSERT INTO history (started, db_path, sql, status, rows, changes, vm_steps, execute_ms, fetch_ms, "
+            "render_ms, total_ms, process_peak_kb) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (started or time.time(), os.path.abspath(db_path), sql, status, summary.get("rows"),
+             summary.get("changes"), summary.get("vm_steps"), ms(summary.get("execute")), ms(summary.get("fetch")),
+             ms(render), ms(summary.get("elapsed")), summary.get("process_peak_kb")))
+        self.conn.execute("DELETE FROM history WHERE id <= ?", (cursor.lastrowid - MAX_ENTRIES,))
+        self.conn.commit()
+        return cursor.lastrowid
+
+    def entries(self, limit=1000, db_path=None):
+        # Most recent first
+        query = f"SELECT {', '.join(_COLUMNS)} FROM history"
+        params = []
+        if db_path is not None:
+            query += " WHERE db_path = ?"
+            params.append(os.path.abspath(db_path))
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        return [HistoryEntry(row) for row in self.conn.execute(query, params)]
+
+    def get(self, entry_id):
+        row = self.conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM history WHERE id = ?", (entry_id,)).fetchone()
+        return HistoryEntry(row) if row else None
+
+    def clear(self):
+        self.conn.execute("DELETE FROM history")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def compare(before, after):
+    # One line comparing two runs of the same statement
+    if before.total_ms is None or after.total_ms is None:
+        return "No timing to compare."
+    change = ""
+    if before.total_ms > 0:
+        change = f" ({(after.total_ms - before.total_ms) / before.total_ms * 100:+.0f}%)"
+    parts = [f"Total: {before.total_ms:.1f} ms -> {after.total_ms:.1f} ms{change}"]
+    for label, name in (("execute", "execute_ms"), ("fetch", "fetch_ms"), ("render", "render_ms")):
+        old, new = getattr(before, name), getattr(after, name)
+        if old is not None and new is not None:
+            parts.append(f"{label} {old:.1f} -> {new:.1f} ms")
+    if before.rows != after.rows:
+        parts.append(f"rows {before.rows} -> {after.rows}")
+    return ", ".join(parts)
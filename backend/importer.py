@@ -0,0 +1,310 @@
+# backend/importer.py
+
+import csv
+import itertools
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Rows passed to one executemany() call; progress and cancellation are checked between calls
+BATCH_SIZE = 50000
+
+# Rows read ahead to infer column types for a new table
+SAMPLE_SIZE = 1000
+
+# Minimum seconds between progress callbacks
+PROGRESS_INTERVAL = 0.1
+
+_INTEGER = re.compile(r'^[-+]?(?:0|[1-9]\d*)$')
+_REAL = re.compile(r'^[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?$')
+# A zero followed by more digits: a code ("007", "02134"), not a number
+_LEADING_ZERO = re.compile(r'^[-+]?0\d')
+
+# Range of SQLite's 64-bit INTEGER
+_INT64 = range(-1 << 63, 1 << 63)
+
+
+class ImportCancelled(Exception):
+    def __init__(self):
+        super().__init__("Import cancelled.")
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def infer_type(values):
+    # Declared type for a column from sampled values. Text that SQLite would store as a number
+    # under that type's affinity only counts as one if it reads back identically, so codes with
+    # leading zeros ("007") stay TEXT, as do whole numbers too large for a 64-bit INTEGER.
+    kind = None
+    for value in values:
+        if value is None or value == '':
+            continue
+        if isinstance(value, bool) or isinstance(value, int) and value in _INT64:
+            value_kind = 'INTEGER'
+        elif isinstance(value, float):
+            value_kind = 'REAL'
+        elif not isinstance(value, str) or _LEADING_ZERO.match(value):
+            return 'TEXT'
+        elif _INTEGER.match(value):
+            if int(value) not in _INT64:
+                return 'TEXT'
+            value_kind = 'INTEGER'
+        elif _REAL.match(value):
+            value_kind = 'REAL'
+        else:
+            return 'TEXT'
+        if kind is None or kind == 'INTEGER' and value_kind == 'REAL':
+            kind = value_kind
+    return kind or 'TEXT'
+
+
+def _text_affinity(declared):
+    # SQLite's rule for a declared type with TEXT affinity
+    declared = declared.upper()
+    return any(word in declared for word in ('CHAR', 'CLOB', 'TEXT'))
+
+
+def _as_text(value):
+    # JSON numbers and booleans in a TEXT column keep their JSON spelling
+    return value if value is None or isinstance(value, str) else json.dumps(value)
+
+
+def _bindable(value):
+    # sqlite3 cannot bind integers beyond 64 bits; stored as text, as SQLite would read them
+    if isinstance(value, int) and not isinstance(value, bool) and value not in _INT64:
+        return str(value)
+    return value
+
+
+class DelimitedReader:
+    # Rows of a CSV or TSV file as lists of strings, the first line being the header
+    delimiter = ','
+
+    def __init__(self, path, encoding='utf-8'):
+        self.file = open(path, 'r', newline='', encoding=encoding)
+        self.reader = csv.reader(self.file, delimiter=self.delimiter)
+        self.columns = next(self.reader, [])
+        self.line = 1
+
+    def rows(self):
+        width = len(self.columns)
+        for row in self.reader:
+            self.line = self.reader.line_num
+            if len(row) != width:
+                if not row:
+                    continue
+                if len(row) > width:
+                    raise ValueError(f"Line {self.line}: expected {width} fields, found {len(row)}.")
+                row += [''] * (width - len(row))
+            yield row
+
+    def position(self):
+        # Bytes read from the file so far, for progress
+        return self.file.buffer.tell()
+
+    def close(self):
+        self.file.close()
+
+
+class TsvReader(DelimitedReader):
+    delimiter = '\t'
+
+
+class JsonLinesReader:
+    # One JSON object per line. Columns are the keys of the sampled objects in order of first
+    # appearance; keys first seen later are ignored, missing ones are NULL.
+    def __init__(self, path, encoding='utf-8'):
+        self.file = open(path, 'r', encoding=encoding)
+        self.line = 0
+        self.sample = []
+        for line in self.file:
+            self.line += 1
+            if line.strip():
+                self.sample.append(self._parse(line))
+                if len(self.sample) >= SAMPLE_SIZE:
+                    break
+        columns = {}
+        for record in self.sample:
+            columns.update(dict.fromkeys(record))
+        self.columns = list(columns)
+
+    def _parse(self, line):
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Line {self.line}: {e}")
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {self.line}: expected a JSON object.")
+        return record
+
+    def rows(self):
+        columns = self.columns
+
+        def values(record):
+            row = []
+            for column in columns:
+                value = record.get(column)
+                # Nested values are stored as JSON text
+                if isinstance(value, (dict, list)):
+                    value = json.dumps(value)
+                row.append(value)
+            return row
+
+        for record in self.sample:
+            yield values(record)
+        self.sample = []
+        for line in self.file:
+            self.line += 1
+            if line.strip():
+                yield values(self._parse(line))
+
+    def position(self):
+        # Text files cannot tell() while being iterated; the buffer's position is close enough
+        return self.file.buffer.tell()
+
+    def close(self):
+        self.file.close()
+
+
+READERS = {
+    'csv': DelimitedReader,
+    'tsv': TsvReader,
+    'jsonl': JsonLinesReader,
+}
+
+EXTENSIONS = {
+    '.csv': 'csv',
+    '.tsv': 'tsv',
+    '.tab': 'tsv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+
+
+def detect_format(path):
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+class Importer:
+    def __init__(self, conn, batch_size=BATCH_SIZE, cancel_event=None):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.cancel_event = cancel_event or threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.conn.interrupt()
+
+    def run(self, path, table, fmt=None, progress=None):
+        # Streams the file into `table` inside one transaction: the table is created from the
+        # header and sampled types if it does not exist, otherwise rows are appended to the
+        # columns of the same names. The table's indexes are dropped for the load and rebuilt
+        # once at the end, which is much cheaper than updating them row by row.
+        # progress(rows, bytes_read, total_bytes) is called at most every PROGRESS_INTERVAL seconds.
+        # On any failure or cancellation the whole import is rolled back.
+        fmt = fmt or detect_format(path) or 'csv'
+        total = os.path.getsize(path)
+        reader = READERS[fmt](path)
+        conn = self.conn
+        isolation_level = conn.isolation_level
+        conn.isolation_level = None
+
+        start = time.perf_counter()
+        imported = 0
+        try:
+            if not reader.columns:
+                raise ValueError(f"{os.path.basename(path)} has no header row.")
+            rows = reader.rows()
+            sample = list(itertools.islice(rows, SAMPLE_SIZE))
+
+            conn.execute("BEGIN IMMEDIATE")
+            created, columns, types = self._prepare_table(table, reader.columns, sample)
+            indexes = self._drop_indexes(table)
+
+            column_list = ", ".join(_quote(column) for column in columns)
+            # Empty CSV fields become NULL; the conversion happens in SQLite, not per value in Python
+            placeholders = ", ".join("NULLIF(?, '')" if fmt != 'jsonl' else "?" for _ in columns)
+            sql = f"INSERT INTO {_quote(table)} ({column_list}) VALUES ({placeholders})"
+
+            last_progress = start
+            source = itertools.chain(sample, rows)
+            if fmt == 'jsonl':
+                # CSV fields are all strings; JSON values are converted to the column's type
+                converters = [_as_text if _text_affinity(declared) else _bindable for declared in types]
+                source = ([convert(value) for convert, value in zip(converters, row)] for row in source)
+            while True:
+                if self.cancel_event.is_set():
+                    raise ImportCancelled()
+                batch = list(itertools.islice(source, self.batch_size))
+                if not batch:
+                    break
+                conn.executemany(sql, batch)
+                imported += len(batch)
+
+                now = time.perf_counter()
+                if progress and now - last_progress >= PROGRESS_INTERVAL:
+                    progress(imported, reader.position(), total)
+                    last_progress = now
+
+            for index_sql in indexes:
+                if self.cancel_event.is_set():
+                    raise ImportCancelled()
+                conn.execute(index_sql)
+            conn.execute("COMMIT")
+        except BaseException as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            if isinstance(e, sqlite3.OperationalError) and self.cancel_event.is_set():
+                raise ImportCancelled() from e
+            raise
+        finally:
+            conn.isolation_level = isolation_level
+            reader.close()
+
+        if progress:
+            progress(imported, total, total)
+        elapsed = time.perf_counter() - start
+        return {
+            "rows": imported,
+            "table": table,
+            "created": created,
+            "indexes": len(indexes),
+            "elapsed": elapsed,
+        }
+
+    def _prepare_table(self, table, header, sample):
+        # Returns (created, columns to insert into, their declared types)
+        existing = self.conn.execute("SELECT name, type FROM pragma_table_info(?)", (table,)).fetchall()
+        if existing:
+            lookup = {name.lower(): (name, declared) for name, declared in existing}
+            missing = [column for column in header if column.lower() not in lookup]
+            if missing:
+                raise ValueError(f"Table {table} has no column(s) {', '.join(missing)}.")
+            found = [lookup[column.lower()] for column in header]
+            return False, [name for name, _ in found], [declared for _, declared in found]
+
+        columns = []
+        for i, name in enumerate(header):
+            name = name.strip() or f"column_{i + 1}"
+            while name.lower() in {column.lower() for column in columns}:
+                name = f"{name}_{i + 1}"
+            columns.append(name)
+        types = [infer_type([row[i] for row in sample]) for i in range(len(columns))]
+        definitions = ", ".join(f"{_quote(column)} {declared}" for column, declared in zip(columns, types))
+        self.conn.execute(f"CREATE TABLE {_quote(table)} ({definitions})")
+        return True, columns, types
+
+    def _drop_indexes(self, table):
+        # Explicitly created indexes only; those behind PRIMARY KEY and UNIQUE have no SQL and stay.
+        # Table names match without regard to case, as pragma_table_info found the table.
+        indexes = self.conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? COLLATE NOCASE "
+            "AND sql IS NOT NULL", (table,)).fetchall()
+        for name, _ in indexes:
+            self.conn.execute(f"DROP INDEX {_quote(name)}")
+        return [sql for _, sql in indexes]
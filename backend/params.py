@@ -0,0 +1,60 @@
+# backend/params.py
+
+import re
+
+from backend.sqllexer import tokenize_line, NORMAL
+
+# Only plain ASCII decimal numbers bind as numbers; int() and float() would also take "nan",
+# "inf", "1_000" and digits of other scripts such as "\u0661\u0662"
+_INTEGER = re.compile(r'^[-+]?[0-9]+$')
+_DECIMAL = re.compile(r'^[-+]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?$')
+
+
+def find_parameters(sql):
+    # Placeholders in the order SQLite numbers them. A bare "?" takes the number after the
+    # largest one so far and is reported as "?N"; named ones keep their prefix (":id", "@id", "$id")
+    # and are numbered at their first appearance.
+    names = []
+    state = NORMAL
+    for line in sql.split('\n'):
+        tokens, state = tokenize_line(line, state)
+        for kind, start, length in tokens:
+            if kind != 'param':
+                continue
+            text = line[start:start + length]
+            if text == '?':
+                text = f"?{len(names) + 1}"
+            elif text.startswith('?'):
+                # ?NNN leaves a gap up to NNN
+                while len(names) < int(text[1:]) - 1:
+                    names.append(f"?{len(names) + 1}")
+            if text not in names:
+                names.append(text)
+    return names
+
+
+def parse_value(text):
+    # What a value typed into the binding panel binds as: NULL, an integer, a real, a quoted
+    # string with the quotes removed, or else the text as it is
+    stripped = text.strip()
+    if stripped.upper() == 'NULL':
+        return None
+    if _INTEGER.match(stripped):
+        value = int(stripped)
+        # Beyond SQLite's 64-bit INTEGER it stays text
+        if -1 << 63 <= value < 1 << 63:
+            return value
+        return text
+    if _DECIMAL.match(stripped):
+        return float(stripped)
+    if len(stripped) >= 2 and stripped[0] == stripped[-1] == "'":
+        return stripped[1:-1].replace("''", "'")
+    return text
+
+
+def bind_parameters(names, values):
+    # Builds what cursor.execute() takes for the placeholders `names` from {name: value}:
+    # a dict when every placeholder is named, otherwise a sequence in SQLite's numbering
+    if names and all(not name.startswith('?') for name in names):
+        return {name[1:]: values[name] for name in names}
+    return [values[name] for name in names]
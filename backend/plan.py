@@ -0,0 +1,311 @@
+# backend/plan.py
+
+import re
+import time
+
+from backend.sqllexer import tokenize_line, NORMAL
+
+_SCAN = re.compile(r'^SCAN (?:TABLE )?(\S+)(?: AS (\S+))?(.*)$')
+_TEMP_BTREE = re.compile(r'^USE TEMP B-TREE FOR (.+)$')
+
+_EQUALITY = {'=', '==', 'IN', 'IS'}
+_RANGE = {'<', '>', '<=', '>=', 'BETWEEN', 'LIKE', 'GLOB'}
+
+# Keywords that are syntax wherever they appear. The lexer also marks type names and other
+# words columns are often called (DATE, TEXT, KEY, ROWID...) as keywords; those still name
+# columns and tables.
+_RESERVED = frozenset("""
+ADD ALL ALTER AND AS ASC AUTOINCREMENT BETWEEN BY CASE CAST CHECK COLLATE COMMIT CONSTRAINT CREATE CROSS
+CURRENT CURRENT_DATE CURRENT_TIME CURRENT_TIMESTAMP DEFAULT DEFERRABLE DELETE DESC DISTINCT DROP ELSE END
+ESCAPE EXCEPT EXCLUDE EXISTS FILTER FIRST FOLLOWING FOREIGN FROM FULL GLOB GROUP GROUPS HAVING IF IN INDEX
+INDEXED INNER INSERT INTERSECT INTO IS ISNULL JOIN LAST LEFT LIKE LIMIT MATCH NATURAL NOT NOTHING NOTNULL
+NULL NULLS OFFSET ON OR ORDER OTHERS OUTER OVER PARTITION PRECEDING PRIMARY RANGE REFERENCES REGEXP
+RETURNING RIGHT ROW ROWS SELECT SET TABLE THEN TIES TO TRANSACTION UNBOUNDED UNION UNIQUE UPDATE USING
+VALUES WHEN WHERE WINDOW WITH
+""".split())
+
+# Keywords that end a table reference in FROM / JOIN
+_CLAUSE_WORDS = {'WHERE', 'ON', 'USING', 'GROUP', 'ORDER', 'LIMIT', 'HAVING', 'WINDOW', 'UNION', 'EXCEPT',
+                 'INTERSECT', 'JOIN', 'LEFT', 'RIGHT', 'FULL', 'INNER', 'CROSS', 'NATURAL', 'OUTER', 'INDEXED',
+                 'NOT', 'RETURNING', 'SET', 'VALUES'}
+
+
+class PlanNode:
+    def __init__(self, node_id, parent_id, detail):
+        self.id = node_id
+        self.parent_id = parent_id
+        self.detail = detail
+        self.children = []
+        # Why this step is slow, or None
+        self.warning = None
+
+
+def explain(conn, sql, params=()):
+    # Returns the root nodes of the EXPLAIN QUERY PLAN tree, with warnings attached to
+    # full table scans and temporary B-trees
+    nodes = {}
+    roots = []
+    for node_id, parent_id, _, detail in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params):
+        node = PlanNode(node_id, parent_id, detail)
+        scan = _SCAN.match(detail)
+        temp = _TEMP_BTREE.match(detail)
+        if scan and not scan.group(3).strip() and scan.group(1) not in ('CONSTANT', 'SUBQUERY'):
+            node.warning = "Full table scan"
+        elif temp:
+            node.warning = f"Temporary B-tree for {temp.group(1).lower()}"
+        nodes[node_id] = node
+        parent = nodes.get(parent_id)
+        (parent.children if parent is not None else roots).append(node)
+    return roots
+
+
+def walk(nodes):
+    for node in nodes:
+        yield node
+        yield from walk(node.children)
+
+
+def _tokens(sql):
+    # Significant tokens as (kind, text) with keywords upper-cased
+    tokens = []
+    state = NORMAL
+    for line in sql.split('\n'):
+        line_tokens, state = tokenize_line(line, state)
+        for kind, start, length in line_tokens:
+            if kind in ('ws', 'comment'):
+                continue
+            text = line[start:start + length]
+            if kind == 'keyword':
+                text = text.upper()
+            elif kind == 'identifier':
+                text = text[1:-1]
+            tokens.append((kind, text))
+    return tokens
+
+
+def _is_name(token):
+    return token is not None and (token[0] in ('word', 'identifier')
+                                  or token[0] == 'keyword' and token[1] not in _RESERVED)
+
+
+def _groups(tokens):
+    # For each token, the parenthesized groups it sits in, outermost first, each group a number
+    groups = []
+    stack = []
+    opened = 0
+    for kind, text in tokens:
+        groups.append(tuple(stack))
+        if kind == 'operator':
+            for char in text:
+                if char == '(':
+                    opened += 1
+                    stack.append(opened)
+                elif char == ')' and stack:
+                    stack.pop()
+    return groups
+
+
+def parse_references(sql):
+    # A best-effort reading of a SELECT: which tables appear under which aliases, and which
+    # columns are compared for equality, compared by range, or sorted/grouped on.
+    # Returns (aliases, equality, ranges, ordering); column references are (qualifier, column).
+    # Comparisons in a group of terms joined by OR are left out: no single index serves both
+    # sides of an OR.
+    tokens = _tokens(sql)
+    groups = _groups(tokens)
+    aliases = {}
+    ordering = []
+    # (list, reference, filter clause, groups) for each comparison, and the (filter clause,
+    # groups) holding an OR
+    comparisons = []
+    disjunctions = set()
+    filters = 0
+
+    def token(i):
+        return tokens[i] if 0 <= i < len(tokens) else None
+
+    def column_at(i):
+        # Column reference starting at i: (qualifier, column, index after it) or None
+        if not _is_name(token(i)):
+            return None
+        if token(i + 1) == ('operator', '.') and _is_name(token(i + 2)):
+            return token(i)[1], token(i + 2)[1], i + 3
+        return None, token(i)[1], i + 1
+
+    clause = None
+    i = 0
+    while i < len(tokens):
+        kind, text = tokens[i]
+        if kind == 'keyword' and text in ('FROM', 'JOIN', 'UPDATE', 'INTO'):
+            # One or more comma separated table references
+            i += 1
+            while _is_name(token(i)):
+                table = token(i)[1]
+                i += 1
+                if token(i) == ('operator', '.') and _is_name(token(i + 1)):
+                    # schema.table
+                    table = token(i + 1)[1]
+                    i += 2
+                alias = table
+                if token(i) == ('keyword', 'AS'):
+                    i += 1
+                if _is_name(token(i)) and token(i)[1].upper() not in _CLAUSE_WORDS:
+                    alias = token(i)[1]
+                    i += 1
+                aliases[alias] = table
+                aliases.setdefault(table, table)
+                if token(i) == ('operator', ','):
+                    i += 1
+                    continue
+                break
+            clause = 'from'
+            continue
+
+        if kind == 'keyword' and text in ('WHERE', 'ON', 'HAVING'):
+            clause = 'filter'
+            filters += 1
+        elif kind == 'keyword' and text == 'OR' and clause == 'filter':
+            disjunctions.add((filters, groups[i]))
+        elif kind == 'keyword' and text in ('ORDER', 'GROUP') and token(i + 1) == ('keyword', 'BY'):
+            clause = 'ordering'
+            i += 2
+            continue
+        elif kind == 'keyword' and text in ('LIMIT', 'SELECT', 'WINDOW'):
+            clause = None
+        elif clause is not None and clause != 'from':
+            column = column_at(i)
+            if column is not None:
+                qualifier, name, after = column
+                if clause == 'ordering':
+                    ordering.append((qualifier, name))
+                else:
+                    # A join term ("o.cust = c.id") filters neither table on a value: the
+                    # columns on both sides are skipped
+                    following = token(after)
+                    if following is not None and following[1].strip('()').upper() in _EQUALITY \
+                            and column_at(after + 1) is not None:
+                        i = column_at(after + 1)[2]
+                        continue
+                    # The operator may follow the column, or precede it ("5 = col")
+                    preceding = token(i - 1)
+                    for neighbour in (following, preceding):
+                        if neighbour is None:
+                            continue
+                        op = neighbour[1].strip('()').upper() if neighbour[0] == 'operator' else neighbour[1]
+                        if op in _EQUALITY:
+                            comparisons.append(('equality', (qualifier, name), filters, groups[i]))
+                            break
+                        if op in _RANGE:
+                            comparisons.append(('range', (qualifier, name), filters, groups[i]))
+                            break
+                i = after
+                continue
+        i += 1
+
+    equality, ranges = [], []
+    for kind, reference, clause, within in comparisons:
+        if any((clause, within[:depth]) in disjunctions for depth in range(len(within) + 1)):
+            continue
+        (equality if kind == 'equality' else ranges).append(reference)
+    return aliases, equality, ranges, ordering
+
+
+def _resolve(references, aliases, schema):
+    # Maps (qualifier, column) references to {table: [columns]} using the schema
+    tables = set(aliases.values())
+    resolved = {}
+    for qualifier, column in references:
+        if qualifier is not None:
+            table = schema.find(aliases.get(qualifier, qualifier))
+            candidates = [table] if table else []
+        else:
+            candidates = [schema.find(t) for t in tables if column.lower() in
+                          {name.lower() for name in schema.column_names(t)}]
+        if len(candidates) != 1 or candidates[0] is None:
+            continue
+        table = candidates[0]
+        for name in schema.column_names(table):
+            if name.lower() == column.lower():
+                columns = resolved.setdefault(table, [])
+                if name not in columns:
+                    columns.append(name)
+    return resolved
+
+
+def suggest_indexes(sql, plan, schema):
+    # Proposes CREATE INDEX statements for tables the plan scans in full or sorts in a temp
+    # B-tree. Index columns follow the usual order: equality filters, then one range filter,
+    # then ORDER BY / GROUP BY columns. Returns [(statement, reason), ...].
+    aliases, equality, ranges, ordering = parse_references(sql)
+    equality = _resolve(equality, aliases, schema)
+    ranges = _resolve(ranges, aliases, schema)
+    ordering = _resolve(ordering, aliases, schema)
+
+    # The rowid ends every index already, and a rowid alias is searched without one
+    for references in (equality, ranges, ordering):
+        for table, columns in references.items():
+            alias = schema.rowid_aliases.get(table)
+            references[table] = [column for column in columns
+                                 if column.lower() not in ('rowid', 'oid', '_rowid_')
+                                 and (alias is None or column.lower() != alias.lower())]
+
+    targets = []
+    sorts = False
+    for node in walk(plan):
+        scan = _SCAN.match(node.detail)
+        if node.warning == "Full table scan":
+            table = schema.find(aliases.get(scan.group(2) or scan.group(1), scan.group(1)))
+            if table and table not in targets:
+                targets.append(table)
+        elif node.warning is not None:
+            sorts = True
+    if sorts:
+        for table in ordering:
+            if table not in targets:
+                targets.append(table)
+
+    suggestions = []
+    for table in targets:
+        columns = list(equality.get(table, []))
+        for column in ranges.get(table, [])[:1]:
+            if column not in columns:
+                columns.append(column)
+        for column in ordering.get(table, []):
+            if column not in columns:
+                columns.append(column)
+        if not columns:
+            continue
+
+        # Skip what an existing index already covers as a prefix
+        covered = any(index_columns[:len(columns)] == columns for _, index_columns in schema.indexes.get(table, []))
+        if covered:
+            continue
+
+        name = "idx_" + "_".join([table] + columns)
+        name = re.sub(r'\W', '_', name)
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        statement = f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({column_list})'
+        reasons = []
+        if equality.get(table):
+            reasons.append("equality on " + ", ".join(equality[table]))
+        if ranges.get(table):
+            reasons.append("range on " + ranges[table][0])
+        if ordering.get(table):
+            reasons.append("ordering by " + ", ".join(ordering[table]))
+        suggestions.append((statement, f"{table}: " + "; ".join(reasons)))
+    return suggestions
+
+
+def time_query(conn, sql, params=()):
+    # Runs the statement to completion and returns (seconds, rows)
+    start = time.perf_counter()
+    cursor = conn.execute(sql, params)
+    rows = 0
+    if cursor.description is not None:
+        while True:
+            batch = cursor.fetchmany(10000)
+            if not batch:
+                break
+            rows += len(batch)
+    cursor.close()
+    return time.perf_counter() - start, rows
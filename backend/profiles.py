@@ -0,0 +1,139 @@
+# backend/profiles.py
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+from backend.config import config_path
+
+_JOURNAL_MODES = {'delete', 'truncate', 'persist', 'memory', 'wal', 'off'}
+_TEMP_STORES = {'default', 'file', 'memory'}
+_SYNCHRONOUS = {'off', 'normal', 'full', 'extra'}
+
+
+class ConnectionProfile:
+    # Pragmas applied to every connection opened on a database. None leaves SQLite's default.
+    def __init__(self, name='default', journal_mode=None, mmap_size=None, cache_size=None,
+                 temp_store=None, synchronous=None, read_only=False):
+        if journal_mode is not None and journal_mode.lower() not in _JOURNAL_MODES:
+            raise ValueError(f"Unknown journal_mode: {journal_mode}")
+        if temp_store is not None and temp_store.lower() not in _TEMP_STORES:
+            raise ValueError(f"Unknown temp_store: {temp_store}")
+        if synchronous is not None and synchronous.lower() not in _SYNCHRONOUS:
+            raise ValueError(f"Unknown synchronous: {synchronous}")
+
+        self.name = name
+        self.journal_mode = journal_mode
+        self.mmap_size = None if mmap_size is None else int(mmap_size)
+        self.cache_size = None if cache_size is None else int(cache_size)
+        self.temp_store = temp_store
+        self.synchronous = synchronous
+        self.read_only = bool(read_only)
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def copy(self, **changes):
+        data = self.to_dict()
+        data.update(changes)
+        return ConnectionProfile.from_dict(data)
+
+    def describe(self):
+        parts = [self.name]
+        if self.journal_mode:
+            parts.append(self.journal_mode.upper())
+        if self.mmap_size:
+            parts.append(f"mmap {self.mmap_size >> 20} MiB")
+        if self.cache_size:
+            # Negative cache_size is in KiB, positive in pages
+            cache = f"{-self.cache_size >> 10} MiB" if self.cache_size < 0 else f"{self.cache_size} pages"
+            parts.append(f"cache {cache}")
+        if self.temp_store:
+            parts.append(f"temp {self.temp_store}")
+        if self.synchronous:
+            parts.append(f"sync {self.synchronous}")
+        if self.read_only:
+            parts.append("read-only")
+        return ", ".join(parts)
+
+
+PRESETS = {
+    'default': ConnectionProfile('default'),
+    # Browsing large files: reads go through the memory map and a big page cache
+    'read-heavy': ConnectionProfile('read-heavy', journal_mode='wal', mmap_size=1 << 30, cache_size=-256 * 1024,
+                                    temp_store='memory', synchronous='normal'),
+    # Editing and importing: WAL with fewer fsyncs, still durable across application crashes
+    'write-heavy': ConnectionProfile('write-heavy', journal_mode='wal', mmap_size=256 << 20, cache_size=-64 * 1024,
+                                     temp_store='memory', synchronous='normal'),
+}
+
+
+def apply_profile(conn, profile):
+    # Values are validated by ConnectionProfile, so they can be formatted into the PRAGMAs
+    if profile.journal_mode and not profile.read_only:
+        conn.execute(f"PRAGMA journal_mode = {profile.journal_mode}").fetchone()
+    if profile.mmap_size is not None:
+        conn.execute(f"PRAGMA mmap_size = {profile.mmap_size}").fetchone()
+    if profile.cache_size is not None:
+        conn.execute(f"PRAGMA cache_size = {profile.cache_size}")
+    if profile.temp_store:
+        conn.execute(f"PRAGMA temp_store = {profile.temp_store}")
+    if profile.synchronous:
+        conn.execute(f"PRAGMA synchronous = {profile.synchronous}")
+
+
+def open_connection(db_path, profile=None, read_only=None, **kwargs):
+    # Every connection to a database, from the GUI or a worker, is opened here so they all
+    # share the same profile
+    profile = profile or PRESETS['default']
+    if read_only is None:
+        read_only = profile.read_only
+    if read_only:
+        conn = sqlite3.connect(Path(db_path).resolve().as_uri() + "?mode=ro", uri=True, **kwargs)
+    else:
+        conn = sqlite3.connect(db_path, **kwargs)
+    try:
+        apply_profile(conn, profile.copy(read_only=read_only))
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+class ProfileStore:
+    # Profiles chosen per database file, persisted as JSON in the config directory. With
+    # persist=False they only last for the session, for when that directory is unusable.
+    def __init__(self, path=None, persist=True):
+        self.path = (path or config_path("profiles.json")) if persist else None
+        self.profiles = {}
+        if self.path is not None and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as file:
+                    self.profiles = json.load(file)
+            except (OSError, ValueError):
+                self.profiles = {}
+
+    def _key(self, db_path):
+        return os.path.abspath(db_path)
+
+    def get(self, db_path):
+        data = self.profiles.get(self._key(db_path))
+        if data is None:
+            return PRESETS['default']
+        try:
+            return ConnectionProfile.from_dict(data)
+        except (TypeError, ValueError):
+            return PRESETS['default']
+
+    def set(self, db_path, profile):
+        # Raises OSError if the file cannot be written; the profile still holds for the session
+        self.profiles[self._key(db_path)] = profile.to_dict()
+        if self.path is None:
+            return
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump(self.profiles, file, indent=2)
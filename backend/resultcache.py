@@ -0,0 +1,105 @@
+# backend/resultcache.py
+
+import re
+from collections import OrderedDict
+
+from backend.sqllexer import tokenize_line, NORMAL
+from backend.connections import is_read_only
+
+# Memory the cached result sets may take together
+CACHE_BUDGET = 256 << 20
+
+# Statements whose result can change while the file does not
+_VOLATILE = re.compile(r"\b(?:RANDOM|RANDOMBLOB|CHANGES|TOTAL_CHANGES|LAST_INSERT_ROWID|CURRENT_TIMESTAMP|"
+                       r"CURRENT_DATE|CURRENT_TIME)\b|'now'", re.I)
+
+
+def normalize_sql(sql):
+    # Same statement, same text: comments dropped, whitespace collapsed, keywords upper-cased
+    # and a trailing semicolon removed. String literals and quoted names are kept as written.
+    parts = []
+    state = NORMAL
+    for line in sql.split('\n'):
+        tokens, state = tokenize_line(line, state)
+        for kind, start, length in tokens:
+            if kind in ('ws', 'comment'):
+                continue
+            text = line[start:start + length]
+            parts.append(text.upper() if kind == 'keyword' else text)
+    # A trailing semicolon may be lexed together with a closing parenthesis
+    while parts and parts[-1].endswith(';'):
+        parts[-1] = parts[-1].rstrip(';')
+        if not parts[-1]:
+            parts.pop()
+    return ' '.join(parts)
+
+
+class ResultCache:
+    # Least recently used result sets of read-only statements, bounded by their estimated size.
+    # Keys carry PRAGMA data_version and schema_version as read on the GUI connection, so a
+    # commit from any other connection (a worker, another process) leads to a new key and the old
+    # entry simply ages out. Writes through the GUI connection itself do not change its
+    # data_version; invalidate() covers those by starting a new generation.
+    def __init__(self, budget=CACHE_BUDGET):
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.size = 0
+        self.generation = 0
+
+    def key(self, conn, sql, params=()):
+        # None for statements that must not be cached: anything that may write, since a cache
+        # hit skips running it, and anything whose result changes with the clock or the session
+        if not is_read_only(sql):
+            return None
+        sql = normalize_sql(sql)
+        if not sql or _VOLATILE.search(sql):
+            return None
+        params = tuple(sorted(params.items())) if isinstance(params, dict) else tuple(params)
+        return (sql, params) + self.version(conn)
+
+    def version(self, conn):
+        # (data_version, schema_version, generation): changes whenever anything cached from
+        # `conn` may be stale, for callers keeping derived data of their own. data_version has
+        # one entry per database, attached ones included, as results may join across them.
+        schemas = [row[1].replace('"', '""') for row in conn.execute("PRAGMA database_list") if row[1] != 'temp']
+        data_version = tuple(conn.execute(f'PRAGMA "{schema}".data_version').fetchone()[0]
+                             for schema in schemas)
+        schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        return data_version, schema_version, self.generation
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def take(self, key):
+        # Removes and returns the value, for callers that go on to modify it
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return None
+        self.size -= entry[1]
+        return entry[0]
+
+    def put(self, key, value, size):
+        if key is None or key[-1] != self.generation or size > self.budget:
+            return False
+        self.take(key)
+        while self.entries and self.size + size > self.budget:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.size -= evicted
+        self.entries[key] = (value, size)
+        self.size += size
+        return True
+
+    def invalidate(self):
+        self.generation += 1
+        self.clear()
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,176 @@
+# backend/rowkeys.py
+
+from backend.sqllexer import tokenize_line, NORMAL
+
+# Rows read per page while browsing a table
+PAGE_SIZE = 1000
+
+# Keywords after which a single-table SELECT is no longer a plain projection of its rows
+_NOT_PLAIN = frozenset(("JOIN", "UNION", "INTERSECT", "EXCEPT", "GROUP", "HAVING", "WINDOW", "DISTINCT",
+                        "NATURAL", "CROSS", "VALUES"))
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _unquote(name):
+    if len(name) >= 2 and name[0] + name[-1] in ('""', '``', '[]'):
+        return name[1:-1].replace(name[0] * 2, name[0]) if name[0] != '[' else name[1:-1]
+    return name
+
+
+def table_key(conn, table, schema='main'):
+    # How rows of `table` are identified, as (key, hidden): `key` the columns to select a row by
+    # and order it on, `hidden` the rowid name to select ahead of the table's own columns when
+    # no column aliases it, else None. None for views and anything else without a usable key.
+    columns = conn.execute("SELECT name, type, pk FROM pragma_table_info(?, ?)", (table, schema)).fetchall()
+    if not columns:
+        return None
+    primary = sorted((pk, name, column_type) for name, column_type, pk in columns if pk)
+    kind = conn.execute(f"SELECT type, sql FROM {_quote(schema)}.sqlite_master WHERE name = ?", (table,)).fetchone()
+    if kind is None or kind[0] != 'table':
+        return None
+
+    if kind[1] and 'WITHOUT ROWID' in ' '.join(kind[1].upper().split()):
+        return [name for _, name, _ in primary], None
+    if len(primary) == 1 and primary[0][2].upper() == 'INTEGER':
+        # INTEGER PRIMARY KEY is the rowid under another name
+        return [primary[0][1]], None
+    names = {name.lower() for name, _, _ in columns}
+    for rowid in ('rowid', '_rowid_', 'oid'):
+        if rowid not in names:
+            return [rowid], rowid
+    return None
+
+
+def _select_list(tokens):
+    # {alias: column} for a select list of *, column names and `column AS alias`, in tokens
+    # up to FROM; None if it holds anything else, such as `column alias` without the AS
+    aliases = {}
+    item = []
+    for kind, text in tokens + [('operator', ',')]:
+        if kind == 'operator' and set(text) <= {',', '*'}:
+            for char in text:
+                if char == '*' and not item:
+                    item.append(('star', char))
+                elif char == ',' and item:
+                    if len(item) == 3:
+                        aliases[_unquote(item[2][1]).lower()] = _unquote(item[0][1])
+                    item = []
+                else:
+                    return None
+            continue
+        if not item:
+            accepted = kind in ('word', 'identifier') or kind == 'keyword' and text.upper() == 'ROWID'
+        elif len(item) == 1:
+            accepted = item[0][0] != 'star' and kind == 'keyword' and text.upper() == 'AS'
+        else:
+            accepted = len(item) == 2 and kind in ('word', 'identifier')
+        if not accepted:
+            return None
+        item.append((kind, text))
+    return aliases
+
+
+def result_key(conn, sql, headers, find_table=None):
+    # For the result of `sql`, (table, key, key indexes into `headers`, the table column behind
+    # each header) when its rows can be written back: a SELECT of plain column names, `column
+    # AS alias` or * from a single table, whose result includes that table's key. None
+    # otherwise, and the result is read-only.
+    tokens = []
+    state = NORMAL
+    for line in sql.split('\n'):
+        line_tokens, state = tokenize_line(line, state)
+        tokens.extend((kind, line[start:start + length]) for kind, start, length in line_tokens
+                      if kind not in ('ws', 'comment'))
+    if tokens and tokens[-1][1] == ';':
+        tokens.pop()
+    if len(tokens) < 4 or tokens[0][1].upper() != 'SELECT':
+        return None
+
+    position = 1
+    while position < len(tokens) and tokens[position][1].upper() != 'FROM':
+        position += 1
+    aliases = _select_list(tokens[1:position])
+    if aliases is None:
+        return None
+    if position + 1 >= len(tokens) or tokens[position + 1][0] not in ('word', 'identifier'):
+        return None
+    table = _unquote(tokens[position + 1][1])
+    if find_table is not None:
+        table = find_table(table)
+    if not table:
+        return None
+
+    # Everything after the table name: a WHERE, ORDER BY or LIMIT, but no second source
+    rest = tokens[position + 2:]
+    if rest and rest[0][1].upper() not in ('WHERE', 'ORDER', 'LIMIT'):
+        return None
+    depth = 0
+    for kind, text in rest:
+        if kind == 'operator':
+            depth += text.count('(') - text.count(')')
+            if depth == 0 and ',' in text and text != ',':
+                return None
+        elif depth == 0 and kind == 'keyword' and text.upper() in _NOT_PLAIN:
+            return None
+
+    # A rowid that is not a column only counts if the statement selects it by that name
+    found = table_key(conn, table)
+    if found is None:
+        return None
+    if len({header.lower() for header in headers}) != len(headers):
+        return None
+    columns = [aliases.get(header.lower(), header) for header in headers]
+    lookup = {column.lower(): index for index, column in enumerate(columns)}
+    if len(lookup) != len(columns):
+        return None
+    try:
+        indexes = [lookup[name.lower()] for name in found[0]]
+    except KeyError:
+        return None
+    return table, found[0], indexes, columns
+
+
+class KeysetPager:
+    # Reads a table one page at a time, each page starting after the key of the last row read:
+    # WHERE key > ? ORDER BY key LIMIT n. Every page is one index seek plus n rows, however far
+    # into the table it is, and no statement stays open between pages to hold a read lock.
+    # Takes the place of a cursor: fetchmany() and close().
+    def __init__(self, conn, table, key, hidden=None, after=None, start=None):
+        self.conn = conn
+        columns = ", ".join(_quote(name) for name in key)
+        select = f"SELECT {hidden + ', ' if hidden else ''}* FROM {_quote(table)}"
+        # Column names as selected, the hidden rowid first
+        self.headers = [d[0] for d in conn.execute(f"{select} LIMIT 0").description]
+        lookup = {header.lower(): index for index, header in enumerate(self.headers)}
+        self.key_indexes = [0] if hidden else [lookup[name.lower()] for name in key]
+        placeholders = ", ".join("?" for _ in key)
+        self.next_sql = f"{select} WHERE ({columns}) > ({placeholders}) ORDER BY {columns} LIMIT ?"
+        # The first page: from the start, after a known key, or from a value of the first key column
+        if after is not None:
+            self.first = (self.next_sql, tuple(after))
+        elif start is not None:
+            self.first = (f"{select} WHERE {_quote(key[0])} >= ? ORDER BY {columns} LIMIT ?", (start,))
+        else:
+            self.first = (f"{select} ORDER BY {columns} LIMIT ?", ())
+        self.last = None
+        self.done = False
+
+    def fetchmany(self, size=PAGE_SIZE):
+        if self.done:
+            return []
+        if self.last is None:
+            sql, params = self.first
+        else:
+            sql, params = self.next_sql, self.last
+        rows = self.conn.execute(sql, params + (size,)).fetchall()
+        if len(rows) < size:
+            self.done = True
+        if rows:
+            self.last = tuple(rows[-1][index] for index in self.key_indexes)
+        return rows
+
+    def close(self):
+        self.done = True
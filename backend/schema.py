@@ -0,0 +1,85 @@
+# backend/schema.py
+
+
+class SchemaCache:
+    # Catalog information for one database, reloaded only when PRAGMA schema_version changes.
+    # schema_version is bumped by SQLite on every schema change from any connection.
+    def __init__(self):
+        self.version = None
+        self.tables = []
+        self.views = []
+        self.columns = {}
+        self.indexes = {}
+        self.names = {}
+        # {table: column} for tables whose INTEGER PRIMARY KEY is the rowid under another name
+        self.rowid_aliases = {}
+
+    def clear(self):
+        self.version = None
+        self.tables = []
+        self.views = []
+        self.columns = {}
+        self.indexes = {}
+        self.names = {}
+        self.rowid_aliases = {}
+
+    def refresh(self, conn):
+        # Returns True if the catalog was (re)loaded
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        if version == self.version:
+            return False
+        self._load(conn)
+        self.version = version
+        return True
+
+    def _load(self, conn):
+        tables, views = [], []
+        without_rowid = set()
+        for name, kind, sql in conn.execute(
+                "SELECT name, type, sql FROM sqlite_master WHERE type IN ('table', 'view')"):
+            (tables if kind == 'table' else views).append(name)
+            if sql and 'WITHOUT ROWID' in ' '.join(sql.upper().split()):
+                without_rowid.add(name)
+
+        # One pass over the table-valued pragmas instead of one PRAGMA per table
+        columns = {name: [] for name in tables + views}
+        primary = {}
+        for table, column, column_type, pk in conn.execute(
+                "SELECT m.name, p.name, p.type, p.pk FROM sqlite_master AS m "
+                "JOIN pragma_table_info(m.name) AS p "
+                "WHERE m.type IN ('table', 'view') ORDER BY m.name, p.cid"):
+            columns[table].append((column, column_type))
+            if pk:
+                primary.setdefault(table, []).append((column, column_type))
+        rowid_aliases = {table: keys[0][0] for table, keys in primary.items()
+                         if len(keys) == 1 and keys[0][1].upper() == 'INTEGER' and table not in without_rowid}
+
+        indexes = {}
+        for table, index, column in conn.execute(
+                "SELECT m.name, il.name, ii.name FROM sqlite_master AS m "
+                "JOIN pragma_index_list(m.name) AS il "
+                "JOIN pragma_index_info(il.name) AS ii "
+                "WHERE m.type = 'table' ORDER BY m.name, il.name, ii.seqno"):
+            # Expression index terms have no column name
+            if column is not None:
+                indexes.setdefault(table, {}).setdefault(index, []).append(column)
+
+        self.tables = tables
+        self.views = views
+        self.columns = columns
+        self.indexes = {table: list(index_map.items()) for table, index_map in indexes.items()}
+        self.names = {name.lower(): name for name in tables + views}
+        self.rowid_aliases = rowid_aliases
+
+    def find(self, name):
+        # SQL identifiers are case-insensitive; returns the catalog spelling or None
+        return self.names.get(name.strip('`"[]').lower())
+
+    def column_names(self, table):
+        return [name for name, _ in self.columns.get(self.find(table), [])]
+
+    def all_column_names(self):
+        names = set()
+        for table_columns in self.columns.values():
+            names.update(name for name, _ in table_columns)
+        return sorted(names)
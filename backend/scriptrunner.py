@@ -0,0 +1,240 @@
+# backend/scriptrunner.py
+
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from backend.sqllexer import scan_line, NORMAL
+
+# Statements committed per transaction while running a script
+BATCH_SIZE = 5000
+
+# Minimum seconds between progress callbacks
+PROGRESS_INTERVAL = 0.1
+
+# Statements that manage transactions themselves or may not run inside one
+_TRANSACTION_CONTROL = {'BEGIN', 'COMMIT', 'END', 'ROLLBACK', 'SAVEPOINT', 'RELEASE'}
+_NO_TRANSACTION = {'VACUUM', 'ATTACH', 'DETACH'}
+
+_FIRST_WORD = re.compile(r'\s*(?:(?:--[^\n]*(?:\n|$)|/\*.*?\*/)\s*)*(\w+)', re.S)
+
+
+class ScriptError(Exception):
+    def __init__(self, message, line, statement, committed):
+        super().__init__(f"Line {line}: {message}")
+        self.line = line
+        self.statement = statement
+        self.committed = committed
+
+
+class ScriptCancelled(Exception):
+    def __init__(self, committed):
+        super().__init__("Script cancelled.")
+        self.committed = committed
+
+
+def first_keyword(sql):
+    match = _FIRST_WORD.match(sql)
+    return match.group(1).upper() if match else ''
+
+
+def strip_leading_comments(sql):
+    match = _FIRST_WORD.match(sql)
+    return sql[match.start(1):] if match else sql
+
+
+def iter_statements(lines, encoding='utf-8'):
+    # Splits SQL into statements while reading, so memory only ever holds the current one.
+    # `lines` yields bytes or str lines (a file opened in either mode). Yields
+    # (statement, first line number, bytes read so far). Semicolons are found with the lexer,
+    # so the ones inside strings and comments are skipped, and sqlite3.complete_statement
+    # decides whether a semicolon actually ends the statement (it does not inside
+    # CREATE TRIGGER ... BEGIN ... END).
+    state = NORMAL
+    pending = []
+    has_code = False
+    start_line = None
+    consumed = 0
+
+    for line_number, raw in enumerate(lines, 1):
+        if isinstance(raw, bytes):
+            consumed += len(raw)
+            text = raw.decode(encoding)
+        else:
+            consumed += len(raw.encode(encoding))
+            text = raw
+        text = text.rstrip('\r\n')
+
+        tokens, next_state = scan_line(text, state)
+        # pos: start of the part of this line not yet yielded; last: end of the previous token
+        pos = 0
+        last = 0
+        for kind, start, length in tokens:
+            if not has_code and (kind != 'comment' and kind != 'semicolon' or text[last:start].strip()):
+                has_code = True
+                start_line = line_number
+            last = start + length
+            if kind != 'semicolon':
+                continue
+
+            if not has_code:
+                # Empty statement
+                pending = []
+                pos = last
+                continue
+            candidate = ''.join(pending) + text[pos:last]
+            if sqlite3.complete_statement(candidate):
+                yield candidate.strip(), start_line, consumed
+                pending = []
+                pos = last
+                has_code = False
+                start_line = None
+
+        if not has_code and text[last:].strip():
+            has_code = True
+            start_line = line_number
+        pending.append(text[pos:] + '\n')
+        state = next_state
+
+    # A trailing statement without a semicolon
+    if has_code:
+        yield ''.join(pending).strip(), start_line, consumed
+
+
+def statement_spans(text):
+    # (start, end) character offsets of each statement in `text`, end just past its semicolon.
+    # Same splitting rules as iter_statements, for locating statements in the editor.
+    state = NORMAL
+    start = 0
+    offset = 0
+    has_code = False
+    for line in text.split('\n'):
+        tokens, next_state = scan_line(line, state)
+        last = 0
+        for kind, token_start, length in tokens:
+            if not has_code and (kind != 'comment' and kind != 'semicolon' or line[last:token_start].strip()):
+                has_code = True
+            last = token_start + length
+            if kind != 'semicolon':
+                continue
+            if not has_code:
+                start = offset + last
+                continue
+            if sqlite3.complete_statement(text[start:offset + last]):
+                yield start, offset + last
+                start = offset + last
+                has_code = False
+
+        if not has_code and line[last:].strip():
+            has_code = True
+        offset += len(line) + 1
+        state = next_state
+
+    if has_code:
+        yield start, len(text)
+
+
+def statement_at(text, position):
+    # The statement containing `position`, else the one ending before it, else the next one.
+    # Returns its text without surrounding whitespace, or ''.
+    before = None
+    for start, end in statement_spans(text):
+        if start <= position <= end:
+            # A cursor after a semicolon, on the same line, means the statement it ends
+            if before is not None and not text[start:position].strip() and '\n' not in text[start:position]:
+                return before
+            return text[start:end].strip()
+        if end < position:
+            before = text[start:end].strip()
+        elif before is None:
+            return text[start:end].strip()
+        else:
+            break
+    return before or ''
+
+
+class ScriptRunner:
+    def __init__(self, conn, batch_size=BATCH_SIZE, cancel_event=None):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.cancel_event = cancel_event or threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.conn.interrupt()
+
+    def run_file(self, path, progress=None):
+        total = os.path.getsize(path)
+        with open(path, 'rb') as file:
+            return self.run(file, total, progress)
+
+    def run(self, lines, total=0, progress=None):
+        # Executes the statements in batches of `batch_size` per transaction instead of one
+        # autocommit per statement. progress(statements, bytes_read, total) is called at most
+        # every PROGRESS_INTERVAL seconds. On failure the current batch is rolled back and
+        # ScriptError reports the line and how many statements were committed before it.
+        conn = self.conn
+        isolation_level = conn.isolation_level
+        conn.isolation_level = None
+
+        start = time.perf_counter()
+        last_progress = start
+        executed = 0
+        committed = 0
+        consumed = 0
+        own_transaction = False
+        try:
+            for sql, line, consumed in iter_statements(lines):
+                if self.cancel_event.is_set():
+                    raise ScriptCancelled(committed)
+
+                keyword = first_keyword(sql)
+                if keyword in _TRANSACTION_CONTROL or keyword in _NO_TRANSACTION:
+                    # Close our batch and let the statement run as written
+                    if own_transaction and conn.in_transaction:
+                        conn.execute("COMMIT")
+                    own_transaction = False
+                    committed = executed
+                elif not conn.in_transaction:
+                    conn.execute("BEGIN")
+                    own_transaction = True
+
+                try:
+                    conn.execute(sql)
+                except sqlite3.Error as e:
+                    if self.cancel_event.is_set():
+                        raise ScriptCancelled(committed)
+                    raise ScriptError(str(e), line, sql, committed)
+                executed += 1
+
+                if not conn.in_transaction:
+                    committed = executed
+                elif own_transaction and executed - committed >= self.batch_size:
+                    conn.execute("COMMIT")
+                    own_transaction = False
+                    committed = executed
+
+                now = time.perf_counter()
+                if progress and now - last_progress >= PROGRESS_INTERVAL:
+                    progress(executed, consumed, total)
+                    last_progress = now
+
+            if conn.in_transaction:
+                conn.execute("COMMIT")
+            committed = executed
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.isolation_level = isolation_level
+
+        if progress:
+            progress(executed, consumed, total)
+        return {
+            "statements": executed,
+            "bytes": consumed,
+            "elapsed": time.perf_counter() - start,
+        }
@@ -0,0 +1,128 @@
+# backend/sqllexer.py
+
+import re
+
+# Lexer states carried from one line to the next
+NORMAL = 0
+BLOCK_COMMENT = 1
+STRING = 2
+QUOTED_IDENTIFIER = 3
+BACKTICK_IDENTIFIER = 4
+
+KEYWORDS = frozenset("""
+ABORT ACTION ADD AFTER ALL ALTER ALWAYS ANALYZE AND AS ASC ATTACH AUTOINCREMENT BEFORE BEGIN BETWEEN BY
+CASCADE CASE CAST CHECK COLLATE COLUMN COMMIT CONFLICT CONSTRAINT CREATE CROSS CURRENT CURRENT_DATE
+CURRENT_TIME CURRENT_TIMESTAMP DATABASE DEFAULT DEFERRABLE DEFERRED DELETE DESC DETACH DISTINCT DO DROP
+EACH ELSE END ESCAPE EXCEPT EXCLUDE EXCLUSIVE EXISTS EXPLAIN FAIL FILTER FIRST FOLLOWING FOR FOREIGN FROM
+FULL GENERATED GLOB GROUP GROUPS HAVING IF IGNORE IMMEDIATE IN INDEX INDEXED INITIALLY INNER INSERT INSTEAD
+INTERSECT INTO IS ISNULL JOIN KEY LAST LEFT LIKE LIMIT MATCH MATERIALIZED NATURAL NO NOT NOTHING NOTNULL
+NULL NULLS OF OFFSET ON OR ORDER OTHERS OUTER OVER PARTITION PLAN PRAGMA PRECEDING PRIMARY QUERY RAISE
+RANGE RECURSIVE REFERENCES REGEXP REINDEX RELEASE RENAME REPLACE RESTRICT RETURNING RIGHT ROLLBACK ROW
+ROWID ROWS SAVEPOINT SELECT SET STRICT TABLE TEMP TEMPORARY THEN TIES TO TRANSACTION TRIGGER UNBOUNDED
+UNION UNIQUE UPDATE USING VACUUM VALUES VIEW VIRTUAL WHEN WHERE WINDOW WITH WITHOUT
+INTEGER INT TEXT REAL BLOB NUMERIC VARCHAR BOOLEAN DATE DATETIME
+""".split())
+
+# One alternation per token kind, tried left to right at each position. Unterminated
+# comments, strings and quoted identifiers run to the end of the line and leave the
+# lexer in the matching state for the next line.
+_TOKEN = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>--.*|/\*(?:[^*]|\*(?!/))*(?:\*/)?)
+  | (?P<string>'(?:[^']|'')*'?|[xX]'[0-9a-fA-F]*'?)
+  | (?P<identifier>"(?:[^"]|"")*"?|`(?:[^`]|``)*`?|\[[^\]]*\]?)
+  | (?P<number>0[xX][0-9a-fA-F]+|(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<param>\?\d*|[:@$][A-Za-z_][\w$]*)
+  | (?P<word>[A-Za-z_][\w$]*)
+  | (?P<operator>(?:(?!--|/\*)[^\w\s'"`\[?:@$])+)
+  | (?P<other>.)
+""", re.VERBOSE)
+
+# Only what matters for finding statement boundaries: everything that can hide a semicolon
+_BOUNDARY = re.compile(r"""
+    (?P<comment>--.*|/\*(?:[^*]|\*(?!/))*(?:\*/)?)
+  | (?P<string>'(?:[^']|'')*'?)
+  | (?P<identifier>"(?:[^"]|"")*"?|`(?:[^`]|``)*`?|\[[^\]]*\]?)
+  | (?P<semicolon>;)
+""", re.VERBOSE)
+
+# How a state continues at the start of a line: the pattern matching its terminated remainder
+_CONTINUATION = {
+    BLOCK_COMMENT: ('comment', re.compile(r"(?:[^*]|\*(?!/))*\*/")),
+    STRING: ('string', re.compile(r"(?:[^']|'')*'")),
+    QUOTED_IDENTIFIER: ('identifier', re.compile(r'(?:[^"]|"")*"')),
+    BACKTICK_IDENTIFIER: ('identifier', re.compile(r"(?:[^`]|``)*`")),
+}
+
+
+def _open_state(kind, value):
+    # The state left behind by a token that reaches the end of the line, if unterminated
+    if kind == 'comment':
+        if value.startswith('/*') and (len(value) < 4 or not value.endswith('*/')):
+            return BLOCK_COMMENT
+    elif kind == 'string':
+        body = value[2:] if value[0] in 'xX' else value[1:]
+        if not body.endswith("'") or len(re.match(r"(?:[^']|'')*", body).group()) == len(body):
+            return STRING
+    elif kind == 'identifier':
+        quote = value[0]
+        if quote == '"' and len(re.match(r'(?:[^"]|"")*', value[1:]).group()) == len(value) - 1:
+            return QUOTED_IDENTIFIER
+        if quote == '`' and len(re.match(r"(?:[^`]|``)*", value[1:]).group()) == len(value) - 1:
+            return BACKTICK_IDENTIFIER
+    return NORMAL
+
+
+def tokenize_line(text, state=NORMAL):
+    # Returns ([(kind, start, length), ...], state at the end of the line). Words that are
+    # SQL keywords come back as 'keyword'.
+    tokens = []
+    pos = 0
+    if state != NORMAL:
+        kind, pattern = _CONTINUATION[state]
+        match = pattern.match(text)
+        if match is None:
+            if text:
+                tokens.append((kind, 0, len(text)))
+            return tokens, state
+        pos = match.end()
+        tokens.append((kind, 0, pos))
+        state = NORMAL
+
+    for match in _TOKEN.finditer(text, pos):
+        kind = match.lastgroup
+        start, end = match.span()
+        if kind == 'word' and match.group().upper() in KEYWORDS:
+            kind = 'keyword'
+        tokens.append((kind, start, end - start))
+
+    if tokens and tokens[-1][1] + tokens[-1][2] == len(text) and len(text) > pos:
+        kind, start, length = tokens[-1]
+        state = _open_state(kind, text[start:start + length])
+    return tokens, state
+
+
+def scan_line(text, state=NORMAL):
+    # A cheaper tokenize_line for splitting statements: only comments, strings, quoted
+    # identifiers and semicolons are reported, everything in between is plain code or space.
+    tokens = []
+    pos = 0
+    if state != NORMAL:
+        kind, pattern = _CONTINUATION[state]
+        match = pattern.match(text)
+        if match is None:
+            if text:
+                tokens.append((kind, 0, len(text)))
+            return tokens, state
+        pos = match.end()
+        tokens.append((kind, 0, pos))
+        state = NORMAL
+
+    for match in _BOUNDARY.finditer(text, pos):
+        start, end = match.span()
+        tokens.append((match.lastgroup, start, end - start))
+
+    if tokens and tokens[-1][1] + tokens[-1][2] == len(text) and len(text) > pos:
+        kind, start, length = tokens[-1]
+        state = _open_state(kind, text[start:start + length])
+    return tokens, state
@@ -0,0 +1,205 @@
+# backend/tablestats.py
+
+import math
+import random
+import sqlite3
+import time
+from collections import Counter
+
+# Rows read to estimate column statistics
+SAMPLE_ROWS = 10000
+
+# Separate rowid ranges the sample is taken from
+SAMPLE_CHUNKS = 20
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def has_rowid(conn, table):
+    # False for views and WITHOUT ROWID tables
+    try:
+        conn.execute(f"SELECT rowid FROM {_quote(table)} LIMIT 0")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def sample_rows(conn, table, limit=1000, chunks=10, keep_rowid=False):
+    # Up to `limit` rows from `chunks` random rowid ranges, in rowid order. Each range is one
+    # index seek, so the cost does not depend on the table size. Tables without a rowid give
+    # their first rows. Returns (headers, rows), each row led by its rowid if `keep_rowid`.
+    quoted = _quote(table)
+    if not has_rowid(conn, table):
+        cursor = conn.execute(f"SELECT * FROM {quoted} LIMIT ?", (limit,))
+        return [d[0] for d in cursor.description], cursor.fetchall()
+
+    # Two subqueries, as min() and max() together in one would scan the table
+    low, high = conn.execute(f"SELECT (SELECT min(rowid) FROM {quoted}), (SELECT max(rowid) FROM {quoted})").fetchone()
+    cursor = conn.execute(f"SELECT rowid, * FROM {quoted} LIMIT 0")
+    headers = [d[0] for d in cursor.description][0 if keep_rowid else 1:]
+    if low is None:
+        return headers, []
+
+    per_chunk = max(limit // chunks, 1)
+    starts = sorted(random.randint(low, high) for _ in range(chunks))
+    rows = {}
+    for start in starts:
+        for row in conn.execute(f"SELECT rowid, * FROM {quoted} WHERE rowid >= ? ORDER BY rowid LIMIT ?",
+                                (start, per_chunk)):
+            rows[row[0]] = row if keep_rowid else row[1:]
+    if len(rows) < limit and high - low < limit:
+        # Small table: ranges overlapped, take it whole
+        rows = {row[0]: row if keep_rowid else row[1:] for row in conn.execute(f"SELECT rowid, * FROM {quoted} ORDER BY rowid LIMIT ?",
+                                                        (limit,))}
+    return headers, [rows[rowid] for rowid in sorted(rows)]
+
+
+class ColumnStats:
+    def __init__(self, name, declared_type):
+        self.name = name
+        self.declared_type = declared_type
+        self.null_fraction = None
+        self.distinct = None
+        self.minimum = None
+        self.maximum = None
+        # True when min/max were read from an index rather than the sample
+        self.exact_range = False
+
+
+class TableStats:
+    def __init__(self, table):
+        self.table = table
+        self.rows = None
+        # Where the row count came from: 'sqlite_stat1', 'max(rowid)' or 'count(*)'
+        self.rows_source = None
+        self.sample_size = 0
+        self.columns = []
+        # From dbstat; None where SQLite was built without it
+        self.pages = None
+        self.bytes = None
+        self.payload = None
+        self.index_pages = None
+        self.index_bytes = None
+        self.elapsed = 0.0
+
+
+def estimate_distinct(values, total):
+    # GEE estimator (Charikar et al.): values seen once in the sample are scaled by
+    # sqrt(total / sample size), values seen more often are counted once
+    if not values:
+        return 0
+    counts = Counter(values)
+    once = sum(1 for count in counts.values() if count == 1)
+    estimate = math.sqrt(max(total, len(values)) / len(values)) * once + (len(counts) - once)
+    return int(min(round(estimate), max(total, len(counts))))
+
+
+def _sortable(value):
+    # SQLite orders NULL < numbers < text < blobs
+    rank = 1 if isinstance(value, (int, float)) else 2 if isinstance(value, str) else 3
+    return rank, value
+
+
+def compute_stats(conn, table, sample_size=SAMPLE_ROWS, cancel_event=None):
+    # Statistics cheap enough for tables of any size: everything comes from sqlite_stat1,
+    # index seeks and a rowid-range sample, except the page usage, which dbstat has to walk
+    # the table's pages for and which is therefore computed last.
+    start = time.perf_counter()
+    stats = TableStats(table)
+    quoted = _quote(table)
+
+    def check():
+        if cancel_event is not None and cancel_event.is_set():
+            raise sqlite3.OperationalError("interrupted")
+
+    # Row count: ANALYZE results if there are any, else the largest rowid (an upper bound)
+    stat = None
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        stat = conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? ORDER BY idx IS NOT NULL LIMIT 1",
+                            (table,)).fetchone()
+    rowid = has_rowid(conn, table)
+    if stat:
+        stats.rows = int(stat[0].split()[0])
+        stats.rows_source = 'sqlite_stat1'
+    elif rowid:
+        stats.rows = conn.execute(f"SELECT max(rowid) FROM {quoted}").fetchone()[0] or 0
+        stats.rows_source = 'max(rowid)'
+    else:
+        stats.rows = conn.execute(f"SELECT count(*) FROM {quoted}").fetchone()[0]
+        stats.rows_source = 'count(*)'
+    check()
+
+    headers, rows = sample_rows(conn, table, sample_size, SAMPLE_CHUNKS)
+    stats.sample_size = len(rows)
+    types = dict(conn.execute("SELECT name, type FROM pragma_table_info(?)", (table,)).fetchall())
+
+    # Columns leading an index (or the rowid alias) have exact min/max by a single seek
+    # and single-column unique ones have a distinct value per non-null row
+    indexed = set()
+    unique = set()
+    for index, is_unique in conn.execute("SELECT name, \"unique\" FROM pragma_index_list(?)", (table,)).fetchall():
+        columns = conn.execute("SELECT name FROM pragma_index_info(?) ORDER BY seqno", (index,)).fetchall()
+        if columns and columns[0][0]:
+            indexed.add(columns[0][0])
+            if is_unique and len(columns) == 1:
+                unique.add(columns[0][0])
+    # Distinct keys per index column from ANALYZE: rows / average rows per key
+    analyzed = {}
+    if stat:
+        for index, index_stat in conn.execute("SELECT idx, stat FROM sqlite_stat1 WHERE tbl = ? AND idx IS NOT NULL",
+                                              (table,)).fetchall():
+            first = conn.execute("SELECT name FROM pragma_index_info(?) WHERE seqno = 0", (index,)).fetchone()
+            numbers = index_stat.split()
+            if first and first[0] and len(numbers) > 1 and int(numbers[1]):
+                analyzed[first[0]] = int(numbers[0]) // int(numbers[1])
+
+    alias = _rowid_alias(conn, table) if rowid else None
+    for i, name in enumerate(headers):
+        column = ColumnStats(name, types.get(name, ''))
+        values = [row[i] for row in rows]
+        present = [value for value in values if value is not None]
+        if values:
+            column.null_fraction = 1 - len(present) / len(values)
+        if name == alias or name in unique:
+            column.distinct = round(stats.rows * (1 - (column.null_fraction or 0)))
+        else:
+            column.distinct = analyzed.get(name, estimate_distinct(present, stats.rows))
+        if name in indexed or name == alias:
+            check()
+            column.minimum, column.maximum = conn.execute(
+                f"SELECT (SELECT min({_quote(name)}) FROM {quoted}), (SELECT max({_quote(name)}) FROM {quoted})"
+            ).fetchone()
+            column.exact_range = True
+        elif present:
+            column.minimum = min(present, key=_sortable)
+            column.maximum = max(present, key=_sortable)
+        stats.columns.append(column)
+
+    check()
+    try:
+        for name, pages, payload, pgsize in conn.execute(
+                "SELECT name, sum(pageno), sum(payload), sum(pgsize) FROM dbstat('main', 1) "
+                "WHERE name = ? OR name IN (SELECT name FROM pragma_index_list(?)) GROUP BY name",
+                (table, table)):
+            if name == table:
+                stats.pages, stats.payload, stats.bytes = pages, payload, pgsize
+            else:
+                stats.index_pages = (stats.index_pages or 0) + pages
+                stats.index_bytes = (stats.index_bytes or 0) + pgsize
+    except sqlite3.OperationalError as e:
+        if 'no such table' not in str(e):
+            raise
+
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def _rowid_alias(conn, table):
+    # The INTEGER PRIMARY KEY column, which is the rowid itself, or None
+    primary = [(name, column_type) for name, column_type, pk in
+               conn.execute("SELECT name, type, pk FROM pragma_table_info(?)", (table,)) if pk]
+    if len(primary) == 1 and primary[0][1].upper() == 'INTEGER':
+        return primary[0][0]
+    return None
@@ -0,0 +1,3 @@
+# benchmarks/__init__.py
+
+# Benchmark suite: python -m benchmarks --rows 100000 --out results.json
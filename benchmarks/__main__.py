@@ -0,0 +1,54 @@
+# benchmarks/__main__.py
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+# Before anything imports Qt or reads the config directory: no window system is needed, and
+# the editor's history and profiles are left alone
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+_home = tempfile.TemporaryDirectory(prefix="zen-sql-bench-home-")
+os.environ["ZEN_SQL_HOME"] = _home.name
+
+from benchmarks.suite import BENCHMARKS, run_suite, compare, write_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks", description="Time the query, render, highlight, edit, "
+                                                                    "import and export paths on generated data.")
+    parser.add_argument("--rows", type=int, default=100000, help="Rows per generated table (default 100000).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the median is reported.")
+    parser.add_argument("--only", action="append", choices=[name for name, _ in BENCHMARKS],
+                        help="Run only this benchmark. May be repeated.")
+    parser.add_argument("--out", help="Write the results as JSON to this file.")
+    parser.add_argument("--baseline", help="Earlier results file to compare the medians with.")
+    parser.add_argument("--workdir", help="Directory for the generated files; a temporary one by default.")
+    args = parser.parse_args(argv)
+
+    def report(name, result):
+        print(f"{name:16} {result['median_s'] * 1000:10.1f} ms  {result['rate'] or 0:14,.0f} {result['unit']}/s",
+              file=sys.stderr)
+
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        results = run_suite(args.workdir, args.rows, args.repeat, args.only, report)
+    else:
+        with tempfile.TemporaryDirectory(prefix="zen-sql-bench-") as workdir:
+            results = run_suite(workdir, args.rows, args.repeat, args.only, report)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            for line in compare(results, json.load(file)):
+                print(line, file=sys.stderr)
+    if args.out:
+        write_results(results, args.out)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+# benchmarks/datagen.py
+
+import os
+import sqlite3
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'scripts')
+
+# Grows the template table from scripts/gen_db.sql to :rows rows and adds a wider table with
+# every storage class, NULLs and an index. Values are derived from the row number only, so the
+# same size always gives the same database.
+FILL_SQL = """
+WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < :rows)
+INSERT INTO template (name, age)
+SELECT 'name_' || (x * 7919 % :rows), x * 31 % 90 FROM n WHERE x > (SELECT count(*) FROM template);
+
+CREATE TABLE bench_wide (
+    id INTEGER PRIMARY KEY,
+    code TEXT,
+    amount REAL,
+    quantity INTEGER,
+    note TEXT,
+    payload BLOB,
+    category TEXT
+);
+
+WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < :rows)
+INSERT INTO bench_wide (code, amount, quantity, note, payload, category)
+SELECT printf('C%08d', x * 104729 % 100000000),
+       (x * 7 % 100000) / 100.0,
+       x * 13 % 1000,
+       CASE WHEN x % 5 = 0 THEN NULL ELSE 'note ' || x || ' ' || substr('abcdefghijklmnopqrstuvwxyz', x % 26 + 1) END,
+       CASE WHEN x % 10 = 0 THEN zeroblob(16) ELSE NULL END,
+       'cat_' || (x % 50)
+FROM n;
+
+CREATE INDEX bench_wide_category ON bench_wide (category);
+"""
+
+# Statements the highlighter script is built from, one of each per round
+SCRIPT_STATEMENTS = (
+    "SELECT id, code, amount * 1.2 AS gross FROM bench_wide WHERE category = 'cat_{i}' AND quantity > {i};",
+    "-- refresh the totals for batch {i}\nUPDATE bench_wide SET note = 'it''s batch {i}' WHERE id BETWEEN {i} AND {i} + 10;",
+    "INSERT INTO template (name, age) VALUES ('name {i}', {i}), (:name, @age);",
+    "/* report {i} */ SELECT category, count(*), sum(amount) FROM bench_wide GROUP BY category HAVING count(*) > {i};",
+    "DELETE FROM template WHERE age < 0x{i:x} OR name LIKE \"%{i}%\";",
+)
+
+
+def generate_database(path, rows):
+    # A fresh database at `path`: scripts/gen_db.sql, then FILL_SQL for `rows` rows per table
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    try:
+        with open(os.path.join(SCRIPTS_DIR, 'gen_db.sql'), 'r', encoding='utf-8') as file:
+            conn.executescript(file.read())
+        for statement in FILL_SQL.split(';\n'):
+            if statement.strip():
+                conn.execute(statement, {"rows": rows})
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    return path
+
+
+def generate_script(statements):
+    # SQL text of `statements` statements mixing every token kind the highlighter formats
+    parts = []
+    for i in range(statements):
+        parts.append(SCRIPT_STATEMENTS[i % len(SCRIPT_STATEMENTS)].format(i=i))
+    return "\n".join(parts) + "\n"
@@ -0,0 +1,307 @@
+# benchmarks/suite.py
+
+import datetime
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.datagen import generate_database, generate_script
+
+REPO_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+
+# Table every row-oriented benchmark reads
+TABLE = 'bench_wide'
+
+# Frames painted by the scrolling benchmark
+SCROLL_FRAMES = 200
+
+
+class Context:
+    # What the benchmarks share: the generated database, a scratch directory and, created on
+    # first use, the offscreen QApplication and main window
+    def __init__(self, workdir, rows):
+        self.workdir = workdir
+        self.rows = rows
+        self.db_path = os.path.join(workdir, f"bench_{rows}.db")
+        self.runs = 0
+        self._app = None
+        self._window = None
+
+    def path(self, name):
+        return os.path.join(self.workdir, name)
+
+    def scratch_copy(self):
+        # A fresh copy of the database for benchmarks that write, replacing the previous one
+        previous = self.path(f"scratch_{self.runs}.db")
+        if os.path.exists(previous):
+            os.remove(previous)
+        self.runs += 1
+        path = self.path(f"scratch_{self.runs}.db")
+        shutil.copyfile(self.db_path, path)
+        return path
+
+    def app(self):
+        if self._app is None:
+            from PyQt5.QtWidgets import QApplication
+            self._app = QApplication.instance() or QApplication([sys.argv[0]])
+        return self._app
+
+    def window(self):
+        if self._window is None:
+            self.app()
+            from frontend.mainwindow import MainWindow
+            self._window = MainWindow()
+            self._window.resize(1200, 800)
+            self._window.show()
+            self._window.connect_to_database(self.db_path)
+            self._window.load_tables()
+        return self._window
+
+    def close(self):
+        if self._window is not None:
+            self._window.close()
+            self._window = None
+
+
+# Each benchmark runs once and returns (seconds, items processed, unit), timing only the work
+# itself. Setup for a run goes in a `prepare` attribute, called with the context beforehand.
+
+def bench_query(ctx):
+    from backend.executor import QueryExecutor
+    from backend.profiles import open_connection
+    conn = open_connection(ctx.db_path)
+    try:
+        started = time.perf_counter()
+        summary = QueryExecutor(conn).run(f"SELECT * FROM {TABLE}", on_rows=lambda rows: None)
+        return time.perf_counter() - started, summary["rows"], "rows"
+    finally:
+        conn.close()
+
+
+def bench_table_load(ctx):
+    # Keyset pages into the grid's column store, as browsing the table to the end does
+    ctx.app()
+    from backend.profiles import open_connection
+    from backend.rowkeys import table_key, KeysetPager
+    from frontend.resultmodel import ResultTableModel
+    conn = open_connection(ctx.db_path)
+    try:
+        started = time.perf_counter()
+        key, hidden = table_key(conn, TABLE)
+        pager = KeysetPager(conn, TABLE, key, hidden)
+        model = ResultTableModel(pager.headers[1 if hidden else 0:], None, hidden=1 if hidden else 0)
+        model.set_cursor(pager)
+        while model.canFetchMore():
+            model.fetchMore()
+        return time.perf_counter() - started, model.rowCount(), "rows"
+    finally:
+        conn.close()
+
+
+def bench_render(ctx):
+    # populate_table() with every row, then the first paint of the grid
+    window = ctx.window()
+    rows = window.conn.execute(f"SELECT * FROM {TABLE}").fetchall()
+    headers = [d[0] for d in window.conn.execute(f"SELECT * FROM {TABLE} LIMIT 0").description]
+    started = time.perf_counter()
+    window.populate_table(TABLE, headers, rows)
+    window.resultTable.viewport().repaint()
+    ctx.app().processEvents()
+    return time.perf_counter() - started, len(rows), "rows"
+
+
+def bench_scroll(ctx):
+    # Painting the grid at SCROLL_FRAMES positions spread over the loaded rows
+    window = ctx.window()
+    view = window.resultTable
+    model = view.model()
+    if model is None or model.rowCount() < ctx.rows:
+        bench_render(ctx)
+        model = view.model()
+    step = max(model.rowCount() // SCROLL_FRAMES, 1)
+    started = time.perf_counter()
+    for frame in range(SCROLL_FRAMES):
+        view.scrollTo(model.index(min(frame * step, model.rowCount() - 1), 0))
+        view.viewport().repaint()
+    return time.perf_counter() - started, SCROLL_FRAMES, "frames"
+
+
+def bench_highlight(ctx):
+    # The editor's highlighter over a script of one statement per table row
+    ctx.app()
+    from PyQt5.QtGui import QTextDocument
+    from frontend.mainwindow import SqlHighlighter
+    script = generate_script(ctx.rows)
+    document = QTextDocument()
+    document.setPlainText(script)
+    highlighter = SqlHighlighter(document)
+    # A new highlighter only formats the document once the event loop runs; this does it now
+    started = time.perf_counter()
+    highlighter.rehighlight()
+    elapsed = time.perf_counter() - started
+    highlighter.setDocument(None)
+    return elapsed, len(script.encode('utf-8')), "bytes"
+
+
+def bench_edit_writeback(ctx):
+    # One pending edit per ten rows, applied in one transaction as "Apply Edits" does
+    from backend.editbuffer import EditBuffer
+    from backend.profiles import open_connection
+    from backend.rowkeys import table_key
+    conn = open_connection(bench_edit_writeback.path)
+    try:
+        key, _ = table_key(conn, TABLE)
+        buffer = EditBuffer()
+        for rowid in range(1, ctx.rows + 1, 10):
+            buffer.add(TABLE, 'note', (rowid,), f"edited {rowid}", key)
+            buffer.add(TABLE, 'quantity', (rowid,), rowid % 7, key)
+        started = time.perf_counter()
+        count = buffer.flush(conn)
+        return time.perf_counter() - started, count, "edits"
+    finally:
+        conn.close()
+
+
+bench_edit_writeback.prepare = lambda ctx: setattr(bench_edit_writeback, 'path', ctx.scratch_copy())
+
+
+def _bench_export(fmt):
+    def bench(ctx):
+        from backend.export import export_cursor
+        from backend.profiles import open_connection
+        conn = open_connection(ctx.db_path)
+        try:
+            started = time.perf_counter()
+            summary = export_cursor(conn.execute(f"SELECT * FROM {TABLE}"), ctx.path(f"export.{fmt}"), fmt)
+            return time.perf_counter() - started, summary["rows"], "rows"
+        finally:
+            conn.close()
+    return bench
+
+
+def _bench_import(fmt):
+    def bench(ctx):
+        from backend.importer import Importer
+        from backend.profiles import open_connection
+        conn = open_connection(bench.path)
+        try:
+            started = time.perf_counter()
+            summary = Importer(conn).run(ctx.path(f"export.{fmt}"), 'imported', fmt)
+            return time.perf_counter() - started, summary["rows"], "rows"
+        finally:
+            conn.close()
+
+    def prepare(ctx):
+        bench.path = ctx.scratch_copy()
+        if not os.path.exists(ctx.path(f"export.{fmt}")):
+            _bench_export(fmt)(ctx)
+    bench.prepare = prepare
+    return bench
+
+
+BENCHMARKS = [
+    ("query", bench_query),
+    ("table_load", bench_table_load),
+    ("render", bench_render),
+    ("scroll", bench_scroll),
+    ("highlight", bench_highlight),
+    ("edit_writeback", bench_edit_writeback),
+    ("export_csv", _bench_export('csv')),
+    ("export_jsonl", _bench_export('jsonl')),
+    ("export_zcol", _bench_export('zcol')),
+    ("import_csv", _bench_import('csv')),
+    ("import_jsonl", _bench_import('jsonl')),
+]
+
+
+def environment():
+    commit = None
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        pass
+    info = {
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "qt_platform": os.environ.get("QT_QPA_PLATFORM"),
+    }
+    try:
+        from PyQt5.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+        info["qt"] = QT_VERSION_STR
+        info["pyqt"] = PYQT_VERSION_STR
+    except ImportError:
+        pass
+    return info
+
+
+def run_suite(workdir, rows, repeat=3, only=None, report=None):
+    # Runs each selected benchmark `repeat` times on a database of `rows` rows per table and
+    # returns the results document. report(name, result) is called after each benchmark.
+    ctx = Context(workdir, rows)
+    started = time.perf_counter()
+    generate_database(ctx.db_path, rows)
+    results = {}
+    try:
+        for name, bench in BENCHMARKS:
+            if only and name not in only:
+                continue
+            runs = []
+            items = unit = None
+            for _ in range(repeat):
+                prepare = getattr(bench, 'prepare', None)
+                if prepare:
+                    prepare(ctx)
+                elapsed, items, unit = bench(ctx)
+                runs.append(elapsed)
+            median = statistics.median(runs)
+            results[name] = {
+                "median_s": median,
+                "min_s": min(runs),
+                "runs_s": runs,
+                "items": items,
+                "unit": unit,
+                "rate": items / median if median > 0 else None,
+            }
+            if report:
+                report(name, results[name])
+    finally:
+        ctx.close()
+
+    return {
+        "suite": "zen-sql",
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "parameters": {"rows": rows, "repeat": repeat},
+        "environment": environment(),
+        "elapsed_s": time.perf_counter() - started,
+        "results": results,
+    }
+
+
+def compare(results, baseline):
+    # Lines of median change against an earlier results document, slower is positive
+    lines = []
+    for name, result in results["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before.get("median_s"):
+            continue
+        change = (result["median_s"] / before["median_s"] - 1) * 100
+        lines.append(f"{name:16} {before['median_s'] * 1000:10.1f} ms -> {result['median_s'] * 1000:10.1f} ms "
+                     f"{change:+7.1f}%")
+    return lines
+
+
+def write_results(results, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+        file.write('\n')
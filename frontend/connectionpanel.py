@@ -0,0 +1,143 @@
+# frontend/connectionpanel.py
+
+import os
+import sqlite3
+
+from PyQt5.QtWidgets import QDockWidget, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTreeWidget, \
+    QTreeWidgetItem
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QFont
+
+# Item data: (kind, database path, alias or table name), kind one of 'database', 'attached', 'table'
+ROLE = Qt.UserRole
+
+
+class ConnectionPanel(QDockWidget):
+    # The open databases and what is attached to each, from the ConnectionManager
+    activateRequested = pyqtSignal(str)
+    openRequested = pyqtSignal()
+    attachRequested = pyqtSignal(str)
+    detachRequested = pyqtSignal(str, str)
+    closeRequested = pyqtSignal(str)
+    # A qualified alias.table name, to insert into the editor
+    nameActivated = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__("Databases", parent)
+        self.setObjectName("connectionPanel")
+        self.setFeatures(QDockWidget.DockWidgetMovable | QDockWidget.DockWidgetClosable)
+
+        widget = QWidget()
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderHidden(True)
+        self.tree.setStyleSheet("background-color: #111; color: white;")
+        self.tree.itemActivated.connect(self.item_activated)
+        self.tree.currentItemChanged.connect(lambda *_: self.update_buttons())
+        layout.addWidget(self.tree)
+
+        buttons = QHBoxLayout()
+        self.openButton = QPushButton("Open")
+        self.openButton.setToolTip("Open another database; the ones already open stay open.")
+        self.openButton.clicked.connect(self.openRequested.emit)
+        self.attachButton = QPushButton("Attach")
+        self.attachButton.setToolTip("ATTACH a database file to the selected database, for queries across both.")
+        self.attachButton.clicked.connect(lambda: self.emit_selected(self.attachRequested))
+        self.detachButton = QPushButton("Detach")
+        self.detachButton.clicked.connect(self.detach_selected)
+        self.closeButton = QPushButton("Close")
+        self.closeButton.setToolTip("Close every connection to the selected database.")
+        self.closeButton.clicked.connect(lambda: self.emit_selected(self.closeRequested))
+        for button in (self.openButton, self.attachButton, self.detachButton, self.closeButton):
+            button.setStyleSheet("""
+                QPushButton {
+                    padding: 3px;
+                    border: 1px solid grey;
+                }
+                QPushButton:hover {
+                    background-color: #333;
+                }
+            """)
+            buttons.addWidget(button)
+        layout.addLayout(buttons)
+
+        widget.setLayout(layout)
+        self.setWidget(widget)
+        self.update_buttons()
+
+    def refresh(self, manager, active_path=None):
+        # Rebuilt from the manager, keeping the selection where it can
+        selected = self.selected()
+        active_path = os.path.abspath(active_path) if active_path else None
+        self.tree.clear()
+        for pool in manager:
+            item = QTreeWidgetItem([os.path.basename(pool.db_path)])
+            item.setData(0, ROLE, ('database', pool.db_path, None))
+            if pool.journal_mode == 'wal':
+                concurrency = "Reads and writes run side by side (WAL journal)."
+            else:
+                concurrency = (f"Long reads can hold up writes ({pool.journal_mode} journal), "
+                               f"a profile with a WAL journal lets them run side by side.")
+            item.setToolTip(0, f"{pool.db_path}\nProfile: {pool.profile.describe()}\n{concurrency}\n"
+                               f"Double-click to show it.")
+            if pool.db_path == active_path:
+                font = QFont()
+                font.setBold(True)
+                item.setFont(0, font)
+            self.tree.addTopLevelItem(item)
+            for alias, path in pool.attached.items():
+                child = QTreeWidgetItem([f"{alias}: {os.path.basename(path)}"])
+                child.setData(0, ROLE, ('attached', pool.db_path, alias))
+                child.setToolTip(0, path)
+                item.addChild(child)
+                try:
+                    tables = pool.tables(alias)
+                except sqlite3.Error as e:
+                    child.setToolTip(0, f"{path}\n{e}")
+                    continue
+                for table in tables:
+                    leaf = QTreeWidgetItem([table])
+                    leaf.setData(0, ROLE, ('table', pool.db_path, table))
+                    leaf.setToolTip(0, f"Double-click to insert {alias}.{table} into the editor.")
+                    child.addChild(leaf)
+            item.setExpanded(True)
+            if selected is not None and selected[1] == pool.db_path and selected[0] == 'database':
+                self.tree.setCurrentItem(item)
+        self.update_buttons()
+
+    def selected(self):
+        item = self.tree.currentItem()
+        return item.data(0, ROLE) if item is not None else None
+
+    def update_buttons(self):
+        selected = self.selected()
+        self.attachButton.setEnabled(selected is not None)
+        self.detachButton.setEnabled(selected is not None and selected[0] == 'attached')
+        self.closeButton.setEnabled(selected is not None and selected[0] == 'database')
+
+    def emit_selected(self, signal):
+        selected = self.selected()
+        if selected is not None:
+            signal.emit(selected[1])
+
+    def detach_selected(self):
+        selected = self.selected()
+        if selected is not None and selected[0] == 'attached':
+            self.detachRequested.emit(selected[1], selected[2])
+
+    def item_activated(self, item):
+        kind, path, name = item.data(0, ROLE)
+        if kind == 'database':
+            self.activateRequested.emit(path)
+        elif kind == 'table':
+            alias = item.parent().data(0, ROLE)[2]
+            self.nameActivated.emit(f"{_quote(alias)}.{_quote(name)}")
+
+
+def _quote(name):
+    # Plain names stay readable in the editor
+    if name.isidentifier():
+        return name
+    return '"' + name.replace('"', '""') + '"'
@@ -0,0 +1,86 @@
+# frontend/diffdialog.py
+
+import os
+
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, \
+    QTableWidgetItem, QAbstractItemView, QHeaderView, QPlainTextEdit
+from PyQt5.QtCore import Qt, pyqtSignal
+
+
+class DiffDialog(QDialog):
+    # Emitted with the path of the synchronization script
+    loadRequested = pyqtSignal(str)
+    runRequested = pyqtSignal(str)
+
+    COLUMNS = ["Table", "Status", "Rows", "Ranges", "Changed Ranges", "Inserts", "Updates", "Deletes", "Note"]
+
+    def __init__(self, summary, main_path, other_path, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Database Comparison')
+        self.setGeometry(250, 250, 1000, 550)
+        self.setStyleSheet("background-color: black; color: white;")
+        self.script_path = summary["path"]
+
+        layout = QVBoxLayout()
+
+        changes = summary["inserts"] + summary["updates"] + summary["deletes"] + len(summary["schema"])
+        if changes:
+            outcome = (f"{summary['inserts']:,} inserts, {summary['updates']:,} updates, {summary['deletes']:,} deletes "
+                       f"and {len(summary['schema'])} schema changes")
+        else:
+            outcome = "The databases hold the same schema and rows"
+        summaryLabel = QLabel(f"{outcome}, compared in {summary['elapsed']:.2f} s.\n"
+                              f"{summary['statements']:,} statements in {os.path.basename(self.script_path)} make "
+                              f"{os.path.basename(main_path)} match {os.path.basename(other_path)}.")
+        summaryLabel.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout.addWidget(summaryLabel)
+
+        if summary["schema"]:
+            schemaText = QPlainTextEdit("\n".join(f"{change:8} {kind} {name}" for change, kind, name in summary["schema"]))
+            schemaText.setReadOnly(True)
+            schemaText.setMaximumHeight(110)
+            schemaText.setStyleSheet("background-color: #111; color: white; font-family: Courier;")
+            layout.addWidget(schemaText)
+
+        tablesTable = QTableWidget(len(summary["tables"]), len(self.COLUMNS))
+        tablesTable.setHorizontalHeaderLabels(self.COLUMNS)
+        tablesTable.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        tablesTable.verticalHeader().hide()
+        tablesTable.horizontalHeader().setSectionResizeMode(len(self.COLUMNS) - 1, QHeaderView.Stretch)
+        tablesTable.setStyleSheet("background-color: #111; color: white; font-family: Courier;")
+        for row, result in enumerate(summary["tables"]):
+            values = [result.table, result.status, result.rows, result.chunks, result.changed_chunks,
+                      result.inserts, result.updates, result.deletes, result.note]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem()
+                # Numbers sort as numbers
+                item.setData(Qt.DisplayRole, value)
+                tablesTable.setItem(row, column, item)
+        tablesTable.setSortingEnabled(True)
+        tablesTable.resizeColumnsToContents()
+        layout.addWidget(tablesTable)
+
+        buttons = QHBoxLayout()
+        loadButton = QPushButton("Load Script into Editor")
+        loadButton.clicked.connect(lambda: self.loadRequested.emit(self.script_path))
+        runButton = QPushButton("Run Script...")
+        runButton.setToolTip("Apply the script to the open database.")
+        runButton.clicked.connect(lambda: self.runRequested.emit(self.script_path))
+        closeButton = QPushButton("Close")
+        closeButton.clicked.connect(self.close)
+        for button in (loadButton, runButton, closeButton):
+            button.setEnabled(button is closeButton or summary["statements"] > 0)
+            button.setStyleSheet("""
+                QPushButton {
+                    padding: 5px;
+                    border: 1px solid grey;
+                }
+                QPushButton:hover {
+                    background-color: #333;
+                }
+            """)
+            buttons.addWidget(button)
+        buttons.addStretch(1)
+        layout.addLayout(buttons)
+
+        self.setLayout(layout)
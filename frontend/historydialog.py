@@ -0,0 +1,128 @@
+# frontend/historydialog.py
+
+import datetime
+
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, \
+    QTableWidgetItem, QCheckBox, QAbstractItemView, QHeaderView
+from PyQt5.QtCore import Qt, pyqtSignal
+
+
+class HistoryDialog(QDialog):
+    # Emitted with the history entry id
+    rerunRequested = pyqtSignal(int)
+    loadRequested = pyqtSignal(str)
+
+    COLUMNS = ["Started", "Status", "SQL", "Rows", "Changes", "VM Steps", "Execute ms", "Fetch ms", "Render ms",
+               "Total ms", "Process peak MiB"]
+
+    def __init__(self, history, db_path=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Query History')
+        self.setGeometry(250, 250, 1100, 500)
+        self.setStyleSheet("background-color: black; color: white;")
+
+        self.history = history
+        self.db_path = db_path
+
+        layout = QVBoxLayout()
+
+        self.currentOnly = QCheckBox("Current database only")
+        self.currentOnly.setChecked(db_path is not None)
+        self.currentOnly.setEnabled(db_path is not None)
+        self.currentOnly.toggled.connect(self.refresh)
+        layout.addWidget(self.currentOnly)
+
+        self.historyTable = QTableWidget(0, len(self.COLUMNS))
+        self.historyTable.setHorizontalHeaderLabels(self.COLUMNS)
+        self.historyTable.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.historyTable.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.historyTable.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.historyTable.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.historyTable.setStyleSheet("background-color: #111; color: white; font-family: Courier;")
+        self.historyTable.itemSelectionChanged.connect(self.update_buttons)
+        layout.addWidget(self.historyTable)
+
+        buttons = QHBoxLayout()
+        self.rerunButton = QPushButton("Re-run and Compare")
+        self.rerunButton.clicked.connect(self.rerun)
+        buttons.addWidget(self.rerunButton)
+        self.loadButton = QPushButton("Load into Editor")
+        self.loadButton.clicked.connect(self.load)
+        buttons.addWidget(self.loadButton)
+        refreshButton = QPushButton("Refresh")
+        refreshButton.clicked.connect(self.refresh)
+        buttons.addWidget(refreshButton)
+        clearButton = QPushButton("Clear History")
+        clearButton.clicked.connect(self.clear)
+        buttons.addWidget(clearButton)
+        for button in (self.rerunButton, self.loadButton, refreshButton, clearButton):
+            button.setStyleSheet("""
+                QPushButton {
+                    padding: 5px;
+                    border: 1px solid grey;
+                }
+                QPushButton:hover {
+                    background-color: #333;
+                }
+            """)
+        self.resultLabel = QLabel()
+        buttons.addWidget(self.resultLabel, stretch=1)
+        layout.addLayout(buttons)
+
+        self.setLayout(layout)
+        self.refresh()
+
+    def refresh(self):
+        db_path = self.db_path if self.currentOnly.isChecked() else None
+        entries = self.history.entries(db_path=db_path)
+
+        # Sorting is switched off while filling, or rows would move under the inserts
+        self.historyTable.setSortingEnabled(False)
+        self.historyTable.setRowCount(len(entries))
+        for row, entry in enumerate(entries):
+            started = datetime.datetime.fromtimestamp(entry.started).strftime("%Y-%m-%d %H:%M:%S")
+            peak = None if entry.process_peak_kb is None else round(entry.process_peak_kb / 1024, 1)
+            values = [started, entry.status, " ".join(entry.sql.split()), entry.rows, entry.changes, entry.vm_steps,
+                      entry.execute_ms, entry.fetch_ms, entry.render_ms, entry.total_ms, peak]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem()
+                if isinstance(value, float):
+                    value = round(value, 2)
+                # Numbers go in as numbers so the columns sort numerically
+                item.setData(Qt.DisplayRole, value if value is not None else "")
+                if column == 2:
+                    item.setToolTip(entry.sql)
+                self.historyTable.setItem(row, column, item)
+            self.historyTable.item(row, 0).setData(Qt.UserRole, entry.id)
+        self.historyTable.setSortingEnabled(True)
+        self.update_buttons()
+
+    def selected_id(self):
+        items = self.historyTable.selectedItems()
+        if not items:
+            return None
+        return self.historyTable.item(items[0].row(), 0).data(Qt.UserRole)
+
+    def update_buttons(self):
+        selected = self.selected_id() is not None
+        self.rerunButton.setEnabled(selected)
+        self.loadButton.setEnabled(selected)
+
+    def rerun(self):
+        entry_id = self.selected_id()
+        if entry_id is not None:
+            self.resultLabel.setText("Running...")
+            self.rerunRequested.emit(entry_id)
+
+    def load(self):
+        entry_id = self.selected_id()
+        if entry_id is not None:
+            self.loadRequested.emit(self.history.get(entry_id).sql)
+
+    def clear(self):
+        self.history.clear()
+        self.refresh()
+
+    def show_comparison(self, text):
+        self.resultLabel.setText(text)
+        self.refresh()
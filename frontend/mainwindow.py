@@ -1,41 +1,66 @@
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel, QPlainTextEdit, QPushButton, \
-    QTableWidget, QTableWidgetItem, QFileDialog, QToolTip, QAction, QTextBrowser, QDialog, QComboBox, QToolBar, \
-    QCompleter, QProgressDialog, QMessageBox, QAbstractItemView, QTextEdit
-from PyQt5.QtCore import Qt, pyqtSlot, QThread, pyqtSignal, QSize, QRect, QRegExp
+from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPlainTextEdit, QPushButton, \
+    QFileDialog, QToolTip, QAction, QTextBrowser, QDialog, QComboBox, QToolBar, \
+    QCompleter, QProgressDialog, QMessageBox, QAbstractItemView, QTextEdit, QActionGroup, QTabWidget, QCheckBox, \
+    QTableWidget, QTableWidgetItem, QHeaderView, QInputDialog, QLineEdit
+from PyQt5.QtCore import Qt, pyqtSlot, QThread, pyqtSignal, QSize, QRect, QTimer, QStringListModel
 from PyQt5.QtGui import QTextCursor, QTextCharFormat, QColor, QIcon, QPainter, QTextFormat, QFont, QSyntaxHighlighter
 import sys
 import os
 import sqlite3
 import datetime
-
-
-class AllCapsHighlighter(QSyntaxHighlighter):
+import time
+import re
+
+from frontend.resultmodel import ResultTableModel
+from frontend.resultview import ResultTableView
+from frontend.workers import QueryWorker, ScriptWorker, ExportWorker, ImportWorker, StatsWorker, DiffWorker
+from frontend.plandialog import PlanDialog
+from frontend.historydialog import HistoryDialog
+from frontend.statsdialog import StatsDialog
+from frontend.diffdialog import DiffDialog
+from frontend.connectionpanel import ConnectionPanel
+from backend.editbuffer import EditBuffer
+from backend.schema import SchemaCache
+from backend.sqllexer import tokenize_line, NORMAL
+from backend.profiles import PRESETS, ProfileStore
+from backend.connections import ConnectionManager, PoolBusy, is_read_only, parse_attach
+from backend.history import QueryHistory, compare
+from backend.resultcache import ResultCache
+from backend.scriptrunner import iter_statements, strip_leading_comments, statement_at
+from backend.params import find_parameters, parse_value, bind_parameters
+from backend.importer import detect_format
+from backend.tablestats import sample_rows, has_rowid
+from backend.rowkeys import table_key, result_key, KeysetPager
+
+
+def _quote(name):
+    # Table names go into SQL quoted: spaces, keywords and quotes in them stay part of the name
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SqlHighlighter(QSyntaxHighlighter):
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.allCapsFormat = QTextCharFormat()
-        self.allCapsFormat.setForeground(QColor("#FFF500"))
-
-        self.specialCharFormat = QTextCharFormat()
-        self.specialCharFormat.setForeground(QColor("magenta"))
-
-        # Define the regular expressions for patterns
-        self.allCapsPattern = QRegExp(r'\b[A-Z]+\b')
-        self.specialCharPattern = QRegExp(r'\W')
+        # Token kinds without a format (whitespace, plain words) are left untouched
+        self.formats = {}
+        for kind, color in (('keyword', "#FFF500"), ('operator', "magenta"), ('string', "orange"),
+                            ('comment', "red"), ('number', "#00BFFF"), ('param', "#FF77FF")):
+            format = QTextCharFormat()
+            format.setForeground(QColor(color))
+            self.formats[kind] = format
+        self.formats['comment'].setFontItalic(True)
 
     def highlightBlock(self, text):
-        # Highlight all caps words
-        index = self.allCapsPattern.indexIn(text)
-        while index >= 0:
-            length = self.allCapsPattern.matchedLength()
-            self.setFormat(index, length, self.allCapsFormat)
-            index = self.allCapsPattern.indexIn(text, index + length)
-
-        # Highlight special characters
-        index = self.specialCharPattern.indexIn(text)
-        while index >= 0:
-            length = self.specialCharPattern.matchedLength()
-            self.setFormat(index, length, self.specialCharFormat)
-            index = self.specialCharPattern.indexIn(text, index + length)
+        # One lexer pass per block. The block state carries open comments, strings and quoted
+        # identifiers into the next line; Qt only re-highlights following blocks while that
+        # state changes, so an edit re-lexes the changed lines and nothing more.
+        state = max(self.previousBlockState(), NORMAL)
+        tokens, state = tokenize_line(text, state)
+        for kind, start, length in tokens:
+            format = self.formats.get(kind)
+            if format is not None:
+                self.setFormat(start, length, format)
+        self.setCurrentBlockState(state)
 
 class LineNumberArea(QWidget):
     def __init__(self, editor):
@@ -50,6 +75,10 @@ class LineNumberArea(QWidget):
 
 
 class CodeEditor(QPlainTextEdit):
+    # Ctrl+Enter runs the statement under the cursor, Ctrl+Shift+Enter the selected text
+    executeStatementRequested = pyqtSignal()
+    executeSelectionRequested = pyqtSignal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.lineNumberArea = LineNumberArea(self)
@@ -62,7 +91,19 @@ class CodeEditor(QPlainTextEdit):
         self.updateLineNumberAreaWidth(0)
 
         # Initialize the syntax highlighter
-        self.highlighter = AllCapsHighlighter(self.document())
+        self.highlighter = SqlHighlighter(self.document())
+
+        # Table and column autocompletion, fed from the schema cache
+        self.schema = None
+        self.completionWords = []
+        self.completionModel = QStringListModel(self)
+        self.completer = QCompleter(self.completionModel, self)
+        self.completer.setWidget(self)
+        self.completer.setCompletionMode(QCompleter.PopupCompletion)
+        self.completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.completer.popup().setStyleSheet("background-color: #111; color: white;")
+        self.completer.activated.connect(self.insertCompletion)
+        self.completionPattern = re.compile(r'(?:([A-Za-z_][\w$]*)\.)?([\w$]*)$')
 
     def lineNumberAreaWidth(self):
         digits = self.blockCount()
@@ -110,6 +151,83 @@ class CodeEditor(QPlainTextEdit):
             bottom = top + self.blockBoundingRect(block).height()
             blockNumber += 1
 
+    def setSchema(self, schema):
+        self.schema = schema
+        self.completionWords = sorted(set(schema.tables + schema.views + schema.all_column_names()), key=str.lower)
+
+    def insertCompletion(self, completion):
+        # Replace the typed prefix so the completion gets the catalog's spelling
+        cursor = self.textCursor()
+        cursor.movePosition(QTextCursor.Left, QTextCursor.KeepAnchor, len(self.completer.completionPrefix()))
+        cursor.insertText(completion)
+        self.setTextCursor(cursor)
+
+    def currentStatement(self):
+        return statement_at(self.toPlainText(), self.textCursor().position())
+
+    def selectedSql(self):
+        # QTextCursor separates selected lines with U+2029
+        return self.textCursor().selectedText().replace('\u2029', '\n')
+
+    def contextMenuEvent(self, event):
+        menu = self.createStandardContextMenu()
+        menu.addSeparator()
+        statementAction = menu.addAction("Execute Current Statement")
+        statementAction.triggered.connect(self.executeStatementRequested)
+        selectionAction = menu.addAction("Execute Selection")
+        selectionAction.setEnabled(self.textCursor().hasSelection())
+        selectionAction.triggered.connect(self.executeSelectionRequested)
+        menu.exec_(event.globalPos())
+
+    def keyPressEvent(self, event):
+        popup = self.completer.popup()
+        if popup.isVisible() and event.key() in (Qt.Key_Enter, Qt.Key_Return, Qt.Key_Escape, Qt.Key_Tab, Qt.Key_Backtab):
+            # Let the completer handle these
+            event.ignore()
+            return
+        if event.key() in (Qt.Key_Enter, Qt.Key_Return) and event.modifiers() & Qt.ControlModifier:
+            if event.modifiers() & Qt.ShiftModifier:
+                self.executeSelectionRequested.emit()
+            else:
+                self.executeStatementRequested.emit()
+            return
+
+        super().keyPressEvent(event)
+        self.updateCompletion(event)
+
+    def updateCompletion(self, event):
+        popup = self.completer.popup()
+        if self.schema is None or not event.text():
+            popup.hide()
+            return
+
+        cursor = self.textCursor()
+        line = cursor.block().text()[:cursor.positionInBlock()]
+        qualifier, prefix = self.completionPattern.search(line).groups()
+
+        # "table." completes that table's columns, anything else tables and all column names
+        if qualifier:
+            words = self.schema.column_names(qualifier)
+        elif len(prefix) >= 2:
+            words = self.completionWords
+        else:
+            words = []
+        if not words:
+            popup.hide()
+            return
+
+        if self.completionModel.stringList() != words:
+            self.completionModel.setStringList(words)
+        self.completer.setCompletionPrefix(prefix)
+        if self.completer.completionCount() == 0:
+            popup.hide()
+            return
+
+        popup.setCurrentIndex(self.completer.completionModel().index(0, 0))
+        rect = self.cursorRect()
+        rect.setWidth(popup.sizeHintForColumn(0) + popup.verticalScrollBar().sizeHint().width())
+        self.completer.complete(rect)
+
     def highlightCurrentLine(self):
         extraSelections = []
         if not self.isReadOnly():
@@ -187,11 +305,67 @@ class MainWindow(QMainWindow):
         self.setGeometry(0, 0, 800, 800)
         self.setStyleSheet("background-color: black; color: white;")
 
+        # Every open database has a pool of connections; self.pool is the one shown, self.conn
+        # its read-only GUI connection
+        self.connections = ConnectionManager()
+        self.pool = None
         self.db_path = None
         self.conn = None
-        self.cursor = None
+
+        self.query_worker = None
+        # The pooled connection lent to the running query, and the pool it goes back to
+        self.query_pool = None
+        self.query_conn = None
+        self.query_started = None
+        # Seconds the GUI spent loading the running query's rows into the grid
+        self.query_render = 0.0
+        # (index, sql) of the script statement whose rows arrive next
+        self.statement_sql = None
+        self.query_wall_start = None
+        # History entry the running query is compared against, for "Re-run and Compare"
+        self.query_compare = None
+        # Result cache key of the running query, None if its result must not be cached
+        self.query_cache_key = None
+        self.script_worker = None
+        self.export_worker = None
+        self.import_worker = None
+        self.stats_worker = None
+        self.stats_dialog = None
+        self.diff_worker = None
+        # {table: (ResultCache.version(), TableStats)}, dropped once the database changes
+        self.table_stats = {}
+
+        # The statement behind the rows in the grid and its bindings, re-run by "Export Result..."
+        self.current_sql = None
+        self.current_params = ()
+
+        self.edit_buffer = EditBuffer()
+        self.schema = SchemaCache()
+        # Result sets of read-only statements, reused while the database is unchanged
+        self.result_cache = ResultCache()
+
+        # Connection pragmas chosen per database file; without a usable config directory they
+        # are kept for this session only
+        warnings = []
+        try:
+            self.profiles = ProfileStore()
+        except OSError as e:
+            self.profiles = ProfileStore(persist=False)
+            warnings.append(f"Profiles will not be saved: {str(e)}")
+        self.profile = PRESETS['default']
+
+        # Timings of every query run from the editor. Without a usable history file queries
+        # still run, they are just not recorded.
+        try:
+            self.history = QueryHistory()
+        except (sqlite3.Error, OSError) as e:
+            self.history = None
+            warnings.append(f"Query history is unavailable: {str(e)}")
+        self.history_dialog = None
 
         self.initUI()
+        if warnings:
+            self.statusLabel.setText(" ".join(warnings))
 
     def initUI(self):
         centralWidget = QWidget(self)
@@ -244,10 +418,76 @@ class MainWindow(QMainWindow):
         gen_action.triggered.connect(self.generate_database)
         db_menu.addAction(gen_action)
 
+        # Run a .sql file against the current database
+        script_action = QAction('Run SQL Script...', self)
+        script_action.triggered.connect(self.run_sql_script)
+        db_menu.addAction(script_action)
+
+        # Export the current result straight from a cursor, bypassing the grid
+        export_action = QAction('Export Result...', self)
+        export_action.triggered.connect(self.export_result)
+        db_menu.addAction(export_action)
+
+        # Bulk load a CSV, TSV or JSON Lines file into a new or existing table
+        import_action = QAction('Import Data...', self)
+        import_action.triggered.connect(self.import_data)
+        db_menu.addAction(import_action)
+
+        # Schema and row differences to another file, written out as a script that syncs them
+        compare_action = QAction('Compare With Database...', self)
+        compare_action.triggered.connect(self.compare_database)
+        db_menu.addAction(compare_action)
+
+        # Another file ATTACHed to every connection of the open database, for queries across both
+        attach_action = QAction('Attach Database...', self)
+        attach_action.triggered.connect(lambda: self.attach_database(self.db_path))
+        db_menu.addAction(attach_action)
+
+        # Connection profile presets, remembered per database
+        profile_menu = db_menu.addMenu('Connection Profile')
+        self.profileActions = {}
+        profile_group = QActionGroup(self)
+        for name, preset in PRESETS.items():
+            action = QAction(name, self, checkable=True)
+            action.setToolTip(preset.describe())
+            action.triggered.connect(lambda checked, name=name: self.set_profile(name))
+            profile_group.addAction(action)
+            profile_menu.addAction(action)
+            self.profileActions[name] = action
+        self.profileActions['default'].setChecked(True)
+        profile_menu.addSeparator()
+
+        self.readOnlyAction = QAction('Open Read-Only', self, checkable=True)
+        self.readOnlyAction.triggered.connect(self.set_read_only)
+        profile_menu.addAction(self.readOnlyAction)
+
         # Add a button for "Bank SQL"
         bank_action = QAction('Query Bank', self)
         bank_action.triggered.connect(self.open_bank_sql)
         toolbar.addAction(bank_action)
+
+        # Timings of past queries, sortable to spot regressions
+        history_action = QAction('History', self)
+        history_action.triggered.connect(self.open_history)
+        toolbar.addAction(history_action)
+
+        # Tables are shown as a random sample instead of from the first row
+        self.previewAction = QAction('Preview', self, checkable=True)
+        self.previewAction.setToolTip("Show 1000 rows sampled across each table instead of loading it from the start.")
+        self.previewAction.toggled.connect(self.load_table_data)
+        toolbar.addAction(self.previewAction)
+        toolbar.addSeparator()
+
+        # Pending cell edits are written on "Apply Edits" and dropped on "Discard Edits"
+        self.applyEditsAction = QAction('Apply Edits', self)
+        self.applyEditsAction.setEnabled(False)
+        self.applyEditsAction.triggered.connect(self.apply_edits)
+        toolbar.addAction(self.applyEditsAction)
+
+        self.discardEditsAction = QAction('Discard Edits', self)
+        self.discardEditsAction.setEnabled(False)
+        self.discardEditsAction.triggered.connect(self.discard_edits)
+        toolbar.addAction(self.discardEditsAction)
         toolbar.addSeparator()
 
         # Style the toolbar buttons
@@ -268,12 +508,25 @@ class MainWindow(QMainWindow):
 
         self.tableComboBox = QComboBox()
         self.tableComboBox.setToolTip("Select a table to view its data.")
+        # Editable so the table name completer can be used; typed names are never added as items
+        self.tableComboBox.setEditable(True)
+        self.tableComboBox.setInsertPolicy(QComboBox.NoInsert)
         self.tableComboBox.currentIndexChanged.connect(self.load_table_data)
         toolbar.addWidget(self.tableComboBox)
 
+        # Tables are read in key order, so any key is one index seek away
+        self.gotoKeyInput = QLineEdit()
+        self.gotoKeyInput.setPlaceholderText("Go to rowid...")
+        self.gotoKeyInput.setToolTip("Show the table from the first row whose key is at least this value.")
+        self.gotoKeyInput.setMaximumWidth(140)
+        self.gotoKeyInput.returnPressed.connect(self.go_to_key)
+        toolbar.addWidget(self.gotoKeyInput)
+
         self.queryInput = CodeEditor()
         self.queryInput.setPlaceholderText("Enter SQL query here...")
         self.queryInput.setStyleSheet("background-color: #000; color: limegreen;")
+        self.queryInput.executeStatementRequested.connect(self.execute_current_statement)
+        self.queryInput.executeSelectionRequested.connect(self.execute_selection)
         layout.addWidget(self.queryInput, stretch=1)
 
         # Execute Query Button
@@ -288,7 +541,84 @@ class MainWindow(QMainWindow):
             }
         """)
         executeButton.clicked.connect(self.execute_query)
-        layout.addWidget(executeButton)
+
+        # Cancel Query Button
+        self.cancelButton = QPushButton("Cancel")
+        self.cancelButton.setStyleSheet("""
+            QPushButton {
+                padding: 5px;
+                border: 1px solid grey;
+            }
+            QPushButton:hover {
+                background-color: #333;
+            }
+        """)
+        self.cancelButton.setEnabled(False)
+        self.cancelButton.clicked.connect(self.cancel_query)
+
+        # Elapsed time of the running query
+        self.elapsedLabel = QLabel()
+        self.elapsedTimer = QTimer(self)
+        self.elapsedTimer.setInterval(100)
+        self.elapsedTimer.timeout.connect(self.update_elapsed)
+
+        # Explain Query Button
+        explainButton = QPushButton("Explain")
+        explainButton.setStyleSheet("""
+            QPushButton {
+                padding: 5px;
+                border: 1px solid grey;
+            }
+            QPushButton:hover {
+                background-color: #333;
+            }
+        """)
+        explainButton.setToolTip("Show the query plan, flag full scans and suggest indexes.")
+        explainButton.clicked.connect(self.explain_query)
+
+        # Run only the statement under the cursor, or only the selected text
+        statementButton = QPushButton("Execute Statement")
+        statementButton.setToolTip("Execute the statement under the cursor (Ctrl+Enter).")
+        statementButton.clicked.connect(self.execute_current_statement)
+        selectionButton = QPushButton("Execute Selection")
+        selectionButton.setToolTip("Execute the selected text (Ctrl+Shift+Enter).")
+        selectionButton.clicked.connect(self.execute_selection)
+        for button in (statementButton, selectionButton):
+            button.setStyleSheet("""
+                QPushButton {
+                    padding: 5px;
+                    border: 1px solid grey;
+                }
+                QPushButton:hover {
+                    background-color: #333;
+                }
+            """)
+
+        queryButtons = QHBoxLayout()
+        queryButtons.addWidget(executeButton, stretch=1)
+        queryButtons.addWidget(statementButton)
+        queryButtons.addWidget(selectionButton)
+        queryButtons.addWidget(explainButton)
+        queryButtons.addWidget(self.cancelButton)
+        queryButtons.addWidget(self.elapsedLabel)
+
+        # With more than one statement in the editor: run them all in one transaction or autocommit each
+        self.singleTransactionCheck = QCheckBox("Single transaction")
+        self.singleTransactionCheck.setToolTip("Run multi-statement scripts in one transaction, "
+                                               "rolled back as a whole if a statement fails.")
+        queryButtons.addWidget(self.singleTransactionCheck)
+        layout.addLayout(queryButtons)
+
+        # Values for ?, ?NNN, :name, @name and $name placeholders, shown when a statement has any
+        self.paramTable = QTableWidget(0, 2)
+        self.paramTable.setHorizontalHeaderLabels(["Parameter", "Value"])
+        self.paramTable.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.paramTable.verticalHeader().hide()
+        self.paramTable.setMaximumHeight(130)
+        self.paramTable.setToolTip("Values bind as NULL, integers, reals, 'quoted text' or plain text.")
+        self.paramTable.setStyleSheet("background-color: #111; color: white; font-family: Courier;")
+        self.paramTable.hide()
+        layout.addWidget(self.paramTable)
 
         # Database Header Information Button
         self.headerInfoButton = QPushButton("Table Header Info")
@@ -304,35 +634,78 @@ class MainWindow(QMainWindow):
         self.headerInfoButton.setToolTip("Click this button to see database header information.")
         self.headerInfoButton.setCheckable(True)
         self.headerInfoButton.toggled.connect(self.toggle_header_info)
-        layout.addWidget(self.headerInfoButton)
+
+        # Row count, column statistics and page usage, computed on a worker
+        self.statsButton = QPushButton("Table Statistics")
+        self.statsButton.setStyleSheet(self.headerInfoButton.styleSheet())
+        self.statsButton.setToolTip("Estimate row count, nulls, distinct values and storage for the selected table.")
+        self.statsButton.clicked.connect(self.show_table_stats)
+        tableButtons = QHBoxLayout()
+        tableButtons.addWidget(self.headerInfoButton)
+        tableButtons.addWidget(self.statsButton)
+        layout.addLayout(tableButtons)
 
         # Table Display (Two-Thirds)
-        self.resultTable = QTableWidget()
+        self.resultTable = ResultTableView()
         self.resultTable.setStyleSheet("background-color: #111; color: white; font-family: Courier;")  # Example styling
         self.resultTable.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed)
-        layout.addWidget(self.resultTable, stretch=4)
+
+        # The first tab is the editable grid; a multi-statement script adds one tab per result set
+        self.resultTabs = QTabWidget()
+        self.resultTabs.addTab(self.resultTable, "Result")
+        layout.addWidget(self.resultTabs, stretch=4)
 
         # Status Label
         self.statusLabel = QLabel()
         layout.addWidget(self.statusLabel)
 
+        # Active connection profile, shown in the status bar
+        self.profileLabel = QLabel()
+        self.statusBar().addPermanentWidget(self.profileLabel)
+        self.show_profile()
+
         centralWidget.setLayout(layout)
 
+        # Open databases and what is attached to them; the bold one is the one shown
+        self.connectionPanel = ConnectionPanel(self)
+        self.connectionPanel.activateRequested.connect(self.switch_database)
+        self.connectionPanel.openRequested.connect(self.load_database)
+        self.connectionPanel.attachRequested.connect(self.attach_database)
+        self.connectionPanel.detachRequested.connect(self.detach_database)
+        self.connectionPanel.closeRequested.connect(self.close_database)
+        self.connectionPanel.nameActivated.connect(self.queryInput.insertPlainText)
+        self.addDockWidget(Qt.LeftDockWidgetArea, self.connectionPanel)
+        db_menu.addAction(self.connectionPanel.toggleViewAction())
+
     @pyqtSlot()
     def load_database(self):
         options = QFileDialog.Options()
         fileName, _ = QFileDialog.getOpenFileName(self, "Load Database File", "", "SQLite Database Files (*.db);;All Files (*)", options=options)
-        if fileName:
+        if fileName and self.confirm_pending_edits():
             self.connect_to_database(fileName)
             self.load_tables()
 
     def connect_to_database(self, db_path):
+        # Shows `db_path`, opening it if it is not open yet. Databases shown before stay open.
         try:
-            if self.conn:
-                self.conn.close()
-            self.conn = sqlite3.connect(db_path)
-            self.cursor = self.conn.cursor()
+            # The grid's cursor may belong to a connection about to be closed
+            model = self.resultTable.model()
+            if model is not None:
+                model.release()
+            # Its rows would otherwise land in the grid of another database
+            self.stop_query()
+
+            profile = self.profiles.get(db_path)
+            # An open file gets its pool back, reopened only if the profile changed
+            self.pool = self.connections.open(db_path, profile)
+            self.conn = self.pool.conn
             self.db_path = db_path
+            self.profile = profile
+            self.schema.clear()
+            # Cached results and statistics are of the database shown before
+            self.result_cache.invalidate()
+            self.table_stats.clear()
+            self.show_profile()
 
             # Update UI
             self.setWindowTitle(f'SQL Editor - {db_path}')
@@ -341,84 +714,794 @@ class MainWindow(QMainWindow):
             self.statusLabel.setText(f"Connected to database: {os.path.basename(db_path)}")
 
         except Exception as e:
+            if self.pool is not None and self.pool.closed:
+                self.clear_connection()
             QMessageBox.critical(self, "Error", f"Failed to connect to database: {str(e)}")
+        self.refresh_connections()
+
+    def clear_connection(self):
+        # Nothing is shown once the last database is closed
+        self.stop_query()
+        self.pool = None
+        self.conn = None
+        self.db_path = None
+        self.profile = PRESETS['default']
+        self.current_sql = None
+        self.current_params = ()
+        self.schema.clear()
+        self.result_cache.invalidate()
+        self.table_stats.clear()
+        self.resultTable.setModel(None)
+        self.tableComboBox.clear()
+        self.show_profile()
+        self.setWindowTitle('ZenSQL - Editor')
+
+    def refresh_connections(self):
+        self.connectionPanel.refresh(self.connections, self.db_path)
+
+    def switch_database(self, db_path):
+        if self.pool is not None and self.pool.db_path == os.path.abspath(db_path):
+            return
+        if self.confirm_pending_edits():
+            self.connect_to_database(db_path)
+            self.load_tables()
+
+    def close_database(self, db_path):
+        pool = self.connections.get(db_path)
+        if pool is None:
+            return
+        shown = pool is self.pool
+        if shown:
+            if not self.confirm_pending_edits():
+                return
+            self.stop_query()
+        if pool.busy():
+            self.statusLabel.setText(f"{os.path.basename(db_path)} is in use by a running task, "
+                                     f"close it once that finishes.")
+            return
+        if shown:
+            model = self.resultTable.model()
+            if model is not None:
+                model.release()
+        self.connections.close(db_path)
+
+        if shown:
+            remaining = next(iter(self.connections), None)
+            if remaining is not None:
+                self.connect_to_database(remaining.db_path)
+                self.load_tables()
+            else:
+                self.clear_connection()
+        self.refresh_connections()
+        self.statusLabel.setText(f"Closed {os.path.basename(db_path)}.")
+
+    def attach_database(self, db_path):
+        if not db_path or self.connections.get(db_path) is None:
+            self.statusLabel.setText("Load a database to attach another one to.")
+            return
+        options = QFileDialog.Options()
+        fileName, _ = QFileDialog.getOpenFileName(self, f"Attach to {os.path.basename(db_path)}", "",
+                                                  "SQLite Database Files (*.db);;All Files (*)", options=options)
+        if not fileName:
+            return
+        default = re.sub(r'\W', '_', os.path.splitext(os.path.basename(fileName))[0])
+        if not default or default[0].isdigit():
+            default = 'db_' + default
+        alias, ok = QInputDialog.getText(self, "Attach Database", "Name to query its tables by, as name.table:",
+                                         text=default)
+        if ok:
+            self.attach_file(db_path, fileName, alias)
+
+    def attach_file(self, db_path, path, alias):
+        pool = self.connections.get(db_path)
+        if pool is None:
+            self.statusLabel.setText("No database loaded.")
+            return
+        if not os.path.isfile(path):
+            self.statusLabel.setText(f"Cannot attach {path}: no such file.")
+            return
+        if pool is self.pool:
+            # An open statement on the GUI connection keeps it from attaching
+            model = self.resultTable.model()
+            if model is not None:
+                model.release()
+        try:
+            pool.attach(path, alias)
+        except (ValueError, sqlite3.Error) as e:
+            self.statusLabel.setText(f"Attach failed: {str(e)}")
+            QMessageBox.warning(self, "Attach Error", f"Attach failed: {str(e)}")
+            return
+        self.refresh_connections()
+        self.statusLabel.setText(f"Attached {os.path.basename(path)} to {os.path.basename(db_path)}, "
+                                 f"its tables are {alias.strip()}.<table> in queries.")
+
+    def detach_database(self, db_path, alias):
+        pool = self.connections.get(db_path)
+        if pool is None:
+            return
+        if pool is self.pool:
+            model = self.resultTable.model()
+            if model is not None:
+                model.release()
+        try:
+            pool.detach(alias)
+        except (ValueError, sqlite3.Error) as e:
+            self.statusLabel.setText(f"Detach failed: {str(e)}")
+            return
+        self.refresh_connections()
+        self.statusLabel.setText(f"Detached {alias} from {os.path.basename(db_path)}.")
+
+    def set_profile(self, name):
+        self.change_profile(PRESETS[name].copy(read_only=self.profile.read_only))
+
+    def set_read_only(self, checked):
+        self.change_profile(self.profile.copy(read_only=checked))
+
+    def change_profile(self, profile):
+        if not self.db_path:
+            self.show_profile()
+            self.statusLabel.setText("Load a database before choosing its connection profile.")
+            return
+        if not self.confirm_pending_edits():
+            self.show_profile()
+            return
+
+        # The profile is stored for this file and applied by reconnecting
+        try:
+            self.profiles.set(self.db_path, profile)
+            saved = None
+        except OSError as e:
+            saved = f"The profile applies to this session only: {str(e)}"
+        self.connect_to_database(self.db_path)
+        self.load_tables()
+        if saved is not None:
+            self.statusLabel.setText(saved)
+
+    def show_profile(self):
+        action = self.profileActions.get(self.profile.name)
+        if action is not None:
+            action.setChecked(True)
+        self.readOnlyAction.setChecked(self.profile.read_only)
+        self.profileLabel.setText(f"Profile: {self.profile.describe()}")
 
     def load_tables(self):
         if not self.conn:
             return
 
         try:
-            self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = self.cursor.fetchall()
+            self.schema.refresh(self.conn)
 
             self.tableComboBox.clear()
-            table_names = [table[0] for table in tables]
-            for table_name in table_names:
-                self.tableComboBox.addItem(table_name)
+            self.tableComboBox.addItems(self.schema.tables)
+            self.update_completers()
 
-            completer = QCompleter(table_names)
-            self.tableComboBox.setCompleter(completer)
-            
             self.statusLabel.setText("Tables loaded successfully.")
         except Exception as e:
             self.statusLabel.setText(f"Failed to load tables: {str(e)}")
 
+    def refresh_schema(self):
+        # Cheap when nothing changed: only PRAGMA schema_version is read
+        if not self.conn or not self.schema.refresh(self.conn):
+            return
+
+        current = self.tableComboBox.currentText()
+        self.tableComboBox.blockSignals(True)
+        self.tableComboBox.clear()
+        self.tableComboBox.addItems(self.schema.tables)
+        index = self.tableComboBox.findText(current)
+        self.tableComboBox.setCurrentIndex(max(index, 0))
+        self.tableComboBox.blockSignals(False)
+        self.update_completers()
+
+    def update_completers(self):
+        completer = QCompleter(self.schema.tables)
+        self.tableComboBox.setCompleter(completer)
+        self.queryInput.setSchema(self.schema)
+
     def load_table_data(self):
         table_name = self.tableComboBox.currentText()
         if not table_name:
             return
 
+        if self.previewAction.isChecked():
+            self.load_table_preview(table_name)
+            return
+        self.browse_table(table_name)
+
+    def go_to_key(self):
+        table_name = self.tableComboBox.currentText()
+        text = self.gotoKeyInput.text().strip()
+        if not self.conn or not table_name:
+            return
+        if not text:
+            self.load_table_data()
+            return
+        self.browse_table(table_name, parse_value(text))
+
+    def browse_table(self, table_name, start=None):
+        # Rows are read a page at a time in key order, each page seeking past the last key read,
+        # with the key selected alongside so edits can be written back to the right row.
+        # Views have no key: they are read through one cursor and shown read-only.
         try:
-            self.cursor.execute(f"SELECT * FROM {table_name}")
-            data = self.cursor.fetchall()
-            self.populate_table(table_name, data)
+            found = table_key(self.conn, table_name)
+            if found is None:
+                if start is not None:
+                    self.statusLabel.setText(f"{table_name} has no key to go to.")
+                    return
+                sql = f"SELECT * FROM {_quote(table_name)}"
+                key = self.result_cache.key(self.conn, sql)
+                cached = self.result_cache.take(key)
+                if cached is not None:
+                    headers, store, complete = cached
+                    cursor = None
+                    if not complete:
+                        cursor = self.conn.execute(f"{sql} LIMIT -1 OFFSET ?", (store.row_count,))
+                    self.populate_table(table_name, headers, cursor=cursor, store=store, cache_key=key, fetch=False)
+                else:
+                    cursor = self.conn.cursor()
+                    cursor.execute(sql)
+                    headers = [description[0] for description in cursor.description]
+                    self.populate_table(table_name, headers, cursor=cursor, cache_key=key)
+                self.gotoKeyInput.setEnabled(False)
+                self.current_sql = sql
+                self.current_params = ()
+                return
+
+            key_names, hidden = found
+            pager = KeysetPager(self.conn, table_name, key_names, hidden, start=start)
+            headers = pager.headers[1 if hidden else 0:]
+            row_key = (key_names, pager.key_indexes)
+            key = self.result_cache.key(self.conn, *pager.first)
+            cached = self.result_cache.take(key)
+            if cached is not None:
+                # Unchanged since it was last shown: reuse the rows already loaded, and continue
+                # after the last of them if the table was not read to the end
+                _, store, complete = cached
+                pager = None
+                if not complete and store.row_count:
+                    last = tuple(store.value(store.row_count - 1, index) for index in row_key[1])
+                    pager = KeysetPager(self.conn, table_name, key_names, hidden, after=last)
+                self.populate_table(table_name, headers, cursor=pager, store=store, cache_key=key, fetch=False,
+                                    hidden=1 if hidden else 0, row_key=row_key)
+            else:
+                self.populate_table(table_name, headers, cursor=pager, cache_key=key,
+                                    hidden=1 if hidden else 0, row_key=row_key)
+            self.gotoKeyInput.setEnabled(True)
+            self.gotoKeyInput.setPlaceholderText(f"Go to {key_names[0]}...")
+            self.current_sql = f"SELECT * FROM {_quote(table_name)}"
+            self.current_params = ()
         except Exception as e:
             self.statusLabel.setText(f"Failed to load table data: {str(e)}")
 
-    def execute_query(self):
-        query = self.queryInput.toPlainText().strip()
+    def load_table_preview(self, table_name):
+        # A few hundred random rowid seeks instead of a scan, so it takes as long on a table of a
+        # billion rows as on a small one
+        try:
+            started = time.perf_counter()
+            found = table_key(self.conn, table_name)
+            hidden = found is not None and found[1] == 'rowid'
+            headers, rows = sample_rows(self.conn, table_name, keep_rowid=hidden)
+            row_key = None
+            if hidden:
+                headers, row_key = headers[1:], (found[0], [0])
+            elif found is not None and found[1] is None:
+                row_key = (found[0], [headers.index(name) for name in found[0]])
+            self.populate_table(table_name, headers, rows, hidden=1 if hidden else 0, row_key=row_key)
+            total = len(rows)
+            if len(rows) >= 1000 and has_rowid(self.conn, table_name):
+                total = self.conn.execute(f"SELECT max(rowid) FROM {_quote(table_name)}").fetchone()[0]
+            self.current_sql = f"SELECT * FROM {_quote(table_name)}"
+            self.current_params = ()
+            self.statusLabel.setText(f"Preview: {len(rows)} rows sampled from ~{total or 0:,} "
+                                     f"in {(time.perf_counter() - started) * 1000:.0f} ms.")
+        except Exception as e:
+            self.statusLabel.setText(f"Failed to load table preview: {str(e)}")
+
+    def show_table_stats(self):
+        table_name = self.tableComboBox.currentText()
+        if not self.conn or not table_name:
+            self.statusLabel.setText("No table selected.")
+            return
+
+        if self.stats_dialog is not None:
+            self.stats_dialog.close()
+        self.stats_dialog = StatsDialog(table_name, self)
+        self.stats_dialog.refreshRequested.connect(lambda: self.compute_table_stats(table_name))
+        self.stats_dialog.finished.connect(self.stats_closed)
+        self.stats_dialog.show()
 
+        # Kept while the database is unchanged, as they take a walk over the table's pages
         try:
-            self.cursor.execute(query)
-            if query.strip().upper().startswith("SELECT"):
-                data = self.cursor.fetchall()
-                if data:
-                    self.populate_table("Query Result", data)
-                self.statusLabel.setText(f"Query executed successfully. {len(data)} rows returned.")
+            version = self.result_cache.version(self.conn)
+        except sqlite3.Error as e:
+            self.stats_dialog.show_error(str(e))
+            return
+        cached = self.table_stats.get(table_name)
+        if cached is not None and cached[0] == version:
+            self.stats_dialog.show_stats(cached[1], cached=True)
+        else:
+            self.compute_table_stats(table_name)
+
+    def compute_table_stats(self, table_name):
+        if self.stats_worker is not None:
+            self.stats_worker.cancel()
+        self.stats_dialog.show_computing()
+        try:
+            version = self.result_cache.version(self.conn)
+            conn = self.pool.acquire_reader()
+        except (PoolBusy, sqlite3.Error) as e:
+            self.stats_dialog.show_error(str(e))
+            return
+        pool = self.pool
+        worker = StatsWorker(self.db_path, table_name, profile=self.profile, conn=conn)
+        worker.finished.connect(lambda: pool.release(conn))
+        worker.statsReady.connect(lambda stats: self.stats_ready(worker, version, stats))
+        worker.error.connect(lambda message: self.stats_failed(worker, message))
+        worker.finished.connect(lambda: self.stats_worker_done(worker))
+        self.stats_worker = worker
+        worker.start()
+
+    def stats_ready(self, worker, version, stats):
+        self.table_stats[stats.table] = (version, stats)
+        if worker is self.stats_worker and self.stats_dialog is not None:
+            self.stats_dialog.show_stats(stats)
+
+    def stats_failed(self, worker, message):
+        if worker is self.stats_worker and self.stats_dialog is not None:
+            self.stats_dialog.show_error(message)
+
+    def stats_worker_done(self, worker):
+        if worker is self.stats_worker:
+            self.stats_worker = None
+        worker.deleteLater()
+
+    def stats_closed(self):
+        if self.stats_worker is not None:
+            self.stats_worker.cancel()
+        self.stats_dialog.deleteLater()
+        self.stats_dialog = None
+
+    def execute_query(self):
+        self.execute_text(self.queryInput.toPlainText())
+
+    def execute_current_statement(self):
+        statement = self.queryInput.currentStatement()
+        if not statement:
+            self.statusLabel.setText("No statement under the cursor.")
+            return
+        self.execute_text(statement)
+
+    def execute_selection(self):
+        selection = self.queryInput.selectedSql()
+        if not selection.strip():
+            self.statusLabel.setText("Nothing selected.")
+            return
+        self.execute_text(selection)
+
+    def execute_text(self, text, compare_to=None):
+        # More than one statement runs in script mode, with each result set in its own tab
+        statements = [(sql, line) for sql, line, _ in iter_statements(text.splitlines(True))]
+        values = self.parameter_values([sql for sql, _ in statements])
+        if values is None:
+            return
+        if len(statements) > 1:
+            statements = [(sql, line, bind_parameters(find_parameters(sql), values)) for sql, line in statements]
+            self.execute_script(text.strip(), statements, compare_to)
+        else:
+            params = bind_parameters(find_parameters(text), values)
+            self.execute_sql(text.strip(), params, compare_to)
+
+    def parameter_values(self, statements):
+        # {placeholder: value} from the binding panel for every placeholder in the statements,
+        # or None if some have no value yet. Bare "?" are numbered per statement.
+        names = []
+        for sql in statements:
+            names.extend(name for name in find_parameters(sql) if name not in names)
+        if not names:
+            self.paramTable.hide()
+            return {}
+
+        entered = {}
+        for row in range(self.paramTable.rowCount()):
+            item = self.paramTable.item(row, 1)
+            if item is not None and item.text():
+                entered[self.paramTable.item(row, 0).text()] = item.text()
+
+        # Rebuilt for these placeholders, keeping what was typed for the same names before
+        self.paramTable.setRowCount(len(names))
+        for row, name in enumerate(names):
+            nameItem = QTableWidgetItem(name)
+            nameItem.setFlags(Qt.ItemIsEnabled)
+            self.paramTable.setItem(row, 0, nameItem)
+            self.paramTable.setItem(row, 1, QTableWidgetItem(entered.get(name, "")))
+        self.paramTable.show()
+
+        missing = [name for name in names if name not in entered]
+        if missing:
+            self.statusLabel.setText(f"Enter values for {', '.join(missing)}, then execute again.")
+            self.paramTable.setCurrentCell(names.index(missing[0]), 1)
+            self.paramTable.setFocus()
+            return None
+        return {name: parse_value(entered[name]) for name in names}
+
+    def query_connection(self, statements):
+        # Statements that only read run on one of the pool's readers, so a long SELECT never
+        # holds up edits; anything that may write takes the writer. Pooled connections stay
+        # open, so running the same SQL text again, with the same or other bindings, reuses
+        # its prepared statement from the connection's statement cache.
+        if all(is_read_only(sql) for sql in statements):
+            conn = self.pool.acquire_reader()
+        else:
+            conn = self.pool.acquire_writer()
+        self.query_pool, self.query_conn = self.pool, conn
+        return conn
+
+    def release_query_connection(self):
+        if self.query_conn is not None:
+            self.query_pool.release(self.query_conn)
+            self.query_pool = self.query_conn = None
+
+    def stop_query(self):
+        # Cancels the running query and gives its connection back right away
+        if self.query_worker is not None:
+            self.query_worker.cancel()
+            self.query_worker.wait()
+        self.release_query_connection()
+
+    def can_start_query(self, query):
+        if not query:
+            return False
+        if not self.conn:
+            self.statusLabel.setText("No database loaded.")
+            return False
+        if self.query_worker is not None:
+            self.statusLabel.setText("A query is already running.")
+            return False
+        return True
+
+    def execute_sql(self, query, params=(), compare_to=None):
+        if not self.can_start_query(query):
+            return
+
+        # Attached to every connection of the pool, not only the one the statement would run on
+        attach = parse_attach(query)
+        if attach is not None:
+            if attach[0] == 'attach':
+                self.attach_file(self.db_path, *attach[1:])
             else:
-                self.conn.commit()
-                self.statusLabel.setText("Query executed successfully.")
+                self.detach_database(self.db_path, attach[1])
+            return
+
+        try:
+            key = self.result_cache.key(self.conn, query, params)
+        except sqlite3.Error:
+            key = None
+        model = self.resultTable.model()
+        if compare_to is None and key is not None and model is not None and model.cache_key == key \
+                and model.complete and not model.original_values:
+            self.statusLabel.setText(f"{model.rowCount()} rows, unchanged since the query last ran.")
+            return
+        cached = self.result_cache.get(key)
+        if cached is not None and cached[2] and compare_to is None:
+            headers, store, _ = self.result_cache.take(key)
+            self.populate_query_result(query, headers, store=store, cache_key=key)
+            self.current_sql = query
+            self.current_params = params
+            self.statusLabel.setText(f"{store.row_count} rows from the result cache, the database is unchanged.")
+            return
+        self.query_cache_key = key
+
+        try:
+            conn = self.query_connection([query])
         except Exception as e:
             self.statusLabel.setText(f"Query execution failed: {str(e)}")
-            QMessageBox.warning(self, "Query Error", f"Query execution failed: {str(e)}")
+            return
+        self.query_worker = QueryWorker(self.db_path, query, params, profile=self.profile, conn=conn)
+        self.query_worker.columnsReady.connect(self.show_query_columns)
+        self.query_worker.batchReady.connect(self.show_query_batch)
+        self.query_worker.queryFinished.connect(self.query_finished)
+        self.start_query_worker(compare_to)
+
+    def execute_script(self, query, statements, compare_to=None):
+        if not self.can_start_query(query):
+            return
 
-    def populate_table(self, table_name, data):
-        # Clear existing table contents
-        self.resultTable.clear()
-        self.resultTable.setRowCount(0)
-        self.resultTable.setColumnCount(0)
+        try:
+            conn = self.query_connection([sql for sql, _, _ in statements])
+        except Exception as e:
+            self.statusLabel.setText(f"Query execution failed: {str(e)}")
+            return
+        self.query_worker = QueryWorker(self.db_path, query, profile=self.profile, statements=statements,
+                                        single_transaction=self.singleTransactionCheck.isChecked(), conn=conn)
+        self.query_worker.statementStarted.connect(self.show_statement)
+        self.query_worker.columnsReady.connect(self.show_statement_columns)
+        self.query_worker.batchReady.connect(self.show_statement_batch)
+        self.query_worker.queryFinished.connect(self.script_query_finished)
+        self.start_query_worker(compare_to)
+
+    def start_query_worker(self, compare_to=None):
+        # Close the grid's open cursor so its read lock cannot block a write from the worker
+        model = self.resultTable.model()
+        if model is not None:
+            model.release()
+        self.clear_statement_tabs()
+
+        self.query_worker.cancelled.connect(self.query_cancelled)
+        self.query_worker.error.connect(self.query_failed)
+        self.query_worker.finished.connect(self.query_worker_done)
+
+        self.query_started = time.perf_counter()
+        self.query_wall_start = time.time()
+        self.query_render = 0.0
+        self.query_compare = compare_to
+        self.cancelButton.setEnabled(True)
+        self.elapsedTimer.start()
+        self.update_elapsed()
+        self.statusLabel.setText("Query running...")
+        self.query_worker.start()
+
+    def explain_query(self):
+        # The statement "Execute Statement" or "Execute Selection" would run, with its bindings
+        query = self.queryInput.selectedSql().strip() or self.queryInput.currentStatement()
+        if not query:
+            self.statusLabel.setText("No statement under the cursor.")
+            return
+        if not self.conn:
+            self.statusLabel.setText("No database loaded.")
+            return
+        statements = [sql for sql, _, _ in iter_statements(query.splitlines(True))]
+        if len(statements) != 1:
+            self.statusLabel.setText("Select a single statement to explain.")
+            return
+        query = statements[0].strip()
+        values = self.parameter_values([query])
+        if values is None:
+            return
+        params = bind_parameters(find_parameters(query), values)
+
+        # Creating a suggested index needs a write lock the grid's open cursor would block
+        model = self.resultTable.model()
+        if model is not None:
+            model.release()
+
+        try:
+            self.refresh_schema()
+            dialog = PlanDialog(query, self.pool, self.schema, self, params=params)
+        except Exception as e:
+            self.statusLabel.setText(f"Explain failed: {str(e)}")
+            QMessageBox.warning(self, "Explain Error", f"Explain failed: {str(e)}")
+            return
+        dialog.schemaChanged.connect(self.refresh_schema)
+        dialog.exec_()
+
+    def cancel_query(self):
+        if self.query_worker is not None:
+            self.query_worker.cancel()
+            self.statusLabel.setText("Cancelling query...")
+
+    def update_elapsed(self):
+        if self.query_started is not None:
+            self.elapsedLabel.setText(f"{time.perf_counter() - self.query_started:.1f} s")
+
+    def clear_statement_tabs(self):
+        while self.resultTabs.count() > 1:
+            view = self.resultTabs.widget(1)
+            self.resultTabs.removeTab(1)
+            view.deleteLater()
+        self.statement_sql = None
+
+    def show_statement(self, index, sql):
+        # Remembered until the statement's columns arrive; statements without rows get no tab
+        self.statement_sql = (index, sql)
+
+    def show_statement_columns(self, headers):
+        start = time.perf_counter()
+        index, sql = self.statement_sql
+        view = ResultTableView()
+        view.setStyleSheet("background-color: #111; color: white; font-family: Courier;")
+        model = ResultTableModel(headers, view)
+        # Script results are not tied to a table the edits could be written to
+        model.editable = False
+        model.complete = True
+        view.setModel(model)
+        label = " ".join(strip_leading_comments(sql).rstrip(';').split())
+        tab = self.resultTabs.addTab(view, f"{index + 1}: {label[:30]}")
+        self.resultTabs.setTabToolTip(tab, sql)
+        if self.resultTabs.count() == 2:
+            self.resultTabs.setCurrentIndex(tab)
+        self.query_render += time.perf_counter() - start
+
+    def show_statement_batch(self, rows):
+        # Rows go to the tab of the statement that produced them, the last one added
+        start = time.perf_counter()
+        self.resultTabs.widget(self.resultTabs.count() - 1).model().append_rows(rows)
+        self.query_render += time.perf_counter() - start
+
+    def script_query_finished(self, summary):
+        # A script may write anything
+        self.result_cache.invalidate()
+        self.refresh_schema()
+
+        message = (f"Script executed successfully: {summary['statements']} statements, {summary['results']} "
+                   f"result sets with {summary['rows']} rows in {summary['elapsed']:.3f} s.")
+        self.statusLabel.setText(self.record_finished(summary, message))
+
+    def show_query_columns(self, headers):
+        start = time.perf_counter()
+        self.populate_query_result(self.query_worker.query, headers)
+        self.current_sql = self.query_worker.query
+        self.current_params = self.query_worker.params
+        self.query_render += time.perf_counter() - start
+
+    def show_query_batch(self, rows):
+        start = time.perf_counter()
+        model = self.resultTable.model()
+        model.append_rows(rows)
+        self.show_rows_loaded(model.rowCount(), True)
+        self.query_render += time.perf_counter() - start
+
+    def query_finished(self, summary):
+        # Paint the visible cells now so the render time includes formatting and drawing them,
+        # not only loading the rows into the model
+        start = time.perf_counter()
+        self.resultTable.viewport().repaint()
+        self.query_render += time.perf_counter() - start
+
+        # The query may have created, altered or dropped something
+        self.refresh_schema()
+
+        if summary["columns"] is None or summary["writes"]:
+            self.result_cache.invalidate()
+        else:
+            # The grid now holds the whole result; it goes to the cache when it is replaced
+            self.resultTable.model().cache_key = self.query_cache_key
+
+        elapsed = summary["elapsed"]
+        timings = (f"execute {summary['execute'] * 1000:.1f} ms, fetch {summary['fetch'] * 1000:.1f} ms, "
+                   f"render {self.query_render * 1000:.1f} ms")
+        if summary["columns"] is not None:
+            message = f"Query executed successfully. {summary['rows']} rows returned in {elapsed:.3f} s ({timings})."
+        else:
+            message = f"Query executed successfully in {elapsed:.3f} s ({timings})."
+        self.statusLabel.setText(self.record_finished(summary, message))
+
+    def record_finished(self, summary, message):
+        # Records a successful run; returns the status message, or the comparison on a re-run
+        entry_id = self.record_history("ok", summary)
+        if self.query_compare is not None and entry_id is not None:
+            message = "Re-run: " + compare(self.history.get(self.query_compare), self.history.get(entry_id))
+            if self.history_dialog is not None:
+                self.history_dialog.show_comparison(message)
+        return message
+
+    def query_cancelled(self):
+        self.script_stopped()
+        elapsed = time.perf_counter() - self.query_started
+        self.record_history("cancelled", {"elapsed": elapsed})
+        self.statusLabel.setText(f"Query cancelled after {elapsed:.1f} s.")
+
+    def query_failed(self, message):
+        self.script_stopped()
+        self.record_history("error", {"elapsed": time.perf_counter() - self.query_started})
+        self.statusLabel.setText(f"Query execution failed: {message}")
+        QMessageBox.warning(self, "Query Error", f"Query execution failed: {message}")
+
+    def script_stopped(self):
+        # Statements before the one that failed or was cancelled may have committed
+        if self.query_worker.statements is not None:
+            self.result_cache.invalidate()
+            self.refresh_schema()
+
+    def record_history(self, status, summary):
+        # History is a convenience; failing to write it must not fail the query
+        if self.history is None:
+            return None
+        try:
+            return self.history.record(self.db_path, self.query_worker.query, status, summary,
+                                       render=self.query_render, started=self.query_wall_start)
+        except sqlite3.Error as e:
+            self.statusLabel.setText(f"Could not record query history: {str(e)}")
+            return None
+
+    def open_history(self):
+        if self.history is None:
+            self.statusLabel.setText("Query history is unavailable, its file could not be opened.")
+            return
+        if self.history_dialog is None:
+            self.history_dialog = HistoryDialog(self.history, self.db_path, self)
+            self.history_dialog.rerunRequested.connect(self.rerun_history)
+            self.history_dialog.loadRequested.connect(self.queryInput.setPlainText)
+            self.history_dialog.finished.connect(self.history_closed)
+        else:
+            self.history_dialog.db_path = self.db_path
+            self.history_dialog.refresh()
+        self.history_dialog.show()
+        self.history_dialog.raise_()
+
+    def history_closed(self):
+        self.history_dialog.deleteLater()
+        self.history_dialog = None
+
+    def rerun_history(self, entry_id):
+        entry = self.history.get(entry_id)
+        if entry is None:
+            return
+        if not self.db_path or entry.db_path != os.path.abspath(self.db_path):
+            self.history_dialog.show_comparison("That query was run against another database.")
+            return
+        self.execute_text(entry.sql, compare_to=entry_id)
+
+    def query_worker_done(self):
+        self.elapsedTimer.stop()
+        self.update_elapsed()
+        self.cancelButton.setEnabled(False)
+        self.release_query_connection()
+        self.query_worker.deleteLater()
+        self.query_worker = None
+        self.query_started = None
+        self.query_cache_key = None
+
+    def populate_query_result(self, query, headers, store=None, cache_key=None):
+        # Editable only if every row can be traced back to a row of one table by its key
+        try:
+            self.refresh_schema()
+            found = result_key(self.conn, query, headers, self.schema.find)
+        except sqlite3.Error:
+            found = None
+        if found is None:
+            self.populate_table("Query Result", headers, store=store, cache_key=cache_key)
+        else:
+            table_name, key_names, key_columns, column_names = found
+            self.populate_table(table_name, headers, store=store, cache_key=cache_key,
+                                row_key=(key_names, key_columns, column_names))
 
+    def populate_table(self, table_name, headers, data=(), cursor=None, store=None, cache_key=None, fetch=True,
+                       hidden=0, row_key=None):
         # Set table name as objectName for later use
         self.resultTable.setObjectName(table_name)
 
-        # Populate table with data
-        self.resultTable.setRowCount(len(data))
-        self.resultTable.setColumnCount(len(data[0]))
-
-        # Set headers
-        headers = [description[0] for description in self.cursor.description]
-        self.resultTable.setHorizontalHeaderLabels(headers)
+        # The model keeps the rows column by column and only formats the cells being painted.
+        # `row_key` is (key names, store columns[, table column of each header]) for rows that
+        # can be edited; store columns count the `hidden` ones leading each row.
+        model = ResultTableModel(headers, self.resultTable, store, hidden)
+        model.editable = False
+        if row_key is not None:
+            model.set_key(*row_key)
+        model.append_rows(data)
+        model.complete = cursor is None
+        model.cache_key = cache_key
+
+        # The model is replaced on every refresh, so the edit handler is connected exactly once
+        model.cellEdited.connect(self.update_database_from_cell)
+        model.rowsLoaded.connect(self.show_rows_loaded)
+
+        old_model = self.resultTable.model()
+        self.resultTable.setModel(model)
+        if old_model is not None:
+            old_model.release()
+            self.cache_result(old_model)
+            old_model.deleteLater()
+
+        if cursor is not None:
+            model.set_cursor(cursor, fetch=fetch)
+            if not fetch:
+                self.show_rows_loaded(model.rowCount(), True)
+        else:
+            self.show_rows_loaded(model.rowCount(), False)
 
-        # Populate cells
-        for i, row_data in enumerate(data):
-            for j, value in enumerate(row_data):
-                item = QTableWidgetItem(str(value))
-                self.resultTable.setItem(i, j, item)
+    def cache_result(self, model):
+        # Rows with unapplied edits are not what the database holds
+        if model.cache_key is None or model.original_values:
+            return
+        self.result_cache.put(model.cache_key, (model.headers, model.store, model.complete), model.store.nbytes())
 
-        # Connect cellChanged signal to handle cell edits
-        self.resultTable.cellChanged.connect(self.update_database_from_cell)
+    def show_rows_loaded(self, row_count, more):
+        if more:
+            self.statusLabel.setText(f"{row_count} rows loaded, more available.")
+        else:
+            self.statusLabel.setText(f"{row_count} rows loaded.")
 
-    def update_database_from_cell(self, row, column):
+    def update_database_from_cell(self, row, column, new_value):
         if not self.conn:
             return
 
@@ -427,21 +1510,75 @@ class MainWindow(QMainWindow):
             if not table_name:
                 raise ValueError("Table name is not set.")
 
-            column_name = self.resultTable.horizontalHeaderItem(column).text()
-            rowid_item = self.resultTable.item(row, 0)
-            if rowid_item:
-                rowid = rowid_item.text()
-            else:
-                raise ValueError("No rowid found for the selected row.")
+            model = self.resultTable.model()
+            if model.key_columns is None:
+                raise ValueError("These rows have no key to write the edit back with.")
+            column_name = (model.column_names or model.headers)[column]
+            key = model.key(row)
+            if None in key:
+                raise ValueError("No key found for the selected row.")
+
+            self.edit_buffer.add(table_name, column_name, key, new_value, model.key_names)
+            self.update_edit_actions()
+            self.statusLabel.setText(f"{len(self.edit_buffer)} pending edits.")
+        except Exception as e:
+            self.statusLabel.setText(f"Failed to update database: {str(e)}")
+
+    def update_edit_actions(self):
+        pending = len(self.edit_buffer) > 0
+        self.applyEditsAction.setEnabled(pending)
+        self.discardEditsAction.setEnabled(pending)
 
-            new_value = self.resultTable.item(row, column).text()
-            update_query = f"UPDATE `{table_name}` SET `{column_name}` = ? WHERE rowid = ?"
-            self.cursor.execute(update_query, (new_value, rowid))
-            self.conn.commit()
+    def apply_edits(self):
+        if not self.conn or not self.edit_buffer:
+            return
 
-            self.statusLabel.setText("Database updated successfully.")
+        tables = len(self.edit_buffer.tables())
+        try:
+            conn = self.pool.acquire_writer()
+        except PoolBusy as e:
+            self.statusLabel.setText(f"Edits not applied yet: {str(e)}")
+            return
+        try:
+            count = self.edit_buffer.flush(conn)
         except Exception as e:
             self.statusLabel.setText(f"Failed to update database: {str(e)}")
+            QMessageBox.warning(self, "Update Error", f"Failed to update database, no edits were applied: {str(e)}")
+            return
+        finally:
+            self.pool.release(conn)
+
+        # The grid was edited in place; nothing cached from before the edits is used again
+        self.result_cache.invalidate()
+        model = self.resultTable.model()
+        if model is not None:
+            model.accept_edits()
+        self.update_edit_actions()
+        self.statusLabel.setText(f"Database updated successfully. {count} edits applied to {tables} tables.")
+
+    def discard_edits(self):
+        self.edit_buffer.clear()
+        model = self.resultTable.model()
+        if model is not None:
+            model.discard_edits()
+        self.update_edit_actions()
+        self.statusLabel.setText("Pending edits discarded.")
+
+    def confirm_pending_edits(self):
+        # Returns False if the user wants to stay and keep editing
+        if not self.edit_buffer:
+            return True
+
+        answer = QMessageBox.question(self, "Pending Edits",
+                                      f"There are {len(self.edit_buffer)} unapplied edits. Apply them?",
+                                      QMessageBox.Apply | QMessageBox.Discard | QMessageBox.Cancel)
+        if answer == QMessageBox.Apply:
+            self.apply_edits()
+            return not self.edit_buffer
+        if answer == QMessageBox.Discard:
+            self.discard_edits()
+            return True
+        return False
 
     def toggle_header_info(self, checked):
         if checked:
@@ -450,11 +1587,10 @@ class MainWindow(QMainWindow):
                 header_info = "No table selected."
             else:
                 header_info = f"Header Information for Table: {table_name}\n"
-                if self.cursor:
-                    self.cursor.execute(f"PRAGMA table_info({table_name})")
-                    col_info = self.cursor.fetchall()
-                    for col in col_info:
-                        header_info += f"{col[1]} (type: {col[2]})\n"
+                if self.conn:
+                    self.refresh_schema()
+                    for column_name, column_type in self.schema.columns.get(table_name, []):
+                        header_info += f"{column_name} (type: {column_type})\n"
             QToolTip.showText(self.headerInfoButton.mapToGlobal(self.headerInfoButton.rect().bottomLeft()), header_info)
         else:
             QToolTip.hideText()
@@ -464,25 +1600,356 @@ class MainWindow(QMainWindow):
             script_dir = os.path.dirname(os.path.realpath(__file__))
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             db_name = f"{timestamp}.db"
-            db_path = os.path.join(script_dir, '..', '..', '..', '..', 'export', "sql", db_name)
+            db_path = os.path.normpath(os.path.join(script_dir, '..', '..', '..', '..', 'export', "sql", db_name))
 
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
             if os.path.exists(db_path):
                 os.remove(db_path)
 
-            self.conn = sqlite3.connect(db_path)
-            self.cursor = self.conn.cursor()
-
             sql_file = os.path.join(script_dir, '..', 'scripts', 'gen_db.sql')
-            with open(sql_file, 'r') as f:
-                sql_commands = f.read()
-                self.cursor.executescript(sql_commands)
-
-            self.conn.commit()
-            self.statusLabel.setText(f"Database '{db_name}' generated successfully.")
-
+            self.start_script(db_path, sql_file, open_when_done=True)
         except Exception as e:
             self.statusLabel.setText(f"Failed to generate database: {str(e)}")
 
+    def run_sql_script(self):
+        if not self.conn:
+            self.statusLabel.setText("No database loaded.")
+            return
+
+        options = QFileDialog.Options()
+        fileName, _ = QFileDialog.getOpenFileName(self, "Run SQL Script", "", "SQL Files (*.sql);;All Files (*)", options=options)
+        if fileName:
+            # The grid's open cursor would hold a read lock the script's commits have to wait for
+            model = self.resultTable.model()
+            if model is not None:
+                model.release()
+            self.start_script(self.db_path, fileName)
+
+    def start_script(self, db_path, script_path, open_when_done=False):
+        if self.script_worker is not None:
+            self.statusLabel.setText("A script is already running.")
+            return
+        # An open database runs it on its writer; a new one, being generated, on a connection of its own
+        pool = self.connections.get(db_path)
+        conn = None
+        if pool is not None:
+            try:
+                conn = pool.acquire_writer()
+            except PoolBusy as e:
+                self.statusLabel.setText(f"Script not started: {str(e)}")
+                return
+
+        self.script_db_path = db_path
+        self.script_open_when_done = open_when_done
+
+        self.script_dialog = QProgressDialog(f"Running {os.path.basename(script_path)}...", "Cancel", 0, 1000, self)
+        self.script_dialog.setWindowTitle("Running Script")
+        self.script_dialog.setWindowModality(Qt.WindowModal)
+        self.script_dialog.setAutoClose(False)
+        self.script_dialog.setAutoReset(False)
+        self.script_dialog.canceled.connect(self.cancel_script)
+        self.script_dialog.show()
+
+        self.script_worker = ScriptWorker(db_path, script_path, profile=self.profiles.get(db_path), conn=conn)
+        if conn is not None:
+            self.script_worker.finished.connect(lambda: pool.release(conn))
+        self.script_worker.progress.connect(self.show_script_progress)
+        self.script_worker.scriptFinished.connect(self.script_finished)
+        self.script_worker.cancelled.connect(self.script_cancelled)
+        self.script_worker.error.connect(self.script_failed)
+        self.script_worker.finished.connect(self.script_worker_done)
+        self.script_worker.start()
+
+    def cancel_script(self):
+        if self.script_worker is not None:
+            self.script_worker.cancel()
+
+    def show_script_progress(self, statements, bytes_read, total):
+        if total:
+            self.script_dialog.setValue(int(bytes_read * 1000 / total))
+        self.script_dialog.setLabelText(
+            f"{statements} statements, {bytes_read / 1e6:.1f} of {total / 1e6:.1f} MB processed")
+
+    def script_finished(self, summary):
+        db_name = os.path.basename(self.script_db_path)
+        if self.script_open_when_done:
+            self.connect_to_database(self.script_db_path)
+            self.load_tables()
+        else:
+            self.refresh_schema()
+            self.load_table_data()
+        self.statusLabel.setText(f"Script finished on '{db_name}': {summary['statements']} statements, "
+                                 f"{summary['bytes'] / 1e6:.1f} MB in {summary['elapsed']:.2f} s.")
+
+    def script_cancelled(self, committed):
+        self.statusLabel.setText(f"Script cancelled. {committed} statements were committed.")
+
+    def script_failed(self, message, committed):
+        self.statusLabel.setText(f"Script failed: {message}")
+        QMessageBox.warning(self, "Script Error",
+                            f"Script failed: {message}\n\n{committed} statements were committed before the error.")
+
+    def script_worker_done(self):
+        self.script_dialog.close()
+        self.script_worker.deleteLater()
+        self.script_worker = None
+
+    def import_data(self):
+        if not self.conn:
+            self.statusLabel.setText("No database loaded.")
+            return
+        if self.import_worker is not None:
+            self.statusLabel.setText("An import is already running.")
+            return
+
+        options = QFileDialog.Options()
+        fileName, _ = QFileDialog.getOpenFileName(self, "Import Data", "",
+                                                  "Data Files (*.csv *.tsv *.tab *.jsonl *.ndjson);;All Files (*)",
+                                                  options=options)
+        if not fileName:
+            return
+        default = os.path.splitext(os.path.basename(fileName))[0]
+        table, ok = QInputDialog.getText(self, "Import Data", "Import into table:", text=default)
+        table = table.strip()
+        if not ok or not table:
+            return
+        self.refresh_schema()
+        existing = self.schema.find(table)
+        if existing:
+            answer = QMessageBox.question(self, "Import Data", f"Append the rows to the existing table '{existing}'?")
+            if answer != QMessageBox.Yes:
+                return
+            table = existing
+
+        try:
+            conn = self.pool.acquire_writer()
+        except PoolBusy as e:
+            self.statusLabel.setText(f"Import not started: {str(e)}")
+            return
+        pool = self.pool
+
+        # The grid's open cursor would hold a read lock the import's commit has to wait for
+        model = self.resultTable.model()
+        if model is not None:
+            model.release()
+
+        self.import_started = time.perf_counter()
+        self.import_dialog = QProgressDialog(f"Importing {os.path.basename(fileName)}...", "Cancel", 0, 1000, self)
+        self.import_dialog.setWindowTitle("Importing")
+        self.import_dialog.setWindowModality(Qt.WindowModal)
+        self.import_dialog.setAutoClose(False)
+        self.import_dialog.setAutoReset(False)
+        self.import_dialog.canceled.connect(self.cancel_import)
+        self.import_dialog.show()
+
+        self.import_worker = ImportWorker(self.db_path, fileName, table, detect_format(fileName), profile=self.profile,
+                                          conn=conn)
+        self.import_worker.finished.connect(lambda: pool.release(conn))
+        self.import_worker.progress.connect(self.show_import_progress)
+        self.import_worker.importFinished.connect(self.import_finished)
+        self.import_worker.cancelled.connect(self.import_cancelled)
+        self.import_worker.error.connect(self.import_failed)
+        self.import_worker.finished.connect(self.import_worker_done)
+        self.import_worker.start()
+
+    def cancel_import(self):
+        if self.import_worker is not None:
+            self.import_worker.cancel()
+
+    def show_import_progress(self, rows, bytes_read, total):
+        if total:
+            self.import_dialog.setValue(int(bytes_read * 1000 / total))
+        elapsed = time.perf_counter() - self.import_started
+        rate = f", {rows / elapsed:,.0f} rows/s" if elapsed > 0 else ""
+        self.import_dialog.setLabelText(f"{rows:,} rows, {bytes_read / 1e6:.1f} of {total / 1e6:.1f} MB{rate}")
+
+    def import_finished(self, summary):
+        self.refresh_schema()
+        if summary["table"] == self.tableComboBox.currentText():
+            self.load_table_data()
+        rate = summary["rows"] / summary["elapsed"] if summary["elapsed"] > 0 else 0
+        action = "created" if summary["created"] else "appended to"
+        self.statusLabel.setText(f"Imported {summary['rows']:,} rows, {action} '{summary['table']}' in "
+                                 f"{summary['elapsed']:.2f} s ({rate:,.0f} rows/s).")
+
+    def import_cancelled(self):
+        self.statusLabel.setText("Import cancelled, nothing was imported.")
+
+    def import_failed(self, message):
+        self.statusLabel.setText(f"Import failed: {message}")
+        QMessageBox.warning(self, "Import Error", f"Import failed, nothing was imported: {message}")
+
+    def import_worker_done(self):
+        self.import_dialog.close()
+        self.import_worker.deleteLater()
+        self.import_worker = None
+
+    def compare_database(self):
+        if not self.conn:
+            self.statusLabel.setText("No database loaded.")
+            return
+        if self.diff_worker is not None:
+            self.statusLabel.setText("A comparison is already running.")
+            return
+
+        options = QFileDialog.Options()
+        otherName, _ = QFileDialog.getOpenFileName(self, "Compare With Database", "",
+                                                   "SQLite Database Files (*.db);;All Files (*)", options=options)
+        if not otherName:
+            return
+        if os.path.abspath(otherName) == os.path.abspath(self.db_path):
+            self.statusLabel.setText("That is the open database.")
+            return
+        default = os.path.join(os.path.dirname(os.path.abspath(self.db_path)),
+                               f"sync_to_{os.path.splitext(os.path.basename(otherName))[0]}.sql")
+        scriptName, _ = QFileDialog.getSaveFileName(
+            self, f"Save the script that makes {os.path.basename(self.db_path)} match {os.path.basename(otherName)}",
+            default, "SQL Files (*.sql);;All Files (*)", options=options)
+        if not scriptName:
+            return
+
+        try:
+            conn = self.pool.acquire_reader()
+        except (PoolBusy, sqlite3.Error) as e:
+            self.statusLabel.setText(f"Comparison failed: {str(e)}")
+            return
+        pool = self.pool
+
+        self.diff_paths = (self.db_path, otherName)
+        self.diff_dialog = QProgressDialog(f"Comparing with {os.path.basename(otherName)}...", "Cancel", 0, 1000, self)
+        self.diff_dialog.setWindowTitle("Comparing")
+        self.diff_dialog.setWindowModality(Qt.WindowModal)
+        self.diff_dialog.setAutoClose(False)
+        self.diff_dialog.setAutoReset(False)
+        self.diff_dialog.canceled.connect(self.cancel_diff)
+        self.diff_dialog.show()
+
+        self.diff_worker = DiffWorker(self.db_path, otherName, scriptName, profile=self.profile, conn=conn)
+        self.diff_worker.finished.connect(lambda: pool.release(conn))
+        self.diff_worker.progress.connect(self.show_diff_progress)
+        self.diff_worker.diffFinished.connect(self.diff_finished)
+        self.diff_worker.cancelled.connect(self.diff_cancelled)
+        self.diff_worker.error.connect(self.diff_failed)
+        self.diff_worker.finished.connect(self.diff_worker_done)
+        self.diff_worker.start()
+
+    def cancel_diff(self):
+        if self.diff_worker is not None:
+            self.diff_worker.cancel()
+
+    def show_diff_progress(self, table, done, total):
+        if total:
+            self.diff_dialog.setValue(int(done * 1000 / total))
+        if table is not None:
+            self.diff_dialog.setLabelText(f"Comparing table {done + 1} of {total}: {table}")
+
+    def diff_finished(self, summary):
+        dialog = DiffDialog(summary, *self.diff_paths, parent=self)
+        dialog.loadRequested.connect(self.load_sync_script)
+        dialog.runRequested.connect(self.run_sync_script)
+        dialog.finished.connect(dialog.deleteLater)
+        dialog.show()
+        self.statusLabel.setText(f"Comparison finished: {summary['statements']:,} statements written to "
+                                 f"{os.path.basename(summary['path'])}.")
+
+    def diff_cancelled(self):
+        self.statusLabel.setText("Comparison cancelled.")
+
+    def diff_failed(self, message):
+        self.statusLabel.setText(f"Comparison failed: {message}")
+        QMessageBox.warning(self, "Comparison Error", f"Comparison failed: {message}")
+
+    def diff_worker_done(self):
+        self.diff_dialog.close()
+        self.diff_worker.deleteLater()
+        self.diff_worker = None
+
+    def load_sync_script(self, path):
+        # The editor is no place for a script of millions of statements; those run from the file
+        if os.path.getsize(path) > 1 << 20:
+            self.statusLabel.setText(f"{os.path.basename(path)} is over 1 MB, run it with 'Run Script...' instead.")
+            return
+        with open(path, 'r', encoding='utf-8') as file:
+            self.queryInput.setPlainText(file.read())
+
+    def run_sync_script(self, path):
+        answer = QMessageBox.question(self, "Run Script",
+                                      f"Apply {os.path.basename(path)} to {os.path.basename(self.db_path)}?")
+        if answer != QMessageBox.Yes:
+            return
+        model = self.resultTable.model()
+        if model is not None:
+            model.release()
+        self.start_script(self.db_path, path)
+
+    def export_result(self):
+        if not self.conn or not self.current_sql:
+            self.statusLabel.setText("No result to export.")
+            return
+        if self.export_worker is not None:
+            self.statusLabel.setText("An export is already running.")
+            return
+
+        formats = {
+            "CSV Files (*.csv)": "csv",
+            "TSV Files (*.tsv)": "tsv",
+            "JSON Lines Files (*.jsonl)": "jsonl",
+            "Columnar Binary Files (*.zcol)": "zcol",
+        }
+        options = QFileDialog.Options()
+        fileName, selected = QFileDialog.getSaveFileName(self, "Export Result", "", ";;".join(formats), options=options)
+        if not fileName:
+            return
+        fmt = formats.get(selected, "csv")
+        if not os.path.splitext(fileName)[1]:
+            fileName += f".{fmt}"
+
+        try:
+            conn = self.pool.acquire_reader()
+        except (PoolBusy, sqlite3.Error) as e:
+            self.statusLabel.setText(f"Export failed: {str(e)}")
+            return
+        pool = self.pool
+
+        self.export_dialog = QProgressDialog("Exporting result...", "Cancel", 0, 0, self)
+        self.export_dialog.setWindowTitle("Exporting")
+        self.export_dialog.setWindowModality(Qt.WindowModal)
+        self.export_dialog.canceled.connect(self.cancel_export)
+        self.export_dialog.show()
+
+        self.export_worker = ExportWorker(self.db_path, self.current_sql, fileName, fmt, profile=self.profile,
+                                          params=self.current_params, conn=conn)
+        self.export_worker.finished.connect(lambda: pool.release(conn))
+        self.export_worker.progress.connect(self.show_export_progress)
+        self.export_worker.exportFinished.connect(self.export_finished)
+        self.export_worker.cancelled.connect(self.export_cancelled)
+        self.export_worker.error.connect(self.export_failed)
+        self.export_worker.finished.connect(self.export_worker_done)
+        self.export_worker.start()
+
+    def cancel_export(self):
+        if self.export_worker is not None:
+            self.export_worker.cancel()
+
+    def show_export_progress(self, rows):
+        self.export_dialog.setLabelText(f"{rows} rows exported...")
+
+    def export_finished(self, summary):
+        self.statusLabel.setText(f"Exported {summary['rows']} rows to {os.path.basename(summary['path'])} "
+                                 f"in {summary['elapsed']:.2f} s.")
+
+    def export_cancelled(self, rows):
+        self.statusLabel.setText(f"Export cancelled after {rows} rows, the partial file was removed.")
+
+    def export_failed(self, message):
+        self.statusLabel.setText(f"Export failed: {message}")
+        QMessageBox.warning(self, "Export Error", f"Export failed: {message}")
+
+    def export_worker_done(self):
+        self.export_dialog.close()
+        self.export_worker.deleteLater()
+        self.export_worker = None
+
     def open_bank_sql(self):
         bank_sql_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'scripts', 'bank.sql')
 
@@ -506,8 +1973,29 @@ class MainWindow(QMainWindow):
             popup.exec_()
 
     def closeEvent(self, event):
-        if self.conn:
-            self.conn.close()
+        if not self.confirm_pending_edits():
+            event.ignore()
+            return
+        self.stop_query()
+        if self.script_worker is not None:
+            self.script_worker.cancel()
+            self.script_worker.wait()
+        if self.export_worker is not None:
+            self.export_worker.cancel()
+            self.export_worker.wait()
+        if self.import_worker is not None:
+            self.import_worker.cancel()
+            self.import_worker.wait()
+        if self.stats_worker is not None:
+            self.stats_worker.cancel()
+            self.stats_worker.wait()
+        if self.diff_worker is not None:
+            self.diff_worker.cancel()
+            self.diff_worker.wait()
+        # Every pool, with what the workers above were lent
+        self.connections.close_all()
+        if self.history is not None:
+            self.history.close()
         event.accept()
 
 if __name__ == "__main__":
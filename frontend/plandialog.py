@@ -0,0 +1,131 @@
+# frontend/plandialog.py
+
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTreeWidget, QTreeWidgetItem, \
+    QListWidget, QListWidgetItem
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QColor
+
+from frontend.workers import PlanWorker
+from backend.connections import PoolBusy
+from backend.plan import explain, suggest_indexes
+
+
+class PlanDialog(QDialog):
+    schemaChanged = pyqtSignal()
+
+    def __init__(self, query, pool, schema, parent=None, params=()):
+        super().__init__(parent)
+        self.setWindowTitle('Query Plan')
+        self.setGeometry(300, 300, 800, 500)
+        self.setStyleSheet("background-color: black; color: white;")
+
+        self.query = query
+        self.params = params
+        # The plan is read on the pool's GUI connection, the index created on its writer
+        self.pool = pool
+        self.worker = None
+
+        layout = QVBoxLayout()
+
+        self.planTree = QTreeWidget()
+        self.planTree.setHeaderLabels(["Step", "Warning"])
+        self.planTree.setStyleSheet("background-color: #111; color: white; font-family: Courier;")
+        layout.addWidget(QLabel("EXPLAIN QUERY PLAN"))
+        layout.addWidget(self.planTree, stretch=2)
+
+        self.suggestionList = QListWidget()
+        self.suggestionList.setStyleSheet("background-color: #111; color: limegreen; font-family: Courier;")
+        layout.addWidget(QLabel("Suggested indexes"))
+        layout.addWidget(self.suggestionList, stretch=1)
+
+        buttons = QHBoxLayout()
+        self.createButton = QPushButton("Create Index and Re-time")
+        self.createButton.setStyleSheet("""
+            QPushButton {
+                padding: 5px;
+                border: 1px solid grey;
+            }
+            QPushButton:hover {
+                background-color: #333;
+            }
+        """)
+        self.createButton.setEnabled(False)
+        self.createButton.clicked.connect(self.create_and_retime)
+        self.suggestionList.currentRowChanged.connect(lambda row: self.createButton.setEnabled(row >= 0))
+        buttons.addWidget(self.createButton)
+        self.resultLabel = QLabel()
+        buttons.addWidget(self.resultLabel, stretch=1)
+        layout.addLayout(buttons)
+
+        self.setLayout(layout)
+
+        plan = explain(pool.conn, query, params)
+        self.show_plan(plan)
+        suggestions = suggest_indexes(query, plan, schema)
+        for statement, reason in suggestions:
+            item = QListWidgetItem(f"{statement}\n    -- {reason}")
+            item.setData(Qt.UserRole, statement)
+            self.suggestionList.addItem(item)
+        if not suggestions:
+            self.resultLabel.setText("No index suggestions for this plan.")
+
+    def show_plan(self, plan):
+        self.planTree.clear()
+        warningColor = QColor("red")
+
+        def add(nodes, parent):
+            for node in nodes:
+                item = QTreeWidgetItem(parent, [node.detail, node.warning or ""])
+                if node.warning:
+                    item.setForeground(0, warningColor)
+                    item.setForeground(1, warningColor)
+                add(node.children, item)
+
+        add(plan, self.planTree)
+        self.planTree.expandAll()
+        self.planTree.resizeColumnToContents(0)
+
+    def create_and_retime(self):
+        item = self.suggestionList.currentItem()
+        if item is None or self.worker is not None:
+            return
+
+        try:
+            conn = self.pool.acquire_writer()
+        except PoolBusy as e:
+            self.resultLabel.setText(str(e))
+            return
+        self.createButton.setEnabled(False)
+        self.resultLabel.setText("Timing query, creating index, timing again...")
+        pool = self.pool
+        self.worker = PlanWorker(pool.db_path, self.query, item.data(Qt.UserRole), pool.profile, self.params,
+                                 conn=conn)
+        self.worker.finished.connect(lambda: pool.release(conn))
+        self.worker.timed.connect(self.show_timing)
+        self.worker.error.connect(self.show_error)
+        self.worker.finished.connect(self.worker_done)
+        self.worker.start()
+
+    def show_timing(self, result):
+        before, after = result["before"], result["after"]
+        speedup = f" ({before / after:.1f}x)" if after > 0 else ""
+        self.resultLabel.setText(f"Before: {before * 1000:.1f} ms, after: {after * 1000:.1f} ms{speedup}, "
+                                 f"{result['rows']} rows.")
+        self.show_plan(result["plan"])
+        self.suggestionList.takeItem(self.suggestionList.currentRow())
+        self.schemaChanged.emit()
+
+    def show_error(self, message):
+        self.resultLabel.setText(f"Failed: {message}")
+
+    def worker_done(self):
+        self.worker.deleteLater()
+        self.worker = None
+        self.createButton.setEnabled(self.suggestionList.currentRow() >= 0)
+
+    def done(self, result):
+        # The worker's thread must not outlive the dialog
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().done(result)
@@ -0,0 +1,231 @@
+# frontend/resultmodel.py
+
+import sys
+from array import array
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QColor
+
+# Rows pulled from a cursor per fetchMore() call
+FETCH_BATCH_SIZE = 1000
+
+class ColumnStore:
+    # Result rows are kept column by column. Columns that only ever hold integers or
+    # floats live in typed arrays (8 bytes per value); anything else falls back to a list.
+    def __init__(self, column_count):
+        self.columns = [None] * column_count
+        self.row_count = 0
+
+    def append_rows(self, rows):
+        if not rows:
+            return
+        for j, values in enumerate(zip(*rows)):
+            self.columns[j] = self._extend(self.columns[j], values)
+        self.row_count += len(rows)
+
+    def value(self, row, column):
+        return self.columns[column][row]
+
+    def nbytes(self):
+        # Estimated memory held by the values. Lists are sized from a sample of their items.
+        total = 0
+        for col in self.columns:
+            if col is None:
+                continue
+            if isinstance(col, array):
+                total += col.itemsize * len(col)
+                continue
+            step = max(len(col) // 64, 1)
+            sample = col[::step]
+            total += 8 * len(col) + sum(sys.getsizeof(value) for value in sample) * len(col) // max(len(sample), 1)
+        return total
+
+    def set_value(self, row, column, value):
+        col = self.columns[column]
+        try:
+            col[row] = value
+        except (TypeError, OverflowError):
+            col = list(col)
+            col[row] = value
+            self.columns[column] = col
+        else:
+            # array('d') silently accepts ints, which would change how the value reads back
+            if isinstance(col, array) and col.typecode == 'd' and type(value) is not float:
+                col = list(col)
+                col[row] = value
+                self.columns[column] = col
+
+    def _extend(self, col, values):
+        if col is None:
+            first = values[0]
+            if type(first) is int:
+                col = array('q')
+            elif type(first) is float:
+                col = array('d')
+            else:
+                return list(values)
+
+        if isinstance(col, array):
+            size = len(col)
+            if col.typecode == 'd' and not all(type(v) is float for v in values):
+                return col.tolist() + list(values)
+            try:
+                col.extend(values)
+                return col
+            except (TypeError, OverflowError):
+                # Drop whatever was appended before the offending value and degrade to a list
+                del col[size:]
+                return col.tolist() + list(values)
+
+        col.extend(values)
+        return col
+
+
+class ResultTableModel(QAbstractTableModel):
+    cellEdited = pyqtSignal(int, int, object)
+    rowsLoaded = pyqtSignal(int, bool)
+
+    def __init__(self, headers, parent=None, store=None, hidden=0):
+        super().__init__(parent)
+        self.headers = list(headers)
+        # Leading store columns that are not shown, such as the rowid selected to write edits back
+        self.hidden = hidden
+        self.store = store or ColumnStore(hidden + len(self.headers))
+        self.cursor = None
+        self.batch_size = FETCH_BATCH_SIZE
+        # True once every row of the result is in the store
+        self.complete = False
+        # Key of the result cache entry the store goes back to when the model is replaced
+        self.cache_key = None
+        self.editable = True
+        # Names and store columns of the key the edited rows are written back by; rows without
+        # one are read-only
+        self.key_names = None
+        self.key_columns = None
+        # The table column behind each header, where a query renamed them with AS
+        self.column_names = None
+
+        # Values of edited cells before their first edit, kept until the edits are applied or discarded
+        self.original_values = {}
+        self.pendingColor = QColor("#443300")
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.store.row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole or role == Qt.EditRole:
+            # Only the cells Qt asks for are ever formatted
+            return str(self.store.value(index.row(), index.column() + self.hidden))
+        if role == Qt.BackgroundRole and (index.row(), index.column()) in self.original_values:
+            return self.pendingColor
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section]
+        return str(section + 1)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if not self.editable:
+            return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole or not self.editable:
+            return False
+        row, column = index.row(), index.column()
+        if str(self.value(row, column)) == value:
+            return False
+        self.original_values.setdefault((row, column), self.value(row, column))
+        self.store.set_value(row, column + self.hidden, value)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        self.cellEdited.emit(row, column, value)
+        return True
+
+    def value(self, row, column):
+        return self.store.value(row, column + self.hidden)
+
+    def set_key(self, names, columns, column_names=None):
+        # `columns` are store columns, counting the hidden ones
+        self.key_names = list(names)
+        self.key_columns = list(columns)
+        self.column_names = list(column_names) if column_names is not None else None
+        self.editable = True
+
+    def key(self, row):
+        # The row's key as the database has it, from before any unapplied edit of a key column
+        values = []
+        for column in self.key_columns:
+            cell = (row, column - self.hidden)
+            if cell in self.original_values:
+                values.append(self.original_values[cell])
+            else:
+                values.append(self.store.value(row, column))
+        return tuple(values)
+
+    def accept_edits(self):
+        cells = list(self.original_values)
+        self.original_values.clear()
+        self._refresh_cells(cells)
+
+    def discard_edits(self):
+        cells = list(self.original_values)
+        for (row, column), value in self.original_values.items():
+            self.store.set_value(row, column + self.hidden, value)
+        self.original_values.clear()
+        self._refresh_cells(cells)
+
+    def _refresh_cells(self, cells):
+        if not cells:
+            return
+        rows = [row for row, _ in cells]
+        columns = [column for _, column in cells]
+        self.dataChanged.emit(self.index(min(rows), min(columns)), self.index(max(rows), max(columns)))
+
+    def append_rows(self, rows):
+        if not rows:
+            return
+        first = self.store.row_count
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.store.append_rows(rows)
+        self.endInsertRows()
+
+    def set_cursor(self, cursor, batch_size=FETCH_BATCH_SIZE, fetch=True):
+        # Rows are pulled from the cursor one batch at a time as the view scrolls
+        self.release()
+        self.cursor = cursor
+        self.batch_size = batch_size
+        self.complete = False
+        if fetch:
+            self.fetchMore()
+
+    def release(self):
+        if self.cursor is not None:
+            self.cursor.close()
+            self.cursor = None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.cursor is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.cursor is None:
+            return
+        rows = self.cursor.fetchmany(self.batch_size)
+        if len(rows) < self.batch_size:
+            self.release()
+            self.complete = True
+        self.append_rows(rows)
+        self.rowsLoaded.emit(self.store.row_count, self.cursor is not None)
@@ -0,0 +1,55 @@
+# frontend/resultview.py
+
+from PyQt5.QtWidgets import QApplication, QTableView
+from PyQt5.QtGui import QKeySequence
+
+
+class ResultTableView(QTableView):
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            self.copy_selection()
+        elif event.matches(QKeySequence.Paste):
+            self.paste_clipboard()
+        else:
+            super().keyPressEvent(event)
+
+    def copy_selection(self):
+        indexes = self.selectedIndexes()
+        model = self.model()
+        if not indexes or model is None:
+            return
+
+        rows = sorted({index.row() for index in indexes})
+        columns = sorted({index.column() for index in indexes})
+        lines = []
+        for row in rows:
+            lines.append("\t".join(model.data(model.index(row, column)) for column in columns))
+        QApplication.clipboard().setText("\n".join(lines))
+
+    def paste_clipboard(self):
+        model = self.model()
+        current = self.currentIndex()
+        if model is None or not current.isValid():
+            return
+
+        text = QApplication.clipboard().text().rstrip("\r\n")
+        if not text:
+            return
+        grid = [line.split("\t") for line in text.replace("\r\n", "\n").split("\n")]
+
+        # A single value fills every selected cell; a block is pasted from the current cell onwards.
+        # Every cell becomes a pending edit, so the whole paste is later applied as one commit.
+        if len(grid) == 1 and len(grid[0]) == 1:
+            for index in self.selectedIndexes() or [current]:
+                model.setData(index, grid[0][0])
+            return
+
+        for i, values in enumerate(grid):
+            row = current.row() + i
+            if row >= model.rowCount():
+                break
+            for j, value in enumerate(values):
+                column = current.column() + j
+                if column >= model.columnCount():
+                    break
+                model.setData(model.index(row, column), value)
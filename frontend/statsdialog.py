@@ -0,0 +1,116 @@
+# frontend/statsdialog.py
+
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, \
+    QTableWidgetItem, QAbstractItemView, QHeaderView
+from PyQt5.QtCore import Qt, pyqtSignal
+
+
+def _size(value):
+    if value is None:
+        return "n/a"
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+
+
+class NumberItem(QTableWidgetItem):
+    # Sorts by the number behind the text rather than the text
+    def __init__(self, text, number):
+        super().__init__(text)
+        self.setData(Qt.UserRole, number)
+
+    def __lt__(self, other):
+        mine, theirs = self.data(Qt.UserRole), other.data(Qt.UserRole)
+        if mine is None or theirs is None:
+            return mine is None and theirs is not None
+        return mine < theirs
+
+
+class StatsDialog(QDialog):
+    refreshRequested = pyqtSignal()
+
+    COLUMNS = ["Column", "Type", "Null %", "Distinct (est.)", "Min", "Max"]
+
+    def __init__(self, table, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f'Statistics: {table}')
+        self.setGeometry(250, 250, 800, 450)
+        self.setStyleSheet("background-color: black; color: white;")
+
+        layout = QVBoxLayout()
+
+        self.summaryLabel = QLabel("Computing...")
+        self.summaryLabel.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout.addWidget(self.summaryLabel)
+
+        self.statsTable = QTableWidget(0, len(self.COLUMNS))
+        self.statsTable.setHorizontalHeaderLabels(self.COLUMNS)
+        self.statsTable.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.statsTable.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.statsTable.horizontalHeader().setStretchLastSection(True)
+        self.statsTable.verticalHeader().hide()
+        # Columns stay in table order until a header is clicked
+        self.statsTable.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.statsTable.setStyleSheet("background-color: #111; color: white; font-family: Courier;")
+        layout.addWidget(self.statsTable)
+
+        buttons = QHBoxLayout()
+        self.refreshButton = QPushButton("Recompute")
+        self.refreshButton.setToolTip("Statistics are kept until the database changes; recompute them with a new sample.")
+        self.refreshButton.clicked.connect(self.refreshRequested.emit)
+        self.refreshButton.setStyleSheet("""
+            QPushButton {
+                padding: 5px;
+                border: 1px solid grey;
+            }
+            QPushButton:hover {
+                background-color: #333;
+            }
+        """)
+        buttons.addWidget(self.refreshButton)
+        self.noteLabel = QLabel("Values marked ~ come from the sample.")
+        buttons.addWidget(self.noteLabel, stretch=1)
+        layout.addLayout(buttons)
+
+        self.setLayout(layout)
+
+    def show_computing(self):
+        self.summaryLabel.setText("Computing...")
+        self.refreshButton.setEnabled(False)
+
+    def show_error(self, message):
+        self.summaryLabel.setText(f"Failed to compute statistics: {message}")
+        self.refreshButton.setEnabled(True)
+
+    def show_stats(self, stats, cached=False):
+        estimate = "" if stats.rows_source == 'count(*)' else "~"
+        lines = [f"Rows: {estimate}{stats.rows:,} (from {stats.rows_source}), "
+                 f"sampled {stats.sample_size:,}"]
+        if stats.pages is not None:
+            lines.append(f"Table: {stats.pages:,} pages, {_size(stats.bytes)} ({_size(stats.payload)} payload); "
+                         f"indexes: {stats.index_pages or 0:,} pages, {_size(stats.index_bytes or 0)}")
+        else:
+            lines.append("Page usage unavailable: this SQLite was built without dbstat.")
+        kept = ", kept as the database has not changed since" if cached else ""
+        lines.append(f"Computed in {stats.elapsed * 1000:.0f} ms{kept}.")
+        self.summaryLabel.setText("\n".join(lines))
+        self.refreshButton.setEnabled(True)
+
+        self.statsTable.setSortingEnabled(False)
+        self.statsTable.setRowCount(len(stats.columns))
+        for row, column in enumerate(stats.columns):
+            nulls = None if column.null_fraction is None else column.null_fraction * 100
+            prefix = "" if column.exact_range else "~"
+            items = [
+                QTableWidgetItem(column.name),
+                QTableWidgetItem(column.declared_type),
+                NumberItem("" if nulls is None else f"{nulls:.1f}", nulls),
+                NumberItem("" if column.distinct is None else f"{column.distinct:,}", column.distinct),
+                QTableWidgetItem("" if column.minimum is None else prefix + str(column.minimum)),
+                QTableWidgetItem("" if column.maximum is None else prefix + str(column.maximum)),
+            ]
+            for index, item in enumerate(items):
+                self.statsTable.setItem(row, index, item)
+        self.statsTable.setSortingEnabled(True)
+        self.statsTable.resizeColumnsToContents()
@@ -0,0 +1,252 @@
+# frontend/workers.py
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from backend.executor import QueryExecutor, QueryCancelled
+from backend.scriptrunner import ScriptRunner, ScriptCancelled, ScriptError
+from backend.export import export_cursor, ExportCancelled
+from backend.importer import Importer, ImportCancelled
+from backend.profiles import open_connection
+from backend.plan import explain, time_query
+from backend.tablestats import compute_stats
+from backend.dbdiff import DatabaseDiff, DiffCancelled
+
+
+class ConnectionWorker(QThread):
+    # A worker running on a connection lent by the caller, opened with check_same_thread=False
+    # and given back by the caller once the worker finishes: the pool's writer, or one of its
+    # readers. Without one the worker opens and closes its own.
+    # Whether a connection the worker opens itself is read-only; None follows the profile
+    read_only = None
+
+    def __init__(self, db_path, profile=None, conn=None):
+        super().__init__()
+        self.db_path = db_path
+        self.profile = profile
+        self.shared_conn = conn
+        self.cancel_event = threading.Event()
+        self.conn = None
+
+    @contextmanager
+    def connection(self):
+        # The connection to work on, which cancel() can interrupt for the length of the block
+        self.conn = self.shared_conn or open_connection(self.db_path, self.profile, read_only=self.read_only)
+        try:
+            yield self.conn
+        finally:
+            conn, self.conn = self.conn, None
+            if conn is not self.shared_conn:
+                conn.close()
+
+    def cancel(self):
+        self.cancel_event.set()
+        conn = self.conn
+        if conn is not None:
+            try:
+                conn.interrupt()
+            except sqlite3.ProgrammingError:
+                # The statement finished and the connection was closed in the meantime
+                pass
+
+
+class QueryWorker(ConnectionWorker):
+    # Only emitted in script mode, before each statement's columns and rows
+    statementStarted = pyqtSignal(int, str)
+    columnsReady = pyqtSignal(list)
+    batchReady = pyqtSignal(list)
+    queryFinished = pyqtSignal(dict)
+    cancelled = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self, db_path, query, params=(), profile=None, statements=None, single_transaction=False,
+                 conn=None):
+        super().__init__(db_path, profile, conn)
+        self.query = query
+        self.params = params
+        # (sql, line, params) to run as a script instead of `query`
+        self.statements = statements
+        self.single_transaction = single_transaction
+
+    def run(self):
+        try:
+            with self.connection() as conn:
+                executor = QueryExecutor(conn, cancel_event=self.cancel_event)
+                if self.statements is not None:
+                    summary = executor.run_script(self.statements, self.single_transaction,
+                                                  on_statement=self.statementStarted.emit,
+                                                  on_columns=self.columnsReady.emit, on_rows=self.batchReady.emit)
+                else:
+                    summary = executor.run(self.query, self.params,
+                                           on_columns=self.columnsReady.emit, on_rows=self.batchReady.emit)
+                self.queryFinished.emit(summary)
+        except QueryCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class ScriptWorker(ConnectionWorker):
+    progress = pyqtSignal(int, object, object)
+    scriptFinished = pyqtSignal(dict)
+    cancelled = pyqtSignal(int)
+    error = pyqtSignal(str, int)
+
+    def __init__(self, db_path, script_path, batch_size=None, profile=None, conn=None):
+        super().__init__(db_path, profile, conn)
+        self.script_path = script_path
+        self.batch_size = batch_size
+
+    def run(self):
+        try:
+            with self.connection() as conn:
+                runner = ScriptRunner(conn, cancel_event=self.cancel_event)
+                if self.batch_size:
+                    runner.batch_size = self.batch_size
+                # Byte counts go through `object` signals, multi-GB files overflow a C int
+                summary = runner.run_file(self.script_path, progress=self.progress.emit)
+                self.scriptFinished.emit(summary)
+        except ScriptCancelled as e:
+            self.cancelled.emit(e.committed)
+        except ScriptError as e:
+            self.error.emit(str(e), e.committed)
+        except Exception as e:
+            self.error.emit(str(e), 0)
+
+
+class ExportWorker(ConnectionWorker):
+    progress = pyqtSignal(object)
+    exportFinished = pyqtSignal(dict)
+    cancelled = pyqtSignal(object)
+    error = pyqtSignal(str)
+
+    # Re-running the query read-only guarantees an export can never modify the database
+    read_only = True
+
+    def __init__(self, db_path, query, path, fmt, profile=None, params=(), conn=None):
+        super().__init__(db_path, profile, conn)
+        self.query = query
+        self.params = params
+        self.path = path
+        self.fmt = fmt
+
+    def run(self):
+        try:
+            with self.connection() as conn:
+                cursor = conn.execute(self.query, self.params)
+                try:
+                    summary = export_cursor(cursor, self.path, self.fmt,
+                                            progress=self.progress.emit, cancel_event=self.cancel_event)
+                finally:
+                    # A pooled connection goes back without a statement left reading
+                    cursor.close()
+                self.exportFinished.emit(summary)
+        except ExportCancelled as e:
+            self.cancelled.emit(e.rows)
+        except Exception as e:
+            if self.cancel_event.is_set():
+                # Interrupted before the first chunk was written
+                self.cancelled.emit(0)
+            else:
+                self.error.emit(str(e))
+
+
+class ImportWorker(ConnectionWorker):
+    progress = pyqtSignal(object, object, object)
+    importFinished = pyqtSignal(dict)
+    cancelled = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self, db_path, path, table, fmt=None, profile=None, conn=None):
+        super().__init__(db_path, profile, conn)
+        self.path = path
+        self.table = table
+        self.fmt = fmt
+
+    def run(self):
+        try:
+            with self.connection() as conn:
+                importer = Importer(conn, cancel_event=self.cancel_event)
+                summary = importer.run(self.path, self.table, self.fmt, progress=self.progress.emit)
+                self.importFinished.emit(summary)
+        except ImportCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class StatsWorker(ConnectionWorker):
+    statsReady = pyqtSignal(object)
+    cancelled = pyqtSignal()
+    error = pyqtSignal(str)
+
+    # Statistics only read, so the worker never takes a write lock
+    read_only = True
+
+    def __init__(self, db_path, table, profile=None, conn=None):
+        super().__init__(db_path, profile, conn)
+        self.table = table
+
+    def run(self):
+        try:
+            with self.connection() as conn:
+                stats = compute_stats(conn, self.table, cancel_event=self.cancel_event)
+                self.statsReady.emit(stats)
+        except Exception as e:
+            if self.cancel_event.is_set():
+                self.cancelled.emit()
+            else:
+                self.error.emit(str(e))
+
+
+class DiffWorker(ConnectionWorker):
+    progress = pyqtSignal(object, int, int)
+    diffFinished = pyqtSignal(dict)
+    cancelled = pyqtSignal()
+    error = pyqtSignal(str)
+
+    # Both databases are only read; the script is applied separately
+    read_only = True
+
+    def __init__(self, db_path, other_path, script_path, profile=None, conn=None):
+        super().__init__(db_path, profile, conn)
+        self.other_path = other_path
+        self.script_path = script_path
+
+    def run(self):
+        try:
+            with self.connection() as conn:
+                diff = DatabaseDiff(conn, self.other_path, cancel_event=self.cancel_event)
+                summary = diff.run(self.script_path, progress=self.progress.emit)
+                self.diffFinished.emit(summary)
+        except DiffCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class PlanWorker(ConnectionWorker):
+    timed = pyqtSignal(dict)
+    error = pyqtSignal(str)
+
+    def __init__(self, db_path, query, index_sql, profile=None, params=(), conn=None):
+        super().__init__(db_path, profile, conn)
+        self.query = query
+        self.params = params
+        self.index_sql = index_sql
+
+    def run(self):
+        # Times the query, creates the index, then times it again on the same connection
+        try:
+            with self.connection() as conn:
+                before, rows = time_query(conn, self.query, self.params)
+                conn.execute(self.index_sql)
+                conn.commit()
+                after, _ = time_query(conn, self.query, self.params)
+                plan = explain(conn, self.query, self.params)
+                self.timed.emit({"before": before, "after": after, "rows": rows, "plan": plan})
+        except Exception as e:
+            self.error.emit(str(e))
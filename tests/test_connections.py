@@ -0,0 +1,112 @@
+# tests/test_connections.py
+
+import sqlite3
+
+import pytest
+
+from backend.connections import is_read_only, parse_attach, ConnectionManager, PoolBusy
+from backend.profiles import ConnectionProfile
+
+
+@pytest.mark.parametrize('sql, expected', [
+    ("SELECT * FROM t", True),
+    ("  -- note\n select 1", True),
+    ("WITH x AS (SELECT 1) SELECT * FROM x", True),
+    ("VALUES (1), (2)", True),
+    ("EXPLAIN QUERY PLAN SELECT 1", True),
+    ("SELECT 'insert into t' AS \"delete\"", True),
+    ("WITH x AS (SELECT 1) INSERT INTO t SELECT * FROM x", False),
+    ("SELECT 1; DROP TABLE t", False),
+    ("PRAGMA table_info(t)", False),
+    ("INSERT INTO t VALUES (1)", False),
+    ("", False),
+    ("-- only a comment", False),
+])
+def test_is_read_only(sql, expected):
+    assert is_read_only(sql) is expected
+
+
+@pytest.mark.parametrize('sql, expected', [
+    ("ATTACH DATABASE 'other.db' AS other;", ('attach', 'other.db', 'other')),
+    ("attach 'it''s.db' as \"my db\"", ('attach', "it's.db", 'my db')),
+    ("DETACH DATABASE other", ('detach', 'other')),
+    ("detach [my db];", ('detach', 'my db')),
+    ("ATTACH :path AS other", None),
+    ("ATTACH 'a.db' AS other; SELECT 1", None),
+    ("SELECT 1", None),
+])
+def test_parse_attach(sql, expected):
+    assert parse_attach(sql) == expected
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = ConnectionManager()
+    yield manager
+    manager.close_all()
+
+
+def aliases(conn):
+    return sorted(row[1] for row in conn.execute("PRAGMA database_list") if row[1] not in ('main', 'temp'))
+
+
+def test_one_pool_per_file(tmp_path, manager):
+    path = str(tmp_path / "a.db")
+    pool = manager.open(path, ConnectionProfile())
+    assert manager.open(path, ConnectionProfile()) is pool
+    assert manager.get(str(tmp_path / "." / "a.db")) is pool
+    with pytest.raises(sqlite3.OperationalError):
+        pool.conn.execute("CREATE TABLE t (x)")
+
+
+def test_the_writer_is_lent_to_one_user_at_a_time(tmp_path, manager):
+    pool = manager.open(str(tmp_path / "a.db"), ConnectionProfile())
+    writer = pool.acquire_writer()
+    with pytest.raises(PoolBusy):
+        pool.acquire_writer()
+    writer.execute("CREATE TABLE t (x)")
+    writer.execute("INSERT INTO t VALUES (1)")
+    pool.release(writer)
+    # The open transaction was rolled back on release
+    assert pool.conn.execute("SELECT count(*) FROM t").fetchone()[0] == 0
+    assert pool.acquire_writer() is writer
+
+
+def test_attachments_reach_every_connection(tmp_path, manager):
+    sqlite3.connect(str(tmp_path / "b.db")).close()
+    pool = manager.open(str(tmp_path / "a.db"), ConnectionProfile())
+    reader = pool.acquire_reader()
+    pool.attach(str(tmp_path / "b.db"), "other")
+    assert aliases(pool.conn) == ['other']
+    # Lent out while attaching, it catches up on its next loan
+    pool.release(reader)
+    assert pool.acquire_reader() is reader and aliases(reader) == ['other']
+    assert aliases(pool.acquire_writer()) == ['other']
+    pool.detach("other")
+    pool.release(reader)
+    assert aliases(pool.acquire_reader()) == []
+    with pytest.raises(ValueError):
+        pool.attach(str(tmp_path / "b.db"), "main")
+
+
+def test_a_script_attach_lasts_as_long_as_the_script(tmp_path, manager):
+    sqlite3.connect(str(tmp_path / "b.db")).close()
+    pool = manager.open(str(tmp_path / "a.db"), ConnectionProfile())
+    writer = pool.acquire_writer()
+    writer.execute("ATTACH DATABASE ? AS scratch", (str(tmp_path / "b.db"),))
+    pool.release(writer)
+    assert aliases(pool.acquire_writer()) == []
+
+
+def test_a_changed_profile_reopens_the_pool_with_its_attachments(tmp_path, manager):
+    sqlite3.connect(str(tmp_path / "b.db")).close()
+    path = str(tmp_path / "a.db")
+    pool = manager.open(path, ConnectionProfile())
+    pool.attach(str(tmp_path / "b.db"), "other")
+    reopened = manager.open(path, ConnectionProfile(cache_size=-4000))
+    assert reopened is not pool and pool.closed
+    assert reopened.attached == pool.attached
+    reader = reopened.acquire_reader()
+    with pytest.raises(PoolBusy):
+        manager.open(path, ConnectionProfile())
+    reopened.release(reader)
@@ -0,0 +1,50 @@
+# tests/test_editbuffer.py
+
+import sqlite3
+
+import pytest
+
+from backend.editbuffer import EditBuffer
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE t (a TEXT, b INTEGER, v TEXT, w TEXT, PRIMARY KEY (a, b))")
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?, ?)", [('x', 1, 'old', 'old'), ('x', 2, 'old', 'old')])
+    conn.commit()
+    return conn
+
+
+def test_later_edits_of_a_cell_replace_earlier_ones():
+    buffer = EditBuffer()
+    buffer.add('t', 'v', 3, 'first')
+    buffer.add('t', 'v', 3, 'second')
+    buffer.add('t', 'w', 3, 'other')
+    assert len(buffer) == 2
+    assert buffer.grouped() == {'t': {('v', 'w'): [('second', 'other', 3)]}}
+
+
+def test_flush_updates_rows_by_their_original_key(conn):
+    buffer = EditBuffer()
+    key = ('a', 'b')
+    # Editing a key column still finds the row by the key it was read with
+    buffer.add('t', 'b', ('x', 1), 10, key)
+    buffer.add('t', 'v', ('x', 1), 'new', key)
+    buffer.add('t', 'w', ('x', 2), 'new', key)
+    assert buffer.flush(conn) == 3
+    assert len(buffer) == 0
+    assert conn.execute("SELECT * FROM t ORDER BY b").fetchall() == \
+        [('x', 2, 'old', 'new'), ('x', 10, 'new', 'old')]
+
+
+def test_a_missing_row_rolls_back_every_edit(conn):
+    buffer = EditBuffer()
+    buffer.add('t', 'v', ('x', 1), 'new', ('a', 'b'))
+    buffer.add('t', 'v', ('x', 9), 'new', ('a', 'b'))
+    with pytest.raises(ValueError):
+        buffer.flush(conn)
+    assert not conn.in_transaction
+    assert conn.execute("SELECT v FROM t ORDER BY b").fetchall() == [('old',), ('old',)]
+    # Kept, so the edits can be corrected and applied again
+    assert len(buffer) == 2
@@ -0,0 +1,55 @@
+# tests/test_export.py
+
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from backend.export import export_cursor, read_columnar, ExportCancelled
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE t (i INTEGER, r REAL, s TEXT, b BLOB)")
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?, ?)",
+                     [(1, 1.5, 'a,"b"', b'\x00\xff'), (None, None, None, None), (3, 1e999, 'é', b'')])
+    return conn
+
+
+def test_csv_quotes_fields_and_writes_blobs_as_hex(conn, tmp_path):
+    path = tmp_path / "out.csv"
+    summary = export_cursor(conn.execute("SELECT i, s, b FROM t"), str(path), 'csv', chunk_size=2)
+    assert summary["rows"] == 3
+    assert path.read_text(encoding='utf-8').splitlines() == ['i,s,b', '1,"a,""b""",00ff', ',,', '3,é,']
+
+
+def test_json_lines_are_strict_json(conn, tmp_path):
+    path = tmp_path / "out.jsonl"
+    export_cursor(conn.execute("SELECT i, r, r - r AS n FROM t"), str(path), 'jsonl')
+
+    def reject(constant):
+        raise ValueError(constant)
+
+    rows = [json.loads(line, parse_constant=reject) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert rows == [{"i": 1, "r": 1.5, "n": 0.0}, {"i": None, "r": None, "n": None},
+                    {"i": 3, "r": None, "n": None}]
+
+
+def test_columnar_round_trip(conn, tmp_path):
+    path = tmp_path / "out.zcol"
+    export_cursor(conn.execute("SELECT i, s, b FROM t"), str(path), 'zcol', chunk_size=2)
+    chunks = list(read_columnar(str(path)))
+    assert [columns for columns, _ in chunks] == [['i', 's', 'b']] * 2
+    assert [row for _, rows in chunks for row in rows] == \
+        [(1, 'a,"b"', b'\x00\xff'), (None, None, None), (3, 'é', b'')]
+
+
+def test_a_cancelled_export_leaves_no_file(conn, tmp_path):
+    path = tmp_path / "out.csv"
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(ExportCancelled):
+        export_cursor(conn.execute("SELECT * FROM t"), str(path), 'csv', cancel_event=cancel)
+    assert not path.exists()
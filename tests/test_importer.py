@@ -0,0 +1,79 @@
+# tests/test_importer.py
+
+import json
+import sqlite3
+
+import pytest
+
+from backend.importer import infer_type, Importer, detect_format
+
+
+@pytest.mark.parametrize("values, declared", [
+    (["1", "2", "-3"], 'INTEGER'),
+    (["1", "2.5"], 'REAL'),
+    (["1e3", ".5"], 'REAL'),
+    ([1, 2.5], 'REAL'),
+    ([True, 3], 'INTEGER'),
+    (["1", "", None], 'INTEGER'),
+    (["0", "-0"], 'INTEGER'),
+    ([], 'TEXT'),
+    (["1", "x"], 'TEXT'),
+    # Codes with leading zeros would lose them as numbers
+    (["007", "12"], 'TEXT'),
+    (["+01"], 'TEXT'),
+    # Beyond a 64-bit INTEGER
+    (["9223372036854775808"], 'TEXT'),
+    ([1 << 63], 'TEXT'),
+    (["9223372036854775807"], 'INTEGER'),
+    ([{"a": 1}], 'TEXT'),
+])
+def test_infer_type(values, declared):
+    assert infer_type(values) == declared
+
+
+def test_detect_format():
+    assert detect_format("a.CSV") == 'csv'
+    assert detect_format("a.ndjson") == 'jsonl'
+    assert detect_format("a.xlsx") is None
+
+
+def test_csv_creates_a_typed_table_with_nulls(tmp_path):
+    path = tmp_path / "rows.csv"
+    path.write_text("id,name,score\n1,a,1.5\n2,,2\n", encoding='utf-8')
+    conn = sqlite3.connect(':memory:')
+    summary = Importer(conn).run(str(path), "scores")
+    assert summary["rows"] == 2 and summary["created"]
+    assert conn.execute("SELECT id, name, score, typeof(score) FROM scores ORDER BY id").fetchall() == \
+        [(1, 'a', 1.5, 'real'), (2, None, 2.0, 'real')]
+
+
+def test_jsonl_values_are_bound_as_their_column_type(tmp_path):
+    path = tmp_path / "rows.jsonl"
+    records = [{"id": 1, "big": 1 << 70, "code": "007", "tags": ["a"]},
+               {"id": 2, "big": 5, "code": 7, "tags": None}]
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding='utf-8')
+    conn = sqlite3.connect(':memory:')
+    Importer(conn).run(str(path), "items")
+    assert conn.execute("SELECT id, big, code, tags FROM items ORDER BY id").fetchall() == \
+        [(1, str(1 << 70), '007', '["a"]'), (2, '5', '7', None)]
+
+
+def test_appending_rebuilds_indexes_whatever_the_case_of_the_table_name(tmp_path):
+    path = tmp_path / "rows.csv"
+    path.write_text("x\n1\n2\n", encoding='utf-8')
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE Numbers (x INTEGER)")
+    conn.execute("CREATE INDEX numbers_x ON Numbers (x)")
+    summary = Importer(conn).run(str(path), "numbers")
+    assert summary["indexes"] == 1 and not summary["created"]
+    assert conn.execute("SELECT count(*) FROM Numbers").fetchone()[0] == 2
+    assert conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall() == [('numbers_x',)]
+
+
+def test_a_failed_import_leaves_nothing(tmp_path):
+    path = tmp_path / "rows.csv"
+    path.write_text("a,b\n1,2\n3,4,5\n", encoding='utf-8')
+    conn = sqlite3.connect(':memory:')
+    with pytest.raises(ValueError):
+        Importer(conn).run(str(path), "broken")
+    assert conn.execute("SELECT count(*) FROM sqlite_master").fetchone()[0] == 0
@@ -0,0 +1,37 @@
+# tests/test_params.py
+
+import sqlite3
+
+import pytest
+
+from backend.params import find_parameters, parse_value, bind_parameters
+
+
+def test_placeholders_are_numbered_as_sqlite_numbers_them():
+    assert find_parameters("SELECT ?, ?, ?5, :a, @b, :a, ?") == ['?1', '?2', '?3', '?4', '?5', ':a', '@b', '?8']
+
+
+def test_placeholders_in_strings_and_comments_are_ignored():
+    assert find_parameters("SELECT ':x', \"$y\" -- :z\n/* @w */") == []
+
+
+@pytest.mark.parametrize("text, value", [
+    ("12", 12), (" -3 ", -3), ("+7", 7), ("1.5", 1.5), ("1e3", 1000.0), (".5", 0.5), ("NULL", None),
+    ("null", None), ("'a''b'", "a'b"), ("'12'", "12"), ("abc", "abc"),
+])
+def test_parse_value(text, value):
+    assert parse_value(text) == value
+    assert type(parse_value(text)) is type(value)
+
+
+@pytest.mark.parametrize("text", ["nan", "inf", "-Infinity", "1_000", "0x10", "١٢", "1e", "99999999999999999999"])
+def test_only_plain_ascii_numbers_become_numbers(text):
+    assert parse_value(text) == text
+
+
+def test_bind_parameters_by_name_or_position():
+    assert bind_parameters([':a', '@b'], {':a': 1, '@b': 2}) == {'a': 1, 'b': 2}
+    assert bind_parameters(['?1', ':a'], {'?1': 1, ':a': 2}) == [1, 2]
+    conn = sqlite3.connect(':memory:')
+    sql = "SELECT ?, :a"
+    assert conn.execute(sql, bind_parameters(find_parameters(sql), {'?1': 1, ':a': 2})).fetchone() == (1, 2)
@@ -0,0 +1,82 @@
+# tests/test_plan.py
+
+import sqlite3
+
+import pytest
+
+from backend.plan import explain, parse_references, suggest_indexes, walk
+from backend.schema import SchemaCache
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE customers (id INTEGER PRIMARY KEY, city TEXT, name TEXT)")
+    conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, cust INTEGER, date TEXT, total REAL)")
+    schema = SchemaCache()
+    schema.refresh(conn)
+    return conn, schema
+
+
+def suggestions(db, sql):
+    conn, schema = db
+    return [statement for statement, _ in suggest_indexes(sql, explain(conn, sql), schema)]
+
+
+def test_references_by_clause():
+    aliases, equality, ranges, ordering = parse_references(
+        "SELECT * FROM orders o WHERE o.cust = 5 AND total > 10 ORDER BY o.date")
+    assert aliases == {'o': 'orders', 'orders': 'orders'}
+    assert equality == [('o', 'cust')]
+    assert ranges == [(None, 'total')]
+    # DATE is a keyword to the lexer, but still a column name here
+    assert ordering == [('o', 'DATE')]
+
+
+def test_keyword_named_columns_keep_their_ordering():
+    assert parse_references("SELECT * FROM t ORDER BY date DESC")[3] == [(None, 'DATE')]
+    assert parse_references("SELECT * FROM t WHERE key = 1")[1] == [(None, 'KEY')]
+
+
+def test_value_on_the_left():
+    assert parse_references("SELECT * FROM t WHERE 5 = a")[1] == [(None, 'a')]
+
+
+def test_join_terms_filter_neither_table():
+    _, equality, _, _ = parse_references("SELECT * FROM o JOIN c ON o.cust = c.id WHERE c.city = :city")
+    assert equality == [('c', 'city')]
+
+
+def test_terms_joined_by_or_are_left_out():
+    assert parse_references("SELECT * FROM t WHERE a = 1 OR b = 2")[1:3] == ([], [])
+    _, equality, ranges, _ = parse_references("SELECT * FROM t WHERE a = 1 AND (b = 2 OR b = 3) AND c > 4")
+    assert equality == [(None, 'a')] and ranges == [(None, 'c')]
+
+
+def test_full_scans_are_flagged(db):
+    conn, _ = db
+    plan = explain(conn, "SELECT * FROM orders WHERE cust = ?", (1,))
+    assert [node.warning for node in walk(plan)] == ["Full table scan"]
+
+
+def test_equality_then_ordering(db):
+    assert suggestions(db, "SELECT * FROM orders o WHERE o.cust = 5 ORDER BY o.date") == \
+        ['CREATE INDEX IF NOT EXISTS "idx_orders_cust_date" ON "orders" ("cust", "date")']
+
+
+def test_no_index_for_an_or(db):
+    assert suggestions(db, "SELECT * FROM orders WHERE cust = 1 OR total = 2") == []
+
+
+def test_no_index_led_by_a_rowid_alias(db):
+    sql = "SELECT * FROM customers c JOIN orders o ON o.cust = c.id WHERE c.city = 'x' ORDER BY c.name"
+    assert all('"id"' not in statement for statement in suggestions(db, sql))
+    assert 'CREATE INDEX IF NOT EXISTS "idx_customers_city_name" ON "customers" ("city", "name")' in \
+        suggestions(db, sql)
+
+
+def test_existing_index_is_not_suggested_again(db):
+    conn, schema = db
+    conn.execute("CREATE INDEX orders_cust ON orders (cust)")
+    schema.refresh(conn)
+    assert suggestions(db, "SELECT * FROM orders WHERE cust = 1 AND total > 3") == []
@@ -0,0 +1,103 @@
+# tests/test_rowkeys.py
+
+import sqlite3
+
+import pytest
+
+from backend.rowkeys import table_key, result_key, KeysetPager
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE people (id INTEGER PRIMARY KEY, name TEXT, age INTEGER)")
+    conn.execute("CREATE TABLE pairs (a TEXT, b INTEGER, v TEXT, PRIMARY KEY (a, b)) WITHOUT ROWID")
+    conn.execute("CREATE TABLE plain (x, rowid)")
+    conn.execute("CREATE TABLE notes (body TEXT)")
+    conn.execute("CREATE VIEW grown AS SELECT * FROM people WHERE age >= 18")
+    conn.executemany("INSERT INTO people (name, age) VALUES (?, ?)", [(f"p{i}", i) for i in range(25)])
+    return conn
+
+
+def headers(conn, sql):
+    return [d[0] for d in conn.execute(sql).description]
+
+
+def key_of(conn, sql):
+    return result_key(conn, sql, headers(conn, sql))
+
+
+def test_table_key(conn):
+    assert table_key(conn, 'people') == (['id'], None)
+    assert table_key(conn, 'pairs') == (['a', 'b'], None)
+    # A column named rowid hides the real one behind its other names
+    assert table_key(conn, 'plain') == (['_rowid_'], '_rowid_')
+    assert table_key(conn, 'grown') is None
+    assert table_key(conn, 'missing') is None
+
+
+def test_star_and_aliases_map_back_to_their_columns(conn):
+    assert key_of(conn, "SELECT * FROM people WHERE age > 3") == \
+        ('people', ['id'], [0], ['id', 'name', 'age'])
+    assert key_of(conn, "SELECT name AS who, id AS n FROM people ORDER BY id;") == \
+        ('people', ['id'], [1], ['name', 'id'])
+    assert key_of(conn, "SELECT rowid, body FROM notes") == ('notes', ['rowid'], [0], ['rowid', 'body'])
+    # Here rowid is a column, and the real rowid goes by _rowid_
+    assert key_of(conn, "SELECT rowid, x FROM plain") is None
+
+
+def test_results_without_the_key_are_read_only(conn):
+    assert key_of(conn, "SELECT name FROM people") is None
+    assert key_of(conn, "SELECT b, v FROM pairs") is None
+    assert key_of(conn, "SELECT a, b, v FROM pairs")[2] == [0, 1]
+
+
+@pytest.mark.parametrize('sql', [
+    "SELECT id, name n FROM people",
+    "SELECT id, upper(name) FROM people",
+    "SELECT id, name AS id FROM people",
+    "SELECT * FROM people, pairs",
+    "SELECT * FROM people JOIN pairs ON 1",
+    "SELECT DISTINCT id FROM people",
+    "SELECT * FROM grown",
+    "SELECT * FROM people GROUP BY age",
+    "UPDATE people SET age = 1",
+])
+def test_anything_else_is_read_only(conn, sql):
+    assert result_key(conn, sql, ['id', 'name']) is None
+
+
+def test_find_table_resolves_the_name(conn):
+    names = ['id', 'name', 'age']
+    assert result_key(conn, 'SELECT * FROM "PEOPLE"', names, find_table=str.lower)[0] == 'people'
+    assert result_key(conn, "SELECT * FROM people", names, find_table=lambda name: None) is None
+
+
+def test_pager_reads_every_row_once(conn):
+    pager = KeysetPager(conn, 'people', ['id'])
+    seen = []
+    while True:
+        rows = pager.fetchmany(10)
+        if not rows:
+            break
+        seen.extend(row[0] for row in rows)
+    assert seen == list(range(1, 26))
+    assert pager.fetchmany(10) == []
+
+
+def test_pager_starts_after_a_key_or_from_a_value(conn):
+    assert [row[0] for row in KeysetPager(conn, 'people', ['id'], after=(20,)).fetchmany()] == [21, 22, 23, 24, 25]
+    conn.executemany("INSERT INTO pairs VALUES (?, ?, ?)", [(a, b, None) for a in 'xyz' for b in range(3)])
+    pager = KeysetPager(conn, 'pairs', ['a', 'b'], start='y')
+    first = pager.fetchmany(4)
+    assert [row[:2] for row in first] == [('y', 0), ('y', 1), ('y', 2), ('z', 0)]
+    assert [row[:2] for row in pager.fetchmany(4)] == [('z', 1), ('z', 2)]
+
+
+def test_pager_selects_a_hidden_rowid_first(conn):
+    conn.executemany("INSERT INTO plain VALUES (?, ?)", [(i, 'r') for i in range(3)])
+    pager = KeysetPager(conn, 'plain', ['_rowid_'], hidden='_rowid_')
+    assert pager.headers == ['rowid', 'x', 'rowid'] and pager.key_indexes == [0]
+    assert [row[0] for row in pager.fetchmany(2) + pager.fetchmany(2)] == [1, 2, 3]
+    pager.close()
+    assert pager.fetchmany() == []
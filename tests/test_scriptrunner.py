@@ -0,0 +1,75 @@
+# tests/test_scriptrunner.py
+
+import sqlite3
+
+import pytest
+
+from backend.scriptrunner import iter_statements, first_keyword, statement_at, ScriptRunner, ScriptError
+
+SCRIPT = """-- head
+CREATE TABLE t(x);  INSERT INTO t VALUES (';');
+CREATE TRIGGER tr AFTER INSERT ON t BEGIN
+  UPDATE t SET x = x || '!';
+END;
+;
+INSERT INTO t VALUES ('/* ; */')"""
+
+
+def statements(text):
+    return [(sql, line) for sql, line, _ in iter_statements(text.splitlines(True))]
+
+
+def test_semicolons_in_strings_comments_and_triggers_do_not_split():
+    assert statements(SCRIPT) == [
+        ("-- head\nCREATE TABLE t(x);", 2),
+        ("INSERT INTO t VALUES (';');", 2),
+        ("CREATE TRIGGER tr AFTER INSERT ON t BEGIN\n  UPDATE t SET x = x || '!';\nEND;", 3),
+        ("INSERT INTO t VALUES ('/* ; */')", 7),
+    ]
+
+
+def test_bytes_lines_and_bytes_read():
+    lines = [line.encode('utf-8') for line in "SELECT 'é';\nSELECT 2;\n".splitlines(True)]
+    assert list(iter_statements(lines)) == [("SELECT 'é';", 1, 13), ("SELECT 2;", 2, 23)]
+
+
+def test_comments_and_empty_statements_alone_yield_nothing():
+    assert statements("-- only a comment\n;;\n/* and ; this */\n") == []
+
+
+def test_first_keyword_skips_leading_comments():
+    assert first_keyword("/* c */ -- x\n  select 1") == 'SELECT'
+    assert first_keyword("-- nothing") == ''
+
+
+def test_runner_commits_in_batches():
+    conn = sqlite3.connect(':memory:')
+    runner = ScriptRunner(conn, batch_size=2)
+    lines = ["CREATE TABLE t(x);\n"] + [f"INSERT INTO t VALUES ({i});\n" for i in range(5)]
+    summary = runner.run(lines)
+    assert summary["statements"] == 6
+    assert conn.execute("SELECT count(*) FROM t").fetchone()[0] == 5
+    assert not conn.in_transaction
+
+
+def test_runner_failure_rolls_back_the_open_batch():
+    conn = sqlite3.connect(':memory:')
+    runner = ScriptRunner(conn, batch_size=3)
+    lines = ["CREATE TABLE t(x UNIQUE);\n", "INSERT INTO t VALUES (1);\n", "INSERT INTO t VALUES (2);\n",
+             "INSERT INTO t VALUES (3);\n", "INSERT INTO t VALUES (3);\n"]
+    with pytest.raises(ScriptError) as raised:
+        runner.run(lines)
+    assert raised.value.line == 5
+    assert raised.value.committed == 3
+    assert [row[0] for row in conn.execute("SELECT x FROM t ORDER BY x")] == [1, 2]
+
+
+def test_statement_at_the_cursor():
+    text = "SELECT 1;\nSELECT 2; SELECT 3;\n\n-- c\nSELECT 4"
+    assert statement_at(text, 0) == "SELECT 1;"
+    assert statement_at(text, 10) == "SELECT 2;"
+    # Just after a semicolon on the same line: the statement it ends
+    assert statement_at(text, text.index(" SELECT 3") + 1) == "SELECT 2;"
+    assert statement_at(text, text.index("SELECT 3") + 1) == "SELECT 3;"
+    assert statement_at(text, len(text)) == "-- c\nSELECT 4"
+    assert statement_at("   ", 2) == ''
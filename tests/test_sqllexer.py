@@ -0,0 +1,55 @@
+# tests/test_sqllexer.py
+
+from backend.sqllexer import tokenize_line, scan_line, NORMAL, BLOCK_COMMENT, STRING, QUOTED_IDENTIFIER, \
+    BACKTICK_IDENTIFIER
+
+
+def kinds(line, state=NORMAL):
+    tokens, state = tokenize_line(line, state)
+    return [(kind, line[start:start + length]) for kind, start, length in tokens if kind != 'ws'], state
+
+
+def test_keywords_words_strings_and_comments():
+    tokens, state = kinds("SELECT a, 'it''s' FROM t -- done")
+    assert tokens == [('keyword', 'SELECT'), ('word', 'a'), ('operator', ','), ('string', "'it''s'"),
+                      ('keyword', 'FROM'), ('word', 't'), ('comment', '-- done')]
+    assert state == NORMAL
+
+
+def test_keywords_are_case_insensitive():
+    assert kinds("select x from y")[0][0] == ('keyword', 'select')
+
+
+def test_numbers_blobs_and_parameters():
+    tokens, _ = kinds("x'ff' 1.5e3 .5 0x1F ?2 :id @p $q")
+    assert tokens == [('string', "x'ff'"), ('number', '1.5e3'), ('number', '.5'), ('number', '0x1F'),
+                      ('param', '?2'), ('param', ':id'), ('param', '@p'), ('param', '$q')]
+
+
+def test_quoted_identifiers():
+    tokens, _ = kinds('"a ""b""" `c` [d e]')
+    assert tokens == [('identifier', '"a ""b"""'), ('identifier', '`c`'), ('identifier', '[d e]')]
+
+
+def test_unterminated_tokens_carry_their_state_to_the_next_line():
+    assert kinds("x /* open")[1] == BLOCK_COMMENT
+    assert kinds("x = 'open")[1] == STRING
+    assert kinds('x = "open')[1] == QUOTED_IDENTIFIER
+    assert kinds('x = `open')[1] == BACKTICK_IDENTIFIER
+    # A string ending in a doubled quote is still open
+    assert kinds("x = 'it''")[1] == STRING
+
+
+def test_continued_states_end_where_their_token_does():
+    assert kinds("still */ SELECT", BLOCK_COMMENT) == ([('comment', 'still */'), ('keyword', 'SELECT')], NORMAL)
+    assert kinds("abc', x", STRING) == ([('string', "abc'"), ('operator', ','), ('word', 'x')], NORMAL)
+    assert kinds("no end here", BLOCK_COMMENT) == ([('comment', 'no end here')], BLOCK_COMMENT)
+
+
+def test_scan_line_only_reports_what_can_hide_a_semicolon():
+    line = "a ';' ; \"b;\" -- ;"
+    tokens, state = scan_line(line)
+    assert [(kind, line[start:start + length]) for kind, start, length in tokens] == \
+        [('string', "';'"), ('semicolon', ';'), ('identifier', '"b;"'), ('comment', '-- ;')]
+    assert state == NORMAL
+    assert scan_line('"a;b')[1] == QUOTED_IDENTIFIER
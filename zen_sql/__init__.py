@@ -0,0 +1,4 @@
+# zen_sql/__init__.py
+
+# Headless entry point: python -m zen_sql run db.sqlite script.sql --out result.csv
+# Only the backend package is imported from here, never PyQt5.
@@ -0,0 +1,8 @@
+# zen_sql/__main__.py
+
+import sys
+
+from backend.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())